@@ -1,27 +1,252 @@
+import asyncio
 import os
+import time
+from datetime import timedelta
+from typing import Dict
+from urllib.parse import parse_qsl, urlencode
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
 from prisma import Prisma, register
 from prisma.models import Book, User, Review, Collection, CollectionBook, ExtractedItem
+from app.services.metrics import record_db_query
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+# Optional read replica for read-only endpoints
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+# Seconds a client keeps reading from the primary after it writes
+READ_AFTER_WRITE_WINDOW = int(os.getenv("READ_AFTER_WRITE_WINDOW", "10"))
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))  # connections held by the query engine
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))  # seconds
+# Requests allowed to use the database at once; the rest queue for up to DB_POOL_TIMEOUT
+DB_MAX_ACTIVE_REQUESTS = int(os.getenv("DB_MAX_ACTIVE_REQUESTS", str(DB_POOL_SIZE)))
+
+# Local development uses SQLite (schema.prisma), production PostgreSQL
+IS_SQLITE = DATABASE_URL.startswith("file:")
+
+# SQLite has no createMany; bulk writes fall back to batched creates there
+SUPPORTS_CREATE_MANY = not IS_SQLITE
+
+def pooled_url(url: str, pool_size: int = DB_POOL_SIZE, pool_timeout: float = DB_POOL_TIMEOUT) -> str:
+    """Add the query engine's pool settings to a connection URL
+
+    Settings already present in the URL win over the environment.
+    """
+    base, _, query = url.partition("?")
+    params = dict(parse_qsl(query))
+    params.setdefault("connection_limit", str(pool_size))
+    params.setdefault("pool_timeout", str(max(1, round(pool_timeout))))
+    return f"{base}?{urlencode(params)}"
+
+class InstrumentedPrisma(Prisma):
+    """Prisma client that adds each query to the current request's metrics
+
+    Transactions copy the client class, so their queries are counted too;
+    a batch_() commit is sent as a single query and isn't.
+    """
+
+    async def _execute(self, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super()._execute(**kwargs)
+        finally:
+            record_db_query(time.perf_counter() - start)
+
+def create_client(url: str = DATABASE_URL) -> Prisma:
+    """Build a Prisma client with the configured pool and timeouts"""
+    options = {"connect_timeout": timedelta(seconds=DB_CONNECT_TIMEOUT)}
+    if url:
+        options["datasource"] = {"url": pooled_url(url)}
+    return InstrumentedPrisma(**options)
+
+class PoolTimeoutError(Exception):
+    """Raised when no database slot frees up within the pool timeout"""
+
+class ConnectionPool:
+    """Limits the requests using the database at once and records pool metrics
+
+    A request that can't get a slot within the timeout fails fast with a
+    PoolTimeoutError, instead of queueing inside the query engine and
+    surfacing as an opaque database error.
+    """
+
+    def __init__(self, size: int = DB_MAX_ACTIVE_REQUESTS, timeout: float = DB_POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(size)
+        self.in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def acquire(self):
+        """Wait for a free slot"""
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            # asyncio.timeout cancels the wait in place; wait_for runs it in
+            # another task, and before Python 3.12 a slot acquired just as
+            # the caller was cancelled could be lost
+            async with asyncio.timeout(self.timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - start
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.acquired += 1
+        self.in_use += 1
+
+    def release(self):
+        """Return a slot taken by acquire()"""
+        self.in_use -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict:
+        """Current usage and totals since startup"""
+        return {
+            "size": self.size,
+            "inUse": self.in_use,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avgWaitMs": round(self.wait_seconds_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+            "maxWaitMs": round(self.wait_seconds_max * 1000, 3)
+        }
 
 # Initialize Prisma client
-prisma = Prisma()
+prisma = create_client()
+replica = create_client(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+db_pool = ConnectionPool()
+
+# Set on a client after it writes, holding the end of its read-your-writes window
+STICKY_COOKIE = "bookloom_primary_until"
+# Sent by clients that need the primary for one read (e.g. server-side rendering after a write)
+READ_PRIMARY_HEADER = "x-read-primary"
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
 
 # Register Prisma client for async operations
 register(prisma)
 
 async def connect_db():
-    """Connect to the database"""
-    if not prisma.is_connected():
-        await prisma.connect()
+    """Connect to the database (and the replica, if configured)"""
+    for client in (prisma, replica):
+        if client is not None and not client.is_connected():
+            await client.connect()
 
 async def disconnect_db():
     """Disconnect from the database"""
-    if prisma.is_connected():
-        await prisma.disconnect()
+    for client in (prisma, replica):
+        if client is not None and client.is_connected():
+            await client.disconnect()
 
-async def get_db():
-    """Dependency to get database connection"""
-    await connect_db()
-    return prisma
+async def acquire_slot(request: Request):
+    """Take a pool slot for the request, or fail it with a 503"""
+    try:
+        await db_pool.acquire()
+    except PoolTimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Database is busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+    request.state.db_slots = getattr(request.state, "db_slots", 0) + 1
+
+def release_slots(request: Request):
+    """Return the request's pool slots; safe to call more than once"""
+    slots = getattr(request.state, "db_slots", 0)
+    request.state.db_slots = 0
+    for _ in range(slots):
+        db_pool.release()
+
+class PooledRoute(APIRoute):
+    """Route that returns its pool slots once the endpoint has built its response
+
+    Teardown of yield dependencies only runs after the response body has
+    been sent, so releasing there would hold the slot while a slow client
+    downloads.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def pooled_handler(request: Request) -> Response:
+            try:
+                return await handler(request)
+            finally:
+                release_slots(request)
+
+        return pooled_handler
+
+async def get_db(request: Request):
+    """Dependency to get the database client, holding a pool slot for the request
+
+    The client is connected once by the application lifespan. When every
+    slot stays busy for DB_POOL_TIMEOUT the request gets a 503. Routers
+    use PooledRoute so the slot is freed before the response is sent.
+    """
+    await acquire_slot(request)
+    try:
+        yield prisma
+    finally:
+        release_slots(request)
+
+def reads_from_primary(request: Request) -> bool:
+    """Whether a read must see this client's own recent writes"""
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true"):
+        return True
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_client(request: Request) -> Prisma:
+    """The replica, unless there is none or the client needs its own writes"""
+    if replica is None:
+        return prisma
+    if reads_from_primary(request):
+        # Tells the response cache not to serve an entry filled from the replica
+        request.state.read_your_writes = True
+        return prisma
+    return replica
+
+async def get_read_db(request: Request):
+    """Dependency for read-only endpoints: like get_db, but may return the replica
+
+    Only use it for endpoints that don't write; writes must go through
+    get_db so they reach the primary.
+    """
+    await acquire_slot(request)
+    try:
+        yield read_client(request)
+    finally:
+        release_slots(request)
+
+def mark_write(response: Response):
+    """Pin the client to the primary for READ_AFTER_WRITE_WINDOW seconds"""
+    response.set_cookie(
+        STICKY_COOKIE,
+        str(int(time.time()) + READ_AFTER_WRITE_WINDOW),
+        max_age=READ_AFTER_WRITE_WINDOW,
+        httponly=True,
+        samesite="lax"
+    )
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Mark clients that made a successful write so their next reads hit the primary"""
+    response = await call_next(request)
+    if replica is not None and request.method in WRITE_METHODS and response.status_code < 400:
+        mark_write(response)
+    return response
 
 # Lifecycle events
 async def startup_db():
@@ -31,4 +256,3 @@ async def startup_db():
 async def shutdown_db():
     """Shutdown event - disconnect from database"""
     await disconnect_db()
-
@@ -2,6 +2,15 @@ from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import os
+import time
+
+from app.services.metrics import (
+    REQUESTS_IN_FLIGHT,
+    UNMATCHED_ROUTE,
+    observe_request,
+    server_timing,
+    start_request,
+)
 
 # TODO: Implement proper authentication middleware
 # For now, this is a placeholder
@@ -47,6 +56,56 @@ async def require_auth(request: Request) -> dict:
     
     return user
 
+class TimingMiddleware:
+    """
+    ASGI middleware timing every request
+    Adds a Server-Timing header (database vs. application time) and records
+    the Prometheus metrics served at /metrics: latency, in-flight requests,
+    database queries and time, and response size per route
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        metrics = start_request()
+        status = 500
+        size = 0
+        
+        async def send_timed(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Headers go out before a streamed body, so its time isn't included
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(time.perf_counter() - start, metrics).encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # Set by the router; labels use the path template, not the raw path
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start,
+                size,
+                metrics
+            )
+
+
 
 
 
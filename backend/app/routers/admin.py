@@ -1,20 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-from typing import Optional
-from app.database import get_db
+from typing import List, Optional
+from app.database import PooledRoute, get_db
 from prisma import Prisma
 import os
-import shutil
 from datetime import datetime
-from app.services.pdf_extractor import extract_text_from_pdf, extract_items_from_text
+from app.services.ingest import BatchError, ingest_batch, parse_manifest, receive_archive, receive_files, wanted_files
+from app.services.cache import TAG_BOOKS, TAG_COLLECTIONS, TAG_STATS, book_tag, response_cache
+from app.services.jobs import enqueue_analysis
+from app.services.page_store import remove_page_store
+from app.services.search import index_book, remove_book_from_index
+from app.services.stats import apply_stat_changes, book_removal_changes, book_stat_changes
+from app.services.storage import (
+    MAX_COVER_IMAGE_SIZE,
+    MAX_PDF_SIZE,
+    UPLOADS_DIR,
+    UploadTooLargeError,
+    remove_file,
+    resolve_upload_path,
+    safe_filename,
+    save_upload,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=PooledRoute)
 
 # Create uploads directory if it doesn't exist
-# Go up from backend/app/routers to backend, then to project root
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-PROJECT_ROOT = os.path.dirname(BASE_DIR)  # Go up from backend to project root
-UPLOADS_DIR = os.path.join(PROJECT_ROOT, "public", "uploads", "books")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
 @router.post("/books")
@@ -40,103 +50,78 @@ async def upload_book(
         if not pdf.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="PDF file is required")
         
-        # Save PDF file
+        # Validate image type before anything is written
+        valid_extensions = ['.png', '.jpg', '.jpeg', '.webp']
+        if coverImage and not any(coverImage.filename.lower().endswith(ext) for ext in valid_extensions):
+            raise HTTPException(status_code=400, detail="Invalid image type. Only PNG, JPG, and WEBP are allowed")
+        
+        # Save PDF file (streamed in chunks, hashed on the way)
         timestamp = int(datetime.now().timestamp() * 1000)
-        safe_filename = "".join(c for c in pdf.filename if c.isalnum() or c in (' ', '-', '_', '.'))
-        pdf_filename = f"{timestamp}-{safe_filename}"
+        pdf_filename = f"{timestamp}-{safe_filename(pdf.filename)}"
         pdf_path = os.path.join(UPLOADS_DIR, pdf_filename)
         
-        with open(pdf_path, "wb") as buffer:
-            shutil.copyfileobj(pdf.file, buffer)
+        try:
+            saved_pdf = await save_upload(pdf, pdf_path, MAX_PDF_SIZE)
+        except UploadTooLargeError:
+            raise HTTPException(status_code=400, detail=f"PDF file size must be less than {MAX_PDF_SIZE // (1024 * 1024)}MB")
         
         # Handle cover image if provided
+        cover_path = None
         cover_image_url = None
         if coverImage:
-            # Validate image size (5MB limit)
-            coverImage.file.seek(0, os.SEEK_END)
-            file_size = coverImage.file.tell()
-            coverImage.file.seek(0)
-            
-            if file_size > 5 * 1024 * 1024:
-                raise HTTPException(status_code=400, detail="Cover image size must be less than 5MB")
-            
-            # Validate image type
-            valid_extensions = ['.png', '.jpg', '.jpeg', '.webp']
-            if not any(coverImage.filename.lower().endswith(ext) for ext in valid_extensions):
-                raise HTTPException(status_code=400, detail="Invalid image type. Only PNG, JPG, and WEBP are allowed")
-            
-            # Save cover image
             cover_ext = os.path.splitext(coverImage.filename)[1] or '.jpg'
             cover_filename = f"{timestamp}-cover{cover_ext}"
             cover_path = os.path.join(UPLOADS_DIR, cover_filename)
             
-            with open(cover_path, "wb") as buffer:
-                shutil.copyfileobj(coverImage.file, buffer)
+            # Validate image size (5MB limit) while saving
+            try:
+                await save_upload(coverImage, cover_path, MAX_COVER_IMAGE_SIZE)
+            except UploadTooLargeError:
+                remove_file(pdf_path)
+                raise HTTPException(status_code=400, detail="Cover image size must be less than 5MB")
             
             cover_image_url = f"/uploads/books/{cover_filename}"
         
         # Create book record
-        book = await db.book.create(
-            data={
-                "title": title,
-                "author": author,
-                "description": description,
-                "publicationYear": publicationYear,
-                "licenseType": licenseType,
-                "category": category,
-                "isPublic": isPublic,
-                "pdfUrl": f"/uploads/books/{pdf_filename}",
-                "coverImage": cover_image_url,
-                "status": "PUBLISHED",
-                "authorId": "temp_user_id"  # TODO: Use actual session.user.id
-            }
-        )
+        try:
+            async with db.tx() as tx:
+                book = await tx.book.create(
+                    data={
+                        "title": title,
+                        "author": author,
+                        "description": description,
+                        "publicationYear": publicationYear,
+                        "licenseType": licenseType,
+                        "category": category,
+                        "isPublic": isPublic,
+                        "pdfUrl": f"/uploads/books/{pdf_filename}",
+                        "contentHash": saved_pdf.content_hash,
+                        "coverImage": cover_image_url,
+                        "status": "PUBLISHED",
+                        "authorId": "temp_user_id"  # TODO: Use actual session.user.id
+                    }
+                )
+                await apply_stat_changes(tx, book_stat_changes(book, 1))
+        except:
+            # Nothing refers to the saved files
+            remove_file(pdf_path)
+            if cover_path:
+                remove_file(cover_path)
+            raise
         
-        # Auto-analyze if public-domain or CC
-        analyzed_at = None
-        items_extracted = 0
+        await index_book(db, book)
+        await response_cache.invalidate(TAG_BOOKS, TAG_STATS)
         
+        # Auto-analyze if public-domain or CC (runs in a background worker)
+        job = None
         if licenseType in ['public-domain', 'CC']:
-            try:
-                # Extract text from PDF
-                pages = await extract_text_from_pdf(pdf_path)
-                
-                if pages:
-                    # Extract items (quotes, verses, code)
-                    items = extract_items_from_text(pages)
-                    
-                    if items:
-                        # Save extracted items
-                        for item in items:
-                            await db.extracteditem.create(
-                                data={
-                                    "bookId": book.id,
-                                    "type": item['type'],
-                                    "content": item['content'],
-                                    "pageNumber": item.get('pageNumber'),
-                                    "position": item.get('position')
-                                }
-                            )
-                        
-                        items_extracted = len(items)
-                        analyzed_at = datetime.now()
-                        
-                        # Update book analyzed timestamp
-                        await db.book.update(
-                            where={"id": book.id},
-                            data={"analyzedAt": analyzed_at}
-                        )
-            except Exception as e:
-                print(f"Error during PDF analysis: {str(e)}")
-                # Don't fail upload if analysis fails
+            job = await enqueue_analysis(db, book.id)
         
         return {
-            "book": {
-                **book.dict(),
-                "analyzedAt": analyzed_at.isoformat() if analyzed_at else None
-            },
-            "autoAnalyzed": bool(analyzed_at),
-            "itemsExtracted": items_extracted
+            "book": book.dict(),
+            "autoAnalyzed": False,
+            "itemsExtracted": 0,
+            "jobId": job.id if job else None
         }
         
     except HTTPException:
@@ -144,6 +129,38 @@ async def upload_book(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload book: {str(e)}")
 
+@router.post("/books/batch")
+async def upload_books_batch(
+    manifest: Optional[str] = Form(None),
+    files: List[UploadFile] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    db: Prisma = Depends(get_db)
+):
+    """Upload many books at once from PDFs (or a zip/tar archive of them) and a JSON manifest"""
+    try:
+        # TODO: Add authentication check
+        
+        if not files and not archive:
+            raise HTTPException(status_code=400, detail="Send the PDFs as files or in an archive")
+        
+        prefix = str(int(datetime.now().timestamp() * 1000))
+        try:
+            if archive:
+                entries, saved, errors = await receive_archive(archive, manifest, prefix)
+            else:
+                entries = parse_manifest(manifest)
+                saved, errors = await receive_files(files, wanted_files(entries, prefix))
+        except BatchError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # Duplicates and books with missing files are reported per book, not as an error
+        return await ingest_batch(db, entries, saved, errors)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload books: {str(e)}")
+
 @router.get("/books")
 async def get_admin_books(
     status: Optional[str] = None,
@@ -191,9 +208,30 @@ async def delete_book(
     try:
         # TODO: Add authentication check
         
-        await db.book.delete(where={"id": book_id})
+        # The book's items and reviews are deleted with it
+        async with db.tx() as tx:
+            book = await tx.book.find_unique(where={"id": book_id})
+            if not book:
+                raise HTTPException(status_code=404, detail="Book not found")
+            
+            changes = await book_removal_changes(tx, book)
+            await tx.book.delete(where={"id": book_id})
+            await apply_stat_changes(tx, changes)
+        
+        # Files go only once the delete is committed
+        for url in (book.pdfUrl, book.coverImage):
+            if url:
+                remove_file(resolve_upload_path(url))
+        if book.pdfUrl:
+            remove_page_store(resolve_upload_path(book.pdfUrl))
+        
+        await remove_book_from_index(db, book_id)
+        # Collections count their books
+        await response_cache.invalidate(TAG_BOOKS, book_tag(book_id), TAG_COLLECTIONS, TAG_STATS)
         
         return {"message": "Book deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete book: {str(e)}")
 
@@ -202,7 +240,7 @@ async def analyze_book(
     book_id: str,
     db: Prisma = Depends(get_db)
 ):
-    """Manually trigger PDF analysis for a book"""
+    """Queue PDF analysis for a book"""
     try:
         # TODO: Add authentication check
         
@@ -213,44 +251,11 @@ async def analyze_book(
         if not book.pdfUrl:
             raise HTTPException(status_code=400, detail="Book has no PDF file")
         
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        PROJECT_ROOT = os.path.dirname(BASE_DIR)
-        pdf_path = os.path.join(PROJECT_ROOT, book.pdfUrl.lstrip("/"))
-        
-        # Extract text from PDF
-        pages = await extract_text_from_pdf(pdf_path)
-        
-        if not pages:
-            raise HTTPException(status_code=400, detail="Failed to extract text from PDF")
-        
-        # Extract items
-        items = extract_items_from_text(pages)
-        
-        if items:
-            # Delete existing items
-            await db.extracteditem.delete_many(where={"bookId": book_id})
-            
-            # Save new items
-            for item in items:
-                await db.extracteditem.create(
-                    data={
-                        "bookId": book_id,
-                        "type": item['type'],
-                        "content": item['content'],
-                        "pageNumber": item.get('pageNumber'),
-                        "position": item.get('position')
-                    }
-                )
-        
-        analyzed_at = datetime.now()
-        await db.book.update(
-            where={"id": book_id},
-            data={"analyzedAt": analyzed_at}
-        )
+        job = await enqueue_analysis(db, book_id)
         
         return {
-            "itemsExtracted": len(items),
-            "analyzedAt": analyzed_at.isoformat()
+            "jobId": job.id,
+            "status": job.status
         }
         
     except HTTPException:
@@ -258,3 +263,23 @@ async def analyze_book(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze book: {str(e)}")
 
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    db: Prisma = Depends(get_db)
+):
+    """Get the status of a background job"""
+    try:
+        # TODO: Add authentication check
+        
+        job = await db.analysisjob.find_unique(where={"id": job_id})
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch job: {str(e)}")
@@ -1,11 +1,41 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Path, Query, Depends, Request
 from typing import Optional
-from app.database import get_db
+from app.database import PooledRoute, get_db, get_read_db
 from prisma import Prisma
 from pydantic import BaseModel
 from datetime import datetime
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    DOCUMENT_ORDER,
+    MAX_PAGE_SIZE,
+    NEWEST_FIRST,
+    InvalidCursorError,
+    find_page,
+)
+from app.services.cache import TAG_BOOKS, TAG_STATS, book_tag, response_cache
+from app.services.page_store import open_page_store
+from app.services.search import index_book
+from app.services.stats import apply_stat_changes, book_stat_changes
+from app.services.storage import resolve_upload_path
 
-router = APIRouter()
+router = APIRouter(route_class=PooledRoute)
+
+# Response cache TTLs (seconds); writes invalidate entries sooner
+BOOKS_CACHE_TTL = 30
+BOOK_CACHE_TTL = 60
+
+# Items and reviews embedded in the book detail response
+DETAIL_PAGE_SIZE = 20
+
+USER_SELECT = {
+    "select": {
+        "id": True,
+        "name": True,
+        "email": True,
+        "image": True
+    }
+}
 
 class BookCreate(BaseModel):
     title: str
@@ -18,13 +48,20 @@ class BookCreate(BaseModel):
 
 @router.get("")
 async def get_books(
+    request: Request,
     status: Optional[str] = None,
     authorId: Optional[str] = None,
     licenseType: Optional[str] = None,
     category: Optional[str] = None,
-    db: Prisma = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Prisma = Depends(get_read_db)
 ):
-    """Get all public books with optional filters"""
+    """Get public books with optional filters, newest first
+    
+    Pages are keyed on (createdAt, id): pass the returned nextCursor to
+    get the next page. nextCursor is null on the last page.
+    """
     try:
         where = {
             "isPublic": True
@@ -39,86 +76,203 @@ async def get_books(
         if category:
             where["category"] = category
         
-        books = await db.book.find_many(
-            where=where,
-            include={
-                "uploadedBy": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True,
-                        "image": True
-                    }
-                },
-                "reviews": {
-                    "select": {
-                        "rating": True
-                    }
-                },
-                "_count": {
-                    "select": {
-                        "extractedItems": True
+        async def load():
+            books, next_cursor = await find_page(
+                db.book,
+                where,
+                NEWEST_FIRST,
+                limit,
+                cursor,
+                include={
+                    "uploadedBy": USER_SELECT,
+                    "_count": {
+                        "select": {
+                            "extractedItems": True
+                        }
                     }
                 }
-            },
-            order={
-                "createdAt": "desc"
-            },
-            take=50
-        )
+            )
+            
+            return {
+                "books": books,
+                "nextCursor": next_cursor
+            }
         
-        return books
+        # Tagged with every listed book so a change to one of them evicts the page
+        return await response_cache.respond(
+            request,
+            BOOKS_CACHE_TTL,
+            lambda page: [TAG_BOOKS] + [book_tag(book.id) for book in page["books"]],
+            load
+        )
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch books: {str(e)}")
 
 @router.get("/{book_id}")
 async def get_book(
+    request: Request,
     book_id: str,
-    db: Prisma = Depends(get_db)
+    db: Prisma = Depends(get_read_db)
 ):
-    """Get a single book by ID"""
+    """Get a single book by ID with counts and the first page of items and reviews
+    
+    The rest are served by /{book_id}/items and /{book_id}/reviews,
+    starting from itemsNextCursor and reviewsNextCursor.
+    """
     try:
-        book = await db.book.find_unique(
-            where={"id": book_id},
-            include={
-                "uploadedBy": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True,
-                        "image": True
-                    }
-                },
-                "extractedItems": True,
-                "reviews": {
-                    "include": {
-                        "user": {
+        async def load():
+            book, (items, items_cursor), (reviews, reviews_cursor) = await asyncio.gather(
+                db.book.find_unique(
+                    where={"id": book_id},
+                    include={
+                        "uploadedBy": USER_SELECT,
+                        "_count": {
                             "select": {
-                                "id": True,
-                                "name": True,
-                                "email": True,
-                                "image": True
+                                "extractedItems": True,
+                                "reviews": True
                             }
                         }
                     }
-                },
-                "_count": {
-                    "select": {
-                        "extractedItems": True,
-                        "reviews": True
-                    }
-                }
+                ),
+                find_page(db.extracteditem, {"bookId": book_id}, DOCUMENT_ORDER, DETAIL_PAGE_SIZE),
+                find_page(
+                    db.review,
+                    {"bookId": book_id},
+                    NEWEST_FIRST,
+                    DETAIL_PAGE_SIZE,
+                    include={"user": USER_SELECT}
+                )
+            )
+            
+            if not book:
+                raise HTTPException(status_code=404, detail="Book not found")
+            
+            return {
+                **book.dict(),
+                "extractedItems": items,
+                "itemsNextCursor": items_cursor,
+                "reviews": reviews,
+                "reviewsNextCursor": reviews_cursor
             }
-        )
         
+        return await response_cache.respond(request, BOOK_CACHE_TTL, [book_tag(book_id)], load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch book: {str(e)}")
+
+async def ensure_book_exists(db: Prisma, book_id: str):
+    """Raise a 404 if there is no book with this ID"""
+    if not await db.book.count(where={"id": book_id}):
+        raise HTTPException(status_code=404, detail="Book not found")
+
+@router.get("/{book_id}/items")
+async def get_book_items(
+    book_id: str,
+    type: Optional[str] = None,
+    pageNumber: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Prisma = Depends(get_read_db)
+):
+    """Get a book's extracted items in document order, a page at a time"""
+    try:
+        await ensure_book_exists(db, book_id)
+        
+        where = {"bookId": book_id}
+        if type:
+            where["type"] = type
+        if pageNumber is not None:
+            where["pageNumber"] = pageNumber
+        
+        items, next_cursor = await find_page(db.extracteditem, where, DOCUMENT_ORDER, limit, cursor)
+        
+        return {
+            "items": items,
+            "nextCursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch items: {str(e)}")
+
+@router.get("/{book_id}/pages/{page_number}")
+async def get_book_page(
+    book_id: str,
+    page_number: int = Path(..., ge=1),
+    db: Prisma = Depends(get_read_db)
+):
+    """Get the text of one page of a book's PDF, numbered from 1
+    
+    Pages are numbered like an extracted item's pageNumber: pages without
+    any text are skipped. Served from the page text stored when the book
+    was analyzed; the PDF itself is never opened.
+    """
+    try:
+        book = await db.book.find_unique(where={"id": book_id})
         if not book:
             raise HTTPException(status_code=404, detail="Book not found")
+        if not book.pdfUrl:
+            raise HTTPException(status_code=404, detail="Book has no PDF file")
+        
+        # A sidecar is only served for the PDF content it was built from
+        store = None
+        if book.contentHash:
+            store = await asyncio.to_thread(open_page_store, resolve_upload_path(book.pdfUrl), book.contentHash)
+        if store is None:
+            raise HTTPException(status_code=404, detail="Page text is not available until the book is analyzed")
         
-        return book
+        with store:
+            if page_number > len(store):
+                raise HTTPException(status_code=404, detail="Page not found")
+            text = await asyncio.to_thread(store.page, page_number)
+            page_count = len(store)
+        
+        return {
+            "bookId": book_id,
+            "pageNumber": page_number,
+            "pageCount": page_count,
+            "text": text
+        }
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch book: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch page: {str(e)}")
+
+@router.get("/{book_id}/reviews")
+async def get_book_reviews(
+    book_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Prisma = Depends(get_read_db)
+):
+    """Get a book's reviews, newest first, a page at a time"""
+    try:
+        await ensure_book_exists(db, book_id)
+        
+        reviews, next_cursor = await find_page(
+            db.review,
+            {"bookId": book_id},
+            NEWEST_FIRST,
+            limit,
+            cursor,
+            include={"user": USER_SELECT}
+        )
+        
+        return {
+            "reviews": reviews,
+            "nextCursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch reviews: {str(e)}")
 
 @router.post("")
 async def create_book(
@@ -132,20 +286,25 @@ async def create_book(
         # if not session or session.user.role != 'ADMIN':
         #     raise HTTPException(status_code=401, detail="Unauthorized")
         
-        new_book = await db.book.create(
-            data={
-                "title": book.title,
-                "author": book.author,
-                "description": book.description,
-                "publicationYear": book.publicationYear,
-                "licenseType": book.licenseType,
-                "category": book.category,
-                "isPublic": book.isPublic,
-                "status": "PUBLISHED",
-                # "authorId": session.user.id,  # Would use session
-                "authorId": "temp_user_id"  # Placeholder
-            }
-        )
+        async with db.tx() as tx:
+            new_book = await tx.book.create(
+                data={
+                    "title": book.title,
+                    "author": book.author,
+                    "description": book.description,
+                    "publicationYear": book.publicationYear,
+                    "licenseType": book.licenseType,
+                    "category": book.category,
+                    "isPublic": book.isPublic,
+                    "status": "PUBLISHED",
+                    # "authorId": session.user.id,  # Would use session
+                    "authorId": "temp_user_id"  # Placeholder
+                }
+            )
+            await apply_stat_changes(tx, book_stat_changes(new_book, 1))
+        
+        await index_book(db, new_book)
+        await response_cache.invalidate(TAG_BOOKS, TAG_STATS)
         
         return new_book
     except Exception as e:
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional, List
-from app.database import get_db
+from app.database import PooledRoute, get_db, get_read_db
 from prisma import Prisma
 from pydantic import BaseModel
+from app.services.cache import TAG_COLLECTIONS, TAG_STATS, response_cache
+from app.services.stats import apply_stat_changes, collection_stat_changes
 
-router = APIRouter()
+router = APIRouter(route_class=PooledRoute)
+
+# Response cache TTL (seconds); writes invalidate entries sooner
+COLLECTIONS_CACHE_TTL = 30
 
 class CollectionCreate(BaseModel):
     name: str
@@ -21,9 +26,10 @@ class AddBookToCollection(BaseModel):
 
 @router.get("")
 async def get_collections(
+    request: Request,
     userId: Optional[str] = None,
     isPublic: Optional[bool] = None,
-    db: Prisma = Depends(get_db)
+    db: Prisma = Depends(get_read_db)
 ):
     """Get collections with optional filters"""
     try:
@@ -33,28 +39,29 @@ async def get_collections(
         if isPublic is not None:
             where["isPublic"] = isPublic
         
-        collections = await db.collection.find_many(
-            where=where,
-            include={
-                "user": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True
+        async def load():
+            return await db.collection.find_many(
+                where=where,
+                include={
+                    "user": {
+                        "select": {
+                            "id": True,
+                            "name": True,
+                            "email": True
+                        }
+                    },
+                    "_count": {
+                        "select": {
+                            "books": True
+                        }
                     }
                 },
-                "_count": {
-                    "select": {
-                        "books": True
-                    }
+                order={
+                    "createdAt": "desc"
                 }
-            },
-            order={
-                "createdAt": "desc"
-            }
-        )
+            )
         
-        return collections
+        return await response_cache.respond(request, COLLECTIONS_CACHE_TTL, [TAG_COLLECTIONS], load)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch collections: {str(e)}")
 
@@ -67,23 +74,27 @@ async def create_collection(
     try:
         # TODO: Add authentication check
         
-        new_collection = await db.collection.create(
-            data={
-                "name": collection.name,
-                "description": collection.description,
-                "isPublic": collection.isPublic,
-                "userId": "temp_user_id"  # TODO: Use session.user.id
-            },
-            include={
-                "user": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True
+        async with db.tx() as tx:
+            new_collection = await tx.collection.create(
+                data={
+                    "name": collection.name,
+                    "description": collection.description,
+                    "isPublic": collection.isPublic,
+                    "userId": "temp_user_id"  # TODO: Use session.user.id
+                },
+                include={
+                    "user": {
+                        "select": {
+                            "id": True,
+                            "name": True,
+                            "email": True
+                        }
                     }
                 }
-            }
-        )
+            )
+            await apply_stat_changes(tx, collection_stat_changes(new_collection, 1))
+        
+        await response_cache.invalidate(TAG_COLLECTIONS, TAG_STATS)
         
         return new_collection
         
@@ -93,7 +104,7 @@ async def create_collection(
 @router.get("/{collection_id}")
 async def get_collection(
     collection_id: str,
-    db: Prisma = Depends(get_db)
+    db: Prisma = Depends(get_read_db)
 ):
     """Get a single collection with books"""
     try:
@@ -171,6 +182,8 @@ async def add_book_to_collection(
             }
         )
         
+        await response_cache.invalidate(TAG_COLLECTIONS)
+        
         return collection_book
         
     except HTTPException:
@@ -195,6 +208,8 @@ async def remove_book_from_collection(
             }
         )
         
+        await response_cache.invalidate(TAG_COLLECTIONS)
+        
         return {"message": "Book removed from collection"}
         
     except Exception as e:
@@ -209,7 +224,12 @@ async def delete_collection(
     try:
         # TODO: Add authentication check
         
-        await db.collection.delete(where={"id": collection_id})
+        async with db.tx() as tx:
+            deleted = await tx.collection.delete(where={"id": collection_id})
+            if deleted:
+                await apply_stat_changes(tx, collection_stat_changes(deleted, -1))
+        
+        await response_cache.invalidate(TAG_COLLECTIONS, TAG_STATS)
         
         return {"message": "Collection deleted successfully"}
         
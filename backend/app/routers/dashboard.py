@@ -1,28 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.database import get_db
+from fastapi import APIRouter, HTTPException, Depends, Request
+from app.database import PooledRoute, get_read_db
 from prisma import Prisma
+from app.services.cache import TAG_STATS, response_cache
+from app.services.stats import get_dashboard_stats
 
-router = APIRouter()
+router = APIRouter(route_class=PooledRoute)
+
+# Response cache TTL (seconds); writes invalidate entries sooner
+STATS_CACHE_TTL = 60
 
 @router.get("/stats")
 async def get_stats(
-    db: Prisma = Depends(get_db)
+    request: Request,
+    db: Prisma = Depends(get_read_db)
 ):
-    """Get dashboard statistics"""
+    """Get dashboard statistics
+    
+    Totals, books by category and license, items by type, reviews per day
+    over the last 30 days and the top rated books. They are read from
+    counters maintained on every write (see app/services/stats.py).
+    """
     try:
         # TODO: Add authentication check
         
-        total_books = await db.book.count(where={"isPublic": True})
-        total_collections = await db.collection.count(where={"isPublic": True})
-        total_reviews = await db.review.count()
-        total_users = await db.user.count()
-        
-        return {
-            "totalBooks": total_books,
-            "totalCollections": total_collections,
-            "totalReviews": total_reviews,
-            "totalUsers": total_users
-        }
+        return await response_cache.respond(
+            request,
+            STATS_CACHE_TTL,
+            [TAG_STATS],
+            lambda: get_dashboard_stats(db)
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
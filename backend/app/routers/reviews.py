@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional
-from app.database import get_db
+from app.database import PooledRoute, get_db, get_read_db
 from prisma import Prisma
 from pydantic import BaseModel
+from app.services.cache import TAG_STATS, book_tag, response_cache
+from app.services.ratings import apply_rating_change, lock_review
+from app.services.stats import apply_stat_changes, review_stat_changes
 
-router = APIRouter()
+router = APIRouter(route_class=PooledRoute)
 
 class ReviewCreate(BaseModel):
     bookId: str
@@ -19,7 +22,7 @@ class ReviewUpdate(BaseModel):
 async def get_reviews(
     bookId: Optional[str] = Query(None),
     userId: Optional[str] = Query(None),
-    db: Prisma = Depends(get_db)
+    db: Prisma = Depends(get_read_db)
 ):
     """Get reviews with optional filters"""
     try:
@@ -86,24 +89,30 @@ async def create_review(
         # if existing_review:
         #     raise HTTPException(status_code=400, detail="You have already reviewed this book")
         
-        new_review = await db.review.create(
-            data={
-                "bookId": review.bookId,
-                "content": review.content,
-                "rating": review.rating,
-                "userId": "temp_user_id"  # TODO: Use session.user.id
-            },
-            include={
-                "user": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True,
-                        "image": True
+        # The review and the book's rating aggregates change together
+        async with db.tx() as tx:
+            new_review = await tx.review.create(
+                data={
+                    "bookId": review.bookId,
+                    "content": review.content,
+                    "rating": review.rating,
+                    "userId": "temp_user_id"  # TODO: Use session.user.id
+                },
+                include={
+                    "user": {
+                        "select": {
+                            "id": True,
+                            "name": True,
+                            "email": True,
+                            "image": True
+                        }
                     }
                 }
-            }
-        )
+            )
+            await apply_rating_change(tx, review.bookId, 1, review.rating)
+            await apply_stat_changes(tx, review_stat_changes(new_review, 1))
+        
+        await response_cache.invalidate(book_tag(review.bookId), TAG_STATS)
         
         return new_review
         
@@ -131,20 +140,36 @@ async def update_review(
                 raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
             update_data["rating"] = review_update.rating
         
-        updated_review = await db.review.update(
-            where={"id": review_id},
-            data=update_data,
-            include={
-                "user": {
-                    "select": {
-                        "id": True,
-                        "name": True,
-                        "email": True,
-                        "image": True
+        async with db.tx() as tx:
+            existing_review = await lock_review(tx, review_id)
+            if not existing_review:
+                raise HTTPException(status_code=404, detail="Review not found")
+            
+            updated_review = await tx.review.update(
+                where={"id": review_id},
+                data=update_data,
+                include={
+                    "user": {
+                        "select": {
+                            "id": True,
+                            "name": True,
+                            "email": True,
+                            "image": True
+                        }
                     }
                 }
-            }
-        )
+            )
+            
+            if updated_review.rating != existing_review.rating:
+                await apply_rating_change(
+                    tx, existing_review.bookId, 0, updated_review.rating - existing_review.rating
+                )
+        
+        # Top rated books on the dashboard follow rating changes
+        if updated_review.rating != existing_review.rating:
+            await response_cache.invalidate(book_tag(existing_review.bookId), TAG_STATS)
+        else:
+            await response_cache.invalidate(book_tag(existing_review.bookId))
         
         return updated_review
         
@@ -162,10 +187,21 @@ async def delete_review(
     try:
         # TODO: Add authentication check
         
-        await db.review.delete(where={"id": review_id})
+        async with db.tx() as tx:
+            existing_review = await lock_review(tx, review_id)
+            if not existing_review:
+                raise HTTPException(status_code=404, detail="Review not found")
+            
+            await tx.review.delete(where={"id": review_id})
+            await apply_rating_change(tx, existing_review.bookId, -1, -existing_review.rating)
+            await apply_stat_changes(tx, review_stat_changes(existing_review, -1))
+        
+        await response_cache.invalidate(book_tag(existing_review.bookId), TAG_STATS)
         
         return {"message": "Review deleted successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete review: {str(e)}")
 
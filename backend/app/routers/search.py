@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Optional
+from app.database import PooledRoute, get_read_db
+from prisma import Prisma
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    decode_offset_cursor,
+    encode_offset_cursor,
+)
+from app.services.search import KIND_BOOK, KIND_ITEM, search
+
+router = APIRouter(route_class=PooledRoute)
+
+@router.get("")
+async def search_books(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = Query(None, pattern=f"^({KIND_BOOK}|{KIND_ITEM})$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Prisma = Depends(get_read_db)
+):
+    """Full-text search over public books and their extracted items
+    
+    Results are ranked by relevance (title matches weigh most, then
+    author, then description or item text) and carry an HTML-escaped
+    snippet with the matched words wrapped in <mark>. Pass nextCursor to
+    get more.
+    """
+    try:
+        offset = decode_offset_cursor(cursor)
+        
+        # One extra row tells whether there is a next page
+        rows = await search(db, q, type, limit + 1, offset)
+        next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+        
+        return {
+            "results": rows[:limit],
+            "nextCursor": next_cursor
+        }
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
@@ -0,0 +1,278 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import AsyncIterator, Dict, List, Optional
+from app.services.pdf_extractor import (
+    ITEM_EXTRACTOR_VERSION,
+    MAX_ITEMS,
+    PAGE_TEXT_VERSION,
+    PAGES_PER_CHUNK,
+    ExtractorBackend,
+    ItemExtractor,
+    extract_pages_candidates,
+    iter_page_chunks,
+    iter_pdf_items,
+    read_page_range_with_candidates,
+)
+from app.services.page_store import PAGE_STORE_ENABLED, PageStore, PageStoreWriter, open_page_store
+from app.services.pool import get_process_pool
+from app.services.storage import BASE_DIR
+
+# On-disk store for analysis results, keyed by PDF content hash
+ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "analysis"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+
+# Cache stages
+STAGE_PAGES = "pages"
+STAGE_ITEMS = "items"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pages_key(content_hash: str) -> str:
+    """Cache key of the page text stage"""
+    return f"{content_hash}-p{PAGE_TEXT_VERSION}"
+
+def items_key(content_hash: str) -> str:
+    """Cache key of the item stage (depends on the page text it was built from)"""
+    return f"{content_hash}-p{PAGE_TEXT_VERSION}-i{ITEM_EXTRACTOR_VERSION}-n{MAX_ITEMS}"
+
+class AnalysisCache:
+    """Size-bounded on-disk cache with least-recently-used eviction
+
+    Each entry is a gzipped JSON file under <directory>/<stage>/. Reading
+    an entry bumps its modification time, so when the store grows past
+    max_bytes the files with the oldest mtime are evicted first.
+    """
+
+    def __init__(self, directory: str = ANALYSIS_CACHE_DIR, max_bytes: int = ANALYSIS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.json.gz")
+
+    def get(self, stage: str, key: str) -> Optional[Dict]:
+        """Read an entry, or return None if it is missing or unreadable"""
+        path = self._path(stage, key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                value = json.load(file)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Corrupt or half-written entry, drop it
+            self.delete(stage, key)
+            return None
+
+    def put(self, stage: str, key: str, value: Dict):
+        """Write an entry atomically, then evict old entries if over budget"""
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as file:
+                json.dump(value, file)
+            os.replace(tmp_path, path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def delete(self, stage: str, key: str):
+        """Remove an entry if present"""
+        try:
+            os.remove(self._path(stage, key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove least recently used entries until the store fits max_bytes"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json.gz'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+# Shared cache used by analysis jobs
+analysis_cache = AnalysisCache()
+
+async def iter_cached_pdf_items(
+    pdf_path: str,
+    content_hash: str,
+    backend: Optional[ExtractorBackend] = None
+) -> AsyncIterator[List[Dict]]:
+    """Yield batches of extracted items, reusing cached analysis stages
+
+    A cached item stage is returned as is. Otherwise items are rebuilt
+    from the page text read so far, kept in the PDF's sidecar (or the
+    page text cache when sidecars are disabled), and only pages that were
+    never read are parsed from the PDF, with the backend the stored
+    pages were read with. The text of newly parsed pages goes to the
+    sidecar in the same pass. The item stage is cached once the items are
+    complete.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+
+    if ANALYSIS_CACHE_ENABLED:
+        cached_items = await asyncio.to_thread(analysis_cache.get, STAGE_ITEMS, items_key(content_hash))
+        if cached_items is not None:
+            if cached_items['items']:
+                yield cached_items['items']
+            return
+
+    # Page text read so far; next_page is the first PDF page not yet read
+    backend = backend or ExtractorBackend(pdf_path)
+    store: Optional[PageStore] = None
+    pages: Optional[List[str]] = None
+    pages_changed = False
+    if PAGE_STORE_ENABLED:
+        store = await asyncio.to_thread(open_page_store, pdf_path, content_hash)
+        stored_count = len(store) if store is not None else 0
+        next_page = store.next_page if store is not None else 0
+        complete = store.complete if store is not None else False
+        if store is not None:
+            backend.pin(store.backend)
+    elif ANALYSIS_CACHE_ENABLED:
+        cached_pages = await asyncio.to_thread(analysis_cache.get, STAGE_PAGES, pages_key(content_hash))
+        pages = cached_pages['pages'] if cached_pages else []
+        stored_count = len(pages)
+        next_page = cached_pages['nextPage'] if cached_pages else 0
+        complete = cached_pages['complete'] if cached_pages else False
+        pages_changed = cached_pages is None
+        if cached_pages:
+            backend.pin(cached_pages.get('backend'))
+    else:
+        async for new_items in iter_pdf_items(pdf_path, backend):
+            yield new_items
+        return
+
+    extractor = ItemExtractor()
+    items: List[Dict] = []
+    writer: Optional[PageStoreWriter] = None
+    try:
+        # Rebuild items from stored page text, a chunk of pages at a time;
+        # the sidecar is read lazily, so later pages are never loaded once
+        # the item limit is reached
+        for start in range(0, stored_count, PAGES_PER_CHUNK):
+            if store is not None:
+                chunk = await asyncio.to_thread(store.pages, start, start + PAGES_PER_CHUNK)
+            else:
+                chunk = pages[start:start + PAGES_PER_CHUNK]
+            for candidates in await loop.run_in_executor(pool, extract_pages_candidates, chunk):
+                new_items = extractor.add_page(candidates)
+                if new_items:
+                    items.extend(new_items)
+                    yield new_items
+                if extractor.done:
+                    break
+            if extractor.done:
+                break
+
+        # Parse the rest of the PDF only if the stored pages weren't enough
+        if not extractor.done and not complete:
+            if PAGE_STORE_ENABLED:
+                writer = await _open_writer(pdf_path, store)
+            chunks = iter_page_chunks(pdf_path, read_page_range_with_candidates, next_page, backend)
+            try:
+                async for end, chunk in chunks:
+                    texts = [text for text, _ in chunk]
+                    if writer is not None:
+                        writer = await _write_pages(writer, texts)
+                    elif pages is not None:
+                        pages.extend(texts)
+                    for _, candidates in chunk:
+                        new_items = extractor.add_page(candidates)
+                        if new_items:
+                            items.extend(new_items)
+                            yield new_items
+                    next_page = end
+                    pages_changed = True
+
+                    # Items are in page order, so nothing later can make the cut
+                    if extractor.done:
+                        break
+                else:
+                    complete = True
+                    pages_changed = True
+            finally:
+                await chunks.aclose()
+
+            if writer is not None:
+                try:
+                    await asyncio.to_thread(writer.finish, content_hash, next_page, complete, backend.name)
+                except OSError as e:
+                    print(f"Could not store page text of {pdf_path}: {str(e)}")
+                    writer.abort()
+                writer = None
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        if store is not None:
+            store.close()
+
+    if not ANALYSIS_CACHE_ENABLED:
+        return
+    if pages is not None and pages_changed:
+        await asyncio.to_thread(
+            analysis_cache.put, STAGE_PAGES, pages_key(content_hash),
+            {"pages": pages, "nextPage": next_page, "complete": complete, "backend": backend.name}
+        )
+    await asyncio.to_thread(analysis_cache.put, STAGE_ITEMS, items_key(content_hash), {"items": items})
+
+async def _open_writer(pdf_path: str, store: Optional[PageStore]) -> Optional[PageStoreWriter]:
+    """A sidecar writer continuing store, or None if the sidecar can't be written"""
+    try:
+        return await asyncio.to_thread(PageStoreWriter, pdf_path, store)
+    except OSError as e:
+        print(f"Could not store page text of {pdf_path}: {str(e)}")
+        return None
+
+async def _write_pages(writer: PageStoreWriter, texts: List[str]) -> Optional[PageStoreWriter]:
+    """Add pages to the sidecar; a failed write drops the sidecar but not the analysis"""
+    try:
+        await asyncio.to_thread(writer.add_texts, texts)
+        return writer
+    except OSError as e:
+        print(f"Could not store page text: {str(e)}")
+        writer.abort()
+        return None
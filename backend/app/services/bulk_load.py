@@ -0,0 +1,328 @@
+import asyncio
+import csv
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import Executor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from prisma import Prisma
+from app.database import SUPPORTS_CREATE_MANY
+from app.services.analysis_cache import ANALYSIS_CACHE_ENABLED, STAGE_ITEMS, analysis_cache, hash_file, items_key
+from app.services.ingest import (
+    ANALYZED_LICENSES,
+    RESULT_CREATED,
+    RESULT_DUPLICATE,
+    RESULT_FAILED,
+    BatchEntry,
+    book_row,
+    mark_duplicates,
+    stored_path,
+)
+from app.services.jobs import ITEM_BATCH_SIZE
+from app.services.page_store import remove_page_store
+from app.services.pdf_extractor import read_pdf_items
+from app.services.search import index_new_books, index_new_items, remove_book_from_index
+from app.services.stats import (
+    apply_stat_changes,
+    book_removal_changes,
+    book_stat_changes,
+    item_stat_changes,
+    queue_stat_changes,
+)
+from app.services.storage import SavedUpload, remove_file, resolve_upload_path
+
+# Field names of the bulk upload script's config, mapped to the batch upload's
+FIELD_ALIASES = {
+    "pdf_path": "file",
+    "cover_image_path": "cover",
+    "publication_year": "publicationYear",
+    "license_type": "licenseType",
+    "is_public": "isPublic",
+}
+
+def read_manifest(path: str) -> Iterator[Dict]:
+    """Rows of a .json (list of books), .csv or .ndjson manifest
+
+    CSV and NDJSON manifests are streamed, so they can be any size.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif extension in (".ndjson", ".jsonl"):
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}, line {line_number}: {str(e)}")
+    elif extension == ".json":
+        with open(path, encoding='utf-8') as f:
+            books = json.load(f)
+        if isinstance(books, dict):
+            books = books.get("books", [])
+        yield from books
+    else:
+        raise ValueError(f"Unsupported manifest format {extension!r} (use .json, .csv or .ndjson)")
+
+def normalize_row(row: Any) -> Any:
+    """A manifest row with batch upload field names and empty (CSV) values dropped
+
+    BatchEntry validates the fields and converts CSV strings.
+    """
+    if not isinstance(row, dict):
+        return row
+    return {
+        FIELD_ALIASES.get(key, key): value
+        for key, value in row.items()
+        if value not in ("", None)
+    }
+
+class Checkpoint:
+    """Rows of a manifest already loaded, saved after every batch
+
+    Before a batch copies any file, the checkpoint records the files it
+    is about to create (in_progress). If the batch doesn't finish, the
+    next run removes exactly those files and the books pointing to them;
+    books of earlier batches are never deleted.
+    """
+
+    def __init__(self, path: str, manifest_path: str):
+        self.path = path
+        self.manifest_path = manifest_path
+        self.rows_done = 0
+        self.totals: Counter = Counter()
+        self.in_progress: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str, manifest_path: str) -> "Checkpoint":
+        checkpoint = cls(path, manifest_path)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("manifest") != manifest_path:
+                raise ValueError(f"{path} is the checkpoint of another manifest ({data.get('manifest')})")
+            checkpoint.rows_done = data["rowsDone"]
+            checkpoint.totals = Counter(data.get("totals", {}))
+            checkpoint.in_progress = data.get("inProgress")
+        return checkpoint
+
+    def begin(self, urls: List[str]):
+        """Record the upload URLs a batch is about to create"""
+        self.in_progress = urls
+        self.save()
+
+    def advance(self, rows: int, counts: Dict[str, int]):
+        """Record a committed batch"""
+        self.rows_done += rows
+        self.totals.update(counts)
+        self.in_progress = None
+        self.save()
+
+    def restart(self):
+        """Start over from the first row; loaded books become duplicates"""
+        self.rows_done = 0
+        self.totals = Counter()
+        self.save()
+
+    def save(self):
+        """Write the checkpoint atomically, so a crash leaves the previous one"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "manifest": self.manifest_path,
+                    "rowsDone": self.rows_done,
+                    "totals": dict(self.totals),
+                    "inProgress": self.in_progress,
+                    "updatedAt": datetime.now().isoformat(timespec="seconds")
+                }, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except:
+            remove_file(tmp_path)
+            raise
+
+def extract_book(pdf_path: str, analyze: bool) -> Tuple[str, int, List[Dict]]:
+    """Hash a PDF and extract its items (runs in a worker process)
+
+    Items already in the analysis cache are reused. New ones aren't
+    written to it: every write scans the whole cache for eviction.
+    """
+    content_hash = hash_file(pdf_path)
+    items = []
+    if analyze:
+        cached = analysis_cache.get(STAGE_ITEMS, items_key(content_hash)) if ANALYSIS_CACHE_ENABLED else None
+        items = cached['items'] if cached is not None else read_pdf_items(pdf_path)
+    return content_hash, os.path.getsize(pdf_path), items
+
+async def remove_partial_batch(db: Prisma, checkpoint: Checkpoint) -> int:
+    """Undo the batch the checkpoint records as in progress, returning the books removed
+
+    Only books whose PDF is one of the batch's own copies are deleted,
+    with their items; then the copies themselves.
+    """
+    urls = checkpoint.in_progress
+    if not urls:
+        return 0
+    leftovers = await db.book.find_many(where={"pdfUrl": {"in": urls}})
+    for book in leftovers:
+        async with db.tx() as tx:
+            changes = await book_removal_changes(tx, book)
+            await tx.book.delete(where={"id": book.id})
+            await apply_stat_changes(tx, changes)
+        await remove_book_from_index(db, book.id)
+    for url in urls:
+        remove_file(resolve_upload_path(url))
+        remove_page_store(resolve_upload_path(url))
+    checkpoint.in_progress = None
+    checkpoint.save()
+    return len(leftovers)
+
+def _create_rows(delegate, rows: List[Dict]):
+    """Queue inserts on a batch delegate (createMany where the database supports it)"""
+    if SUPPORTS_CREATE_MANY:
+        delegate.create_many(data=rows)
+    else:
+        for row in rows:
+            delegate.create(data=row)
+
+def _upload_url(source: str, prefix: str) -> str:
+    """Public URL of a file's copy in the uploads directory"""
+    return f"/uploads/books/{os.path.basename(stored_path(prefix, os.path.basename(source)))}"
+
+async def load_batch(
+    db: Prisma,
+    executor: Executor,
+    rows: List[Tuple[int, Dict]],
+    manifest_path: str,
+    prefix: str,
+    checkpoint: Checkpoint
+) -> Dict[str, int]:
+    """Load a batch of (row index, row) pairs, returning counts by outcome and of items
+
+    PDFs are hashed and their items extracted in the executor, all at
+    once. Books are deduplicated with one lookup, so rows loaded by an
+    earlier run come out as duplicates, and inserted in one transaction;
+    their items follow in chunks of ITEM_BATCH_SIZE.
+    """
+    base_dir = os.path.dirname(manifest_path)
+    counts = Counter()
+    entries = [BatchEntry(index, normalize_row(row)) for index, row in rows]
+    valid = [entry for entry in entries if entry.pending]
+
+    loop = asyncio.get_running_loop()
+    pdf_paths = {entry.index: os.path.join(base_dir, entry.file) for entry in valid}
+    outcomes = await asyncio.gather(
+        *(
+            loop.run_in_executor(executor, extract_book, pdf_paths[entry.index], entry.license_type in ANALYZED_LICENSES)
+            for entry in valid
+        ),
+        return_exceptions=True
+    )
+
+    items: Dict[int, List[Dict]] = {}
+    for entry, outcome in zip(valid, outcomes):
+        if isinstance(outcome, Exception):
+            entry.fail(f"{type(outcome).__name__}: {str(outcome)}")
+            continue
+        content_hash, size, items[entry.index] = outcome
+        entry.pdf = SavedUpload(pdf_paths[entry.index], size, content_hash)
+
+    await mark_duplicates(db, entries)
+
+    sources: Dict[str, str] = {}
+    for entry in entries:
+        if entry.pending:
+            file_prefix = f"{prefix}-{entry.index}"
+            entry.pdf_url = _upload_url(pdf_paths[entry.index], file_prefix)
+            sources[entry.pdf_url] = pdf_paths[entry.index]
+            if entry.cover:
+                cover_path = os.path.join(base_dir, entry.cover)
+                entry.cover_url = _upload_url(cover_path, file_prefix)
+                sources[entry.cover_url] = cover_path
+    # From here until the checkpoint advances, a crash is undone by remove_partial_batch
+    checkpoint.begin(list(sources))
+
+    async def copy_files(entry: BatchEntry):
+        urls = [url for url in (entry.pdf_url, entry.cover_url) if url]
+        try:
+            for url in urls:
+                await asyncio.to_thread(shutil.copyfile, sources[url], resolve_upload_path(url))
+        except OSError as e:
+            for url in urls:
+                remove_file(resolve_upload_path(url))
+            entry.fail(f"Could not copy files: {str(e)}")
+
+    await asyncio.gather(*(copy_files(entry) for entry in entries if entry.pending))
+
+    created = [entry for entry in entries if entry.pending]
+    analyzed_at = datetime.now()
+    book_rows = []
+    for entry in created:
+        row = book_row(entry)
+        if entry.license_type in ANALYZED_LICENSES:
+            row["analyzedAt"] = analyzed_at
+        book_rows.append(row)
+
+    item_count = 0
+    if book_rows:
+        book_changes = Counter()
+        for row in book_rows:
+            book_changes.update(book_stat_changes(SimpleNamespace(**row), 1))
+        try:
+            async with db.tx() as tx:
+                if SUPPORTS_CREATE_MANY:
+                    await tx.book.create_many(data=book_rows)
+                else:
+                    for row in book_rows:
+                        await tx.book.create(data=row)
+                await apply_stat_changes(tx, dict(book_changes))
+        except:
+            # Nothing refers to the copied files yet
+            for entry in created:
+                for url in (entry.pdf_url, entry.cover_url):
+                    if url:
+                        remove_file(resolve_upload_path(url))
+            raise
+
+        # createMany doesn't return rows; the copies' URLs are unique to this run
+        books = await db.book.find_many(where={"pdfUrl": {"in": [row["pdfUrl"] for row in book_rows]}})
+        book_ids = {book.pdfUrl: book.id for book in books}
+        item_rows = [
+            {
+                "bookId": book_ids[entry.pdf_url],
+                "type": item['type'],
+                "content": item['content'],
+                "pageNumber": item.get('pageNumber'),
+                "position": item['position']
+            }
+            for entry in created
+            for item in items[entry.index]
+        ]
+        item_count = len(item_rows)
+
+        for start in range(0, len(item_rows), ITEM_BATCH_SIZE):
+            chunk = item_rows[start:start + ITEM_BATCH_SIZE]
+            async with db.batch_() as batcher:
+                _create_rows(batcher.extracteditem, chunk)
+                queue_stat_changes(batcher, item_stat_changes({}, Counter(row["type"] for row in chunk)))
+
+        await index_new_books(db, books)
+        if item_rows:
+            await index_new_items(db, await db.extracteditem.find_many(where={"bookId": {"in": list(book_ids.values())}}))
+
+    for entry in created:
+        entry.result["status"] = RESULT_CREATED
+
+    for entry in entries:
+        counts[entry.result["status"]] += 1
+        if entry.result["status"] == RESULT_FAILED:
+            print(f"❌ Row {entry.index} ({entry.title}): {entry.result['error']}")
+    counts["items"] = item_count
+    return {key: counts[key] for key in (RESULT_CREATED, RESULT_DUPLICATE, RESULT_FAILED, "items")}
@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Response cache configuration
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# "memory" (per process) or "redis" (shared by every API process)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "bookloom:cache:")
+
+# Lifetime of a tag's key set in Redis, refreshed on every add; longer than any route TTL.
+# Also how long Redis remembers that a tag was invalidated, so a response
+# whose load takes longer than this may still be stored stale.
+TAG_SET_TTL = 3600
+
+# Invalidation tags
+TAG_BOOKS = "books"              # book lists
+TAG_COLLECTIONS = "collections"  # collection lists
+TAG_STATS = "stats"              # dashboard statistics
+
+def book_tag(book_id: str) -> str:
+    """Tag of every cached response that contains this book"""
+    return f"book:{book_id}"
+
+class CachedResponse:
+    """An encoded JSON response body and its ETag"""
+
+    __slots__ = ('body', 'etag', 'expires_at', 'tags')
+
+    def __init__(self, body: bytes, ttl: float, tags: Iterable[str], etag: Optional[str] = None):
+        self.body = body
+        self.etag = etag or '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.expires_at = time.monotonic() + ttl
+        self.tags = frozenset(tags)
+
+class MemoryCacheBackend:
+    """Bounded, TTL-based LRU of responses in this process"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        # Bumped by every invalidation
+        self._generation = 0
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float, since: int):
+        """Store an entry unless there was an invalidation after generation since"""
+        if since != self._generation:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        # Evict least recently used entries beyond the bound
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, tags: Iterable[str]):
+        self._generation += 1
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+class RedisCacheBackend:
+    """Responses shared by every API process through Redis
+
+    Each entry is a hash (body, etag, tags) that expires with its TTL;
+    each tag is a set of entry keys. Size is bounded by the TTLs and the
+    server's maxmemory policy (allkeys-lru is recommended). Anything that
+    speaks the Redis protocol works, including fakeredis for tests.
+
+    Invalidations advance a shared clock and stamp each tag with it, so a
+    process storing a response loaded before an invalidation in any other
+    process sees the stamp and drops it. Stamps expire after TAG_SET_TTL,
+    and one evicted under memory pressure no longer protects its tag.
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = CACHE_KEY_PREFIX, client: Any = None):
+        from redis.exceptions import WatchError
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._watch_error = WatchError
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}entry:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _stamp_key(self, tag: str) -> str:
+        return f"{self.prefix}invalidated:{tag}"
+
+    @property
+    def _clock_key(self) -> str:
+        return f"{self.prefix}clock"
+
+    async def generation(self) -> int:
+        return int(await self.client.get(self._clock_key) or 0)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        fields = await self.client.hgetall(self._entry_key(key))
+        if not fields:
+            return None
+        # Redis expires the entry itself, so the local expiry is unused
+        return CachedResponse(
+            fields[b"body"],
+            0,
+            json.loads(fields[b"tags"]),
+            etag=fields[b"etag"].decode()
+        )
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float, since: int):
+        """Store an entry unless one of its tags was invalidated after generation since
+
+        The tags' stamps are watched, so an invalidation that lands
+        between the check and the write aborts the write.
+        """
+        entry_key = self._entry_key(key)
+        expire_ms = max(1, int(ttl * 1000))
+        stamp_keys = [self._stamp_key(tag) for tag in sorted(entry.tags)]
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                if stamp_keys:
+                    await pipe.watch(*stamp_keys)
+                    stamps = await pipe.mget(stamp_keys)
+                    if any(stamp is not None and int(stamp) > since for stamp in stamps):
+                        return
+                    pipe.multi()
+                pipe.hset(entry_key, mapping={
+                    "body": entry.body,
+                    "etag": entry.etag,
+                    "tags": json.dumps(sorted(entry.tags))
+                })
+                pipe.pexpire(entry_key, expire_ms)
+                for tag in entry.tags:
+                    # Keys of expired entries may linger in the set; deleting
+                    # them on invalidation is harmless
+                    pipe.sadd(self._tag_key(tag), entry_key)
+                    pipe.expire(self._tag_key(tag), max(TAG_SET_TTL, int(ttl) + 1))
+                await pipe.execute()
+            except self._watch_error:
+                # One of its tags was invalidated meanwhile
+                pass
+
+    async def invalidate(self, tags: Iterable[str]):
+        """Delete the tags' entries and stamp the tags, in one transaction
+
+        The tag sets and the clock are watched, so an entry added (or
+        another invalidation committed) after the sets were read makes
+        the transaction retry instead of leaving that entry behind.
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(self._clock_key, *tag_keys)
+                    clock = int(await pipe.get(self._clock_key) or 0) + 1
+                    entry_keys = set()
+                    for tag_key in tag_keys:
+                        entry_keys.update(await pipe.smembers(tag_key))
+
+                    pipe.multi()
+                    pipe.set(self._clock_key, clock)
+                    for tag in tags:
+                        pipe.set(self._stamp_key(tag), clock, ex=TAG_SET_TTL)
+                    if entry_keys:
+                        pipe.delete(*entry_keys)
+                    pipe.delete(*tag_keys)
+                    await pipe.execute()
+                    return
+                except self._watch_error:
+                    continue
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            await self.client.delete(key)
+
+def create_cache_backend(name: str = CACHE_BACKEND):
+    """Build the configured cache backend"""
+    if name == "redis":
+        return RedisCacheBackend()
+    if name == "memory":
+        return MemoryCacheBackend()
+    raise ValueError(f"Unknown cache backend: {name}")
+
+class ResponseCache:
+    """TTL-based cache of JSON responses with tag invalidation
+
+    Every entry carries tags naming the data it was built from (e.g.
+    "book:<id>"), so a write only evicts the responses it affects. Hits
+    are served without touching the database, and a client that sends a
+    matching If-None-Match gets a bodyless 304.
+
+    Concurrent misses on the same key are coalesced: one request loads
+    the data and the others wait for its result. A load that overlaps an
+    invalidation isn't stored, as it may have read old data; with the
+    Redis backend this holds across processes. Cache backend errors are
+    logged and the response is built without the cache.
+    """
+
+    def __init__(self, backend: Any = None, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.backend = backend if backend is not None else create_cache_backend()
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def invalidate(self, *tags: str):
+        """Evict every entry carrying any of the tags"""
+        self._inflight.clear()
+        try:
+            await self.backend.invalidate(tags)
+        except Exception as e:
+            print(f"Error invalidating cache tags {tags}: {str(e)}")
+
+    async def clear(self):
+        """Evict everything"""
+        await self.backend.clear()
+
+    async def respond(
+        self,
+        request: Request,
+        ttl: float,
+        tags: Union[List[str], Callable[[Any], List[str]]],
+        load: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Serve a GET from the cache, calling load() to build it on a miss
+
+        tags is a list, or a function of the loaded data (e.g. to tag a
+        page of books with each book's ID).
+        """
+        if not self.enabled:
+            return JSONResponse(content=jsonable_encoder(await load()))
+
+        key = cache_key(request)
+
+        # A client reading its own writes skips entries that may have been
+        # filled from a lagging replica, and refreshes the entry instead
+        if getattr(request.state, "read_your_writes", False):
+            return entry_response(request, await self._fill(key, ttl, tags, load))
+
+        try:
+            entry = await self.backend.get(key)
+        except Exception as e:
+            print(f"Error reading cache key {key}: {str(e)}")
+            entry = None
+
+        if entry is None:
+            entry = await self._load_once(key, ttl, tags, load)
+
+        return entry_response(request, entry)
+
+    async def _load_once(self, key: str, ttl: float, tags, load) -> CachedResponse:
+        """Build an entry, sharing one load() between concurrent callers"""
+        future = self._inflight.get(key)
+        if future is None:
+            # A task of its own, so a caller that disconnects doesn't
+            # cancel the load for everyone waiting on it
+            future = asyncio.ensure_future(self._fill(key, ttl, tags, load))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._load_done(key, done))
+        return await asyncio.shield(future)
+
+    def _load_done(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the error as seen even if every caller went away
+        if not future.cancelled():
+            future.exception()
+
+    async def _fill(self, key: str, ttl: float, tags, load) -> CachedResponse:
+        # Taken before loading; the backend refuses the entry if one of its
+        # tags is invalidated after this point
+        try:
+            generation = await self.backend.generation()
+        except Exception as e:
+            print(f"Error reading cache generation: {str(e)}")
+            generation = None
+
+        data = await load()
+        body = JSONResponse(content=jsonable_encoder(data)).body
+        entry = CachedResponse(body, ttl, tags(data) if callable(tags) else tags)
+        if generation is None:
+            return entry
+        try:
+            await self.backend.set(key, entry, ttl, generation)
+        except Exception as e:
+            print(f"Error writing cache key {key}: {str(e)}")
+        return entry
+
+def cache_key(request: Request) -> str:
+    """Path plus normalised query string"""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+def entry_response(request: Request, entry: CachedResponse) -> Response:
+    """The cached body, or a 304 if the client already has this version"""
+    headers = {
+        "ETag": entry.etag,
+        # Let clients keep the body but revalidate it on every use
+        "Cache-Control": "no-cache"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return any(value.removeprefix("W/") == etag for value in candidates)
+
+# Shared response cache
+response_cache = ResponseCache()
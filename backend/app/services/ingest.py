@@ -0,0 +1,450 @@
+import asyncio
+import json
+import os
+import posixpath
+import tarfile
+import zipfile
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import UploadFile
+from prisma import Prisma
+from app.database import SUPPORTS_CREATE_MANY
+from app.services.cache import TAG_BOOKS, TAG_STATS, response_cache
+from app.services.jobs import create_analysis_jobs
+from app.services.search import index_new_books
+from app.services.stats import apply_stat_changes, book_stat_changes
+from app.services.storage import (
+    MAX_COVER_IMAGE_SIZE,
+    MAX_PDF_SIZE,
+    UPLOADS_DIR,
+    SavedUpload,
+    UploadTooLargeError,
+    remove_file,
+    safe_filename,
+    save_stream,
+    save_upload,
+)
+
+# Batch upload limits
+MAX_BATCH_BOOKS = int(os.getenv("MAX_BATCH_BOOKS", "200"))  # books per request
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_SIZE", str(2 * 1024 * 1024 * 1024)))
+MAX_MANIFEST_SIZE = 10 * 1024 * 1024
+
+# Read from the archive when the manifest isn't sent as a form field
+MANIFEST_FILENAME = "manifest.json"
+
+# Licenses whose books are analyzed automatically after upload
+ANALYZED_LICENSES = ['public-domain', 'CC']
+COVER_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+
+# Accepted spellings of isPublic in manifests (CSV and form values are strings)
+TRUE_VALUES = {"true", "1", "yes"}
+FALSE_VALUES = {"false", "0", "no"}
+
+# Per-book outcomes
+RESULT_CREATED = "created"
+RESULT_DUPLICATE = "duplicate"
+RESULT_FAILED = "failed"
+
+class BatchError(ValueError):
+    """Raised when a batch upload can't be processed at all (bad manifest or archive)"""
+
+def _text(fields: Dict, name: str, required: bool = False) -> Optional[str]:
+    value = fields.get(name)
+    if value is None:
+        if required:
+            raise ValueError(f"\"{name}\" is required")
+        return None
+    if not isinstance(value, str) or (required and not value.strip()):
+        raise ValueError(f"\"{name}\" must be {'a non-empty' if required else 'a'} string")
+    return value
+
+def _year(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("\"publicationYear\" must be a whole number")
+    return value
+
+def parse_bool(value: Any, name: str) -> bool:
+    """A boolean field given as true/false, 1/0 or their string spellings"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        if value.strip().lower() in TRUE_VALUES:
+            return True
+        if value.strip().lower() in FALSE_VALUES:
+            return False
+    raise ValueError(f"\"{name}\" must be true or false")
+
+class BatchEntry:
+    """One book of a batch upload: its manifest fields, saved files and result
+
+    Invalid fields fail the entry (see result) rather than the batch.
+    """
+
+    def __init__(self, index: int, fields: Any):
+        self.index = index
+        self.file: Optional[str] = None
+        self.cover: Optional[str] = None
+        self.title: Optional[str] = None
+        self.author: Optional[str] = None
+        self.description: Optional[str] = None
+        self.publication_year: Optional[int] = None
+        self.category: Optional[str] = None
+        self.license_type = "copyrighted"
+        self.is_public = True
+        self.pdf: Optional[SavedUpload] = None
+        self.pdf_url: Optional[str] = None
+        self.cover_url: Optional[str] = None
+        self.result: Dict = {"index": index}
+        try:
+            self._read(fields)
+        except ValueError as e:
+            self.fail(str(e))
+
+    def _read(self, fields: Any):
+        if not isinstance(fields, dict):
+            raise ValueError("Book must be an object")
+        self.result.update(file=fields.get("file"), title=fields.get("title"))
+        self.file = _text(fields, "file", required=True)
+        self.title = _text(fields, "title", required=True)
+        self.cover = _text(fields, "cover")
+        self.author = _text(fields, "author")
+        self.description = _text(fields, "description")
+        self.category = _text(fields, "category")
+        self.license_type = _text(fields, "licenseType") or self.license_type
+        self.publication_year = _year(fields.get("publicationYear"))
+        if fields.get("isPublic") is not None:
+            self.is_public = parse_bool(fields["isPublic"], "isPublic")
+
+    def fail(self, error: str):
+        self.result.update(status=RESULT_FAILED, error=error)
+
+    def duplicate(self, book_id: Optional[str], reason: str, batch_index: Optional[int] = None):
+        self.result.update(status=RESULT_DUPLICATE, duplicateOf=book_id, reason=reason)
+        if batch_index is not None:
+            self.result["duplicateOfIndex"] = batch_index
+
+    @property
+    def pending(self) -> bool:
+        return "status" not in self.result
+
+def parse_manifest(raw: Optional[str]) -> List[BatchEntry]:
+    """Entries of a JSON manifest: a list (or {"books": [...]}) of book objects
+
+    Each book needs "file" (the PDF's name in the upload) and "title"; the
+    other fields are those of POST /api/admin/books, plus an optional
+    "cover" image file name. A book with missing or invalid fields fails
+    on its own.
+    """
+    if not raw:
+        raise BatchError("A manifest is required")
+    try:
+        books = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise BatchError(f"Manifest is not valid JSON: {str(e)}")
+
+    if isinstance(books, dict):
+        books = books.get("books")
+    if not isinstance(books, list) or not books:
+        raise BatchError("Manifest must be a non-empty list of books")
+    if len(books) > MAX_BATCH_BOOKS:
+        raise BatchError(f"At most {MAX_BATCH_BOOKS} books can be uploaded at once")
+
+    return [BatchEntry(index, fields) for index, fields in enumerate(books)]
+
+def member_path(path: str) -> Optional[str]:
+    """Normalized path of an upload or archive member, or None if it points outside the upload"""
+    path = posixpath.normpath(path.replace('\\', '/'))
+    if path.startswith('/') or path == '..' or path.startswith('../'):
+        return None
+    return path
+
+def is_pdf(path: str) -> bool:
+    return path.lower().endswith('.pdf')
+
+def is_cover(path: str) -> bool:
+    return any(path.lower().endswith(ext) for ext in COVER_EXTENSIONS)
+
+def wanted_files(entries: List[BatchEntry], prefix: str) -> Dict[str, Tuple[str, int]]:
+    """Stored path and size limit of every file the manifest refers to, by member path
+
+    A file is stored under the index of the first entry that refers to it,
+    so files with the same name in different directories, or names that
+    differ only in unsafe characters, never share a stored file. Files that
+    attach_files would reject are not wanted.
+    """
+    wanted = {}
+    for entry in entries:
+        if not entry.pending:
+            continue
+        files = [(member_path(entry.file), is_pdf, MAX_PDF_SIZE)]
+        if entry.cover:
+            files.append((member_path(entry.cover), is_cover, MAX_COVER_IMAGE_SIZE))
+        for path, valid, limit in files:
+            if path and valid(path) and path not in wanted:
+                wanted[path] = (stored_path(f"{prefix}-{entry.index}", posixpath.basename(path)), limit)
+    return wanted
+
+def stored_path(prefix: str, name: str) -> str:
+    return os.path.join(UPLOADS_DIR, f"{prefix}-{safe_filename(name)}")
+
+def read_archive_manifest(archive_path: str) -> Optional[str]:
+    """The archive's manifest.json, if it has one (blocking)"""
+    for path, open_member in _archive_members(archive_path):
+        if path == MANIFEST_FILENAME:
+            with open_member() as member:
+                return member.read(MAX_MANIFEST_SIZE + 1)[:MAX_MANIFEST_SIZE].decode('utf-8')
+    return None
+
+def extract_archive(archive_path: str, wanted: Dict[str, Tuple[str, int]]) -> Tuple[Dict[str, SavedUpload], Dict[str, str]]:
+    """Copy the wanted members of a zip or tar archive to the uploads directory (blocking)
+
+    Only regular files in wanted are extracted, to their stored paths, so
+    paths in the archive can't point outside the uploads directory.
+    Returns the saved files and the errors of files that couldn't be
+    saved, by member path.
+    """
+    saved: Dict[str, SavedUpload] = {}
+    errors: Dict[str, str] = {}
+    try:
+        for path, open_member in _archive_members(archive_path):
+            if path not in wanted or _reject_repeated(path, saved, errors):
+                continue
+            stored, limit = wanted[path]
+            try:
+                with open_member() as member:
+                    saved[path] = save_stream(member, stored, limit)
+            except UploadTooLargeError:
+                errors[path] = f"{path} is larger than {limit // (1024 * 1024)}MB"
+    except BaseException:
+        remove_saved(saved)
+        raise
+    return saved, errors
+
+def _reject_repeated(path: str, saved: Dict[str, SavedUpload], errors: Dict[str, str]) -> bool:
+    """Fail a path met more than once in an upload, as it's unclear which file is meant"""
+    if path not in saved and path not in errors:
+        return False
+    if path in saved:
+        remove_file(saved.pop(path).path)
+    errors[path] = f"{path} is in the upload more than once"
+    return True
+
+def _archive_members(archive_path: str):
+    """(member path, opener) of every regular file in a zip or tar archive"""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield member_path(info.filename), lambda info=info: archive.open(info)
+    elif tarfile.is_tarfile(archive_path):
+        with tarfile.open(archive_path, 'r:*') as archive:
+            for member in archive:
+                # Links and devices are skipped
+                if member.isfile():
+                    yield member_path(member.name), lambda member=member: archive.extractfile(member)
+    else:
+        raise BatchError("Archive must be a zip or tar file")
+
+async def receive_files(files: List[UploadFile], wanted: Dict[str, Tuple[str, int]]) -> Tuple[Dict[str, SavedUpload], Dict[str, str]]:
+    """Save the uploaded files the manifest refers to, matched by their full file names; others are ignored"""
+    saved: Dict[str, SavedUpload] = {}
+    errors: Dict[str, str] = {}
+    try:
+        for upload in files:
+            path = member_path(upload.filename or "")
+            if path not in wanted or _reject_repeated(path, saved, errors):
+                continue
+            stored, limit = wanted[path]
+            try:
+                saved[path] = await save_upload(upload, stored, limit)
+            except UploadTooLargeError:
+                errors[path] = f"{path} is larger than {limit // (1024 * 1024)}MB"
+    except BaseException:
+        remove_saved(saved)
+        raise
+    return saved, errors
+
+async def receive_archive(archive: UploadFile, manifest: Optional[str], prefix: str) -> Tuple[List[BatchEntry], Dict[str, SavedUpload], Dict[str, str]]:
+    """Save an uploaded archive and extract the files its manifest refers to
+
+    The manifest form field wins over a manifest.json in the archive. The
+    archive itself is removed once extracted.
+    """
+    archive_path = stored_path(prefix, "batch-archive")
+    try:
+        try:
+            await save_upload(archive, archive_path, MAX_ARCHIVE_SIZE)
+        except UploadTooLargeError:
+            raise BatchError(f"Archive must be smaller than {MAX_ARCHIVE_SIZE // (1024 * 1024)}MB")
+
+        if not manifest:
+            manifest = await asyncio.to_thread(read_archive_manifest, archive_path)
+        entries = parse_manifest(manifest)
+        saved, errors = await asyncio.to_thread(extract_archive, archive_path, wanted_files(entries, prefix))
+        return entries, saved, errors
+    finally:
+        remove_file(archive_path)
+
+def attach_files(entries: List[BatchEntry], saved: Dict[str, SavedUpload], errors: Dict[str, str]):
+    """Match saved files to their entries, failing entries whose files are missing or invalid"""
+    for entry in entries:
+        if not entry.pending:
+            continue
+        path = member_path(entry.file)
+        if path is None:
+            entry.fail(f"{entry.file} is outside the upload")
+        elif not is_pdf(path):
+            entry.fail("PDF file is required")
+        elif path in errors:
+            entry.fail(errors[path])
+        elif path not in saved:
+            entry.fail(f"{path} was not uploaded")
+        else:
+            entry.pdf = saved[path]
+            entry.pdf_url = f"/uploads/books/{os.path.basename(saved[path].path)}"
+
+        if entry.pending and entry.cover:
+            cover = member_path(entry.cover)
+            if cover is None:
+                entry.fail(f"{entry.cover} is outside the upload")
+            elif not is_cover(cover):
+                entry.fail("Invalid image type. Only PNG, JPG, and WEBP are allowed")
+            elif cover in errors:
+                entry.fail(errors[cover])
+            elif cover not in saved:
+                entry.fail(f"{cover} was not uploaded")
+            else:
+                entry.cover_url = f"/uploads/books/{os.path.basename(saved[cover].path)}"
+
+async def mark_duplicates(db: Prisma, entries: List[BatchEntry]):
+    """Mark entries matching an existing book, or an earlier entry, by content hash or title and author
+
+    Existing books are looked up with a single query.
+    """
+    pending = [entry for entry in entries if entry.pending]
+    if not pending:
+        return
+
+    existing = await db.book.find_many(
+        where={
+            "OR": [
+                {"contentHash": {"in": list({entry.pdf.content_hash for entry in pending})}},
+                *[{"title": entry.title, "author": entry.author} for entry in pending]
+            ]
+        }
+    )
+    by_hash = {book.contentHash: book.id for book in existing if book.contentHash}
+    by_title = {(book.title, book.author): book.id for book in existing}
+
+    seen_hashes: Dict[str, int] = {}
+    seen_titles: Dict[Tuple, int] = {}
+    for entry in pending:
+        title_key = (entry.title, entry.author)
+        if entry.pdf.content_hash in by_hash:
+            entry.duplicate(by_hash[entry.pdf.content_hash], "contentHash")
+        elif title_key in by_title:
+            entry.duplicate(by_title[title_key], "titleAuthor")
+        elif entry.pdf.content_hash in seen_hashes:
+            entry.duplicate(None, "contentHash", seen_hashes[entry.pdf.content_hash])
+        elif title_key in seen_titles:
+            entry.duplicate(None, "titleAuthor", seen_titles[title_key])
+        else:
+            seen_hashes[entry.pdf.content_hash] = entry.index
+            seen_titles[title_key] = entry.index
+
+def book_row(entry: BatchEntry) -> Dict:
+    return {
+        "title": entry.title,
+        "author": entry.author,
+        "description": entry.description,
+        "publicationYear": entry.publication_year,
+        "licenseType": entry.license_type,
+        "category": entry.category,
+        "isPublic": entry.is_public,
+        "pdfUrl": entry.pdf_url,
+        "contentHash": entry.pdf.content_hash,
+        "coverImage": entry.cover_url,
+        "status": "PUBLISHED",
+        "authorId": "temp_user_id"  # TODO: Use actual session.user.id
+    }
+
+async def insert_books(db: Prisma, entries: List[BatchEntry]):
+    """Create the pending entries' books, their analysis jobs and stat counters in one transaction
+
+    IDs are left to the database. createMany doesn't return rows, so the
+    new books are read back by their stored PDF URLs, which the batch's
+    file prefix and the entry indexes make unique.
+    """
+    pending = [entry for entry in entries if entry.pending]
+    if not pending:
+        return
+
+    rows = [book_row(entry) for entry in pending]
+    changes = Counter()
+    for row in rows:
+        changes.update(book_stat_changes(SimpleNamespace(**row), 1))
+
+    async with db.tx() as tx:
+        if SUPPORTS_CREATE_MANY:
+            await tx.book.create_many(data=rows)
+        else:
+            for row in rows:
+                await tx.book.create(data=row)
+        books = await tx.book.find_many(where={"pdfUrl": {"in": [row["pdfUrl"] for row in rows]}})
+        book_ids = {book.pdfUrl: book.id for book in books}
+        job_ids = await create_analysis_jobs(
+            tx, [book.id for book in books if book.licenseType in ANALYZED_LICENSES]
+        )
+        await apply_stat_changes(tx, dict(changes))
+
+    for entry in pending:
+        book_id = book_ids[entry.pdf_url]
+        entry.result.update(status=RESULT_CREATED, bookId=book_id, jobId=job_ids.get(book_id))
+
+    await index_new_books(db, books)
+    await response_cache.invalidate(TAG_BOOKS, TAG_STATS)
+
+def remove_saved(saved: Dict[str, SavedUpload]):
+    for upload in saved.values():
+        remove_file(upload.path)
+
+def remove_unused_files(entries: List[BatchEntry], saved: Dict[str, SavedUpload]):
+    """Delete saved files that no created book refers to"""
+    used = set()
+    for entry in entries:
+        if entry.result.get("status") == RESULT_CREATED:
+            used.update(url for url in (entry.pdf_url, entry.cover_url) if url)
+    remove_saved({
+        name: upload for name, upload in saved.items()
+        if f"/uploads/books/{os.path.basename(upload.path)}" not in used
+    })
+
+async def ingest_batch(db: Prisma, entries: List[BatchEntry], saved: Dict[str, SavedUpload], errors: Dict[str, str]) -> Dict:
+    """Deduplicate and create the books of a batch whose files are saved
+
+    Returns counts by outcome and one result per manifest entry, in
+    manifest order. Files of books that weren't created are removed.
+    """
+    try:
+        attach_files(entries, saved, errors)
+        await mark_duplicates(db, entries)
+        await insert_books(db, entries)
+    finally:
+        remove_unused_files(entries, saved)
+
+    results = [entry.result for entry in entries]
+    counts = Counter(result["status"] for result in results)
+    return {
+        "created": counts[RESULT_CREATED],
+        "duplicates": counts[RESULT_DUPLICATE],
+        "failed": counts[RESULT_FAILED],
+        "results": results
+    }
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from prisma import Prisma
+from app.database import IS_SQLITE, SUPPORTS_CREATE_MANY
+from app.services.analysis_cache import hash_file, iter_cached_pdf_items
+from app.services.cache import TAG_STATS, book_tag, response_cache
+from app.services.page_store import complete_page_store
+from app.services.pdf_extractor import ExtractorBackend
+from app.services.pool import shutdown_process_pool
+from app.services.search import index_book_items
+from app.services.stats import apply_stat_changes, count_items_by_type, item_stat_changes
+from app.services.storage import resolve_upload_path
+
+# Job statuses (SQLite doesn't support enums, using String instead)
+JOB_PENDING = "PENDING"
+JOB_RUNNING = "RUNNING"
+JOB_SUCCEEDED = "SUCCEEDED"
+JOB_FAILED = "FAILED"
+
+JOB_TYPE_ANALYZE = "ANALYZE_PDF"
+
+# Worker configuration
+RUN_JOB_WORKERS = os.getenv("RUN_JOB_WORKERS", "true").lower() == "true"
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))  # seconds
+# A RUNNING job whose heartbeat is older than this lost its worker; keep it
+# several heartbeat intervals long so a busy database doesn't trigger it
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))  # seconds
+ITEM_BATCH_SIZE = int(os.getenv("ITEM_BATCH_SIZE", "500"))  # rows per insert statement
+
+_worker_tasks: List[asyncio.Task] = []
+_stop_event: Optional[asyncio.Event] = None
+
+async def enqueue_analysis(db: Prisma, book_id: str):
+    """Queue a PDF analysis job for a book"""
+    return await db.analysisjob.create(
+        data={
+            "bookId": book_id,
+            "type": JOB_TYPE_ANALYZE,
+            "status": JOB_PENDING
+        }
+    )
+
+async def create_analysis_jobs(tx: Prisma, book_ids: List[str]) -> Dict[str, str]:
+    """Queue analysis jobs for new books in one insert, returning each book's job ID
+
+    The books must have no jobs yet: createMany doesn't return rows, so
+    the jobs are read back by book.
+    """
+    if not book_ids:
+        return {}
+    rows = [{"bookId": book_id, "type": JOB_TYPE_ANALYZE, "status": JOB_PENDING} for book_id in book_ids]
+    if SUPPORTS_CREATE_MANY:
+        await tx.analysisjob.create_many(data=rows)
+        jobs = await tx.analysisjob.find_many(where={"bookId": {"in": book_ids}})
+    else:
+        jobs = [await tx.analysisjob.create(data=row) for row in rows]
+    return {job.bookId: job.id for job in jobs}
+
+async def requeue_stale_jobs(db: Prisma) -> int:
+    """Put jobs left RUNNING by a crashed worker back in the queue
+
+    A live worker refreshes its job's heartbeat however long the PDF takes,
+    so only jobs whose heartbeat stopped are requeued.
+    """
+    cutoff = datetime.now() - timedelta(seconds=JOB_STALE_AFTER)
+    return await db.analysisjob.update_many(
+        where={
+            "status": JOB_RUNNING,
+            "OR": [
+                {"heartbeatAt": {"lt": cutoff}},
+                # Claimed before heartbeats were recorded
+                {"heartbeatAt": None, "startedAt": {"lt": cutoff}}
+            ]
+        },
+        data={"status": JOB_PENDING}
+    )
+
+async def claim_next_job(db: Prisma):
+    """Atomically claim the oldest pending job, or return None"""
+    job = await db.analysisjob.find_first(
+        where={"status": JOB_PENDING},
+        order={"createdAt": "asc"}
+    )
+    if not job:
+        return None
+
+    # Another worker may have claimed it between the read and this update
+    claimed = await db.analysisjob.update_many(
+        where={"id": job.id, "status": JOB_PENDING},
+        data={
+            "status": JOB_RUNNING,
+            "startedAt": datetime.now(),
+            "heartbeatAt": datetime.now(),
+            "attempts": {"increment": 1}
+        }
+    )
+    if not claimed:
+        return None
+
+    return await db.analysisjob.find_unique(where={"id": job.id})
+
+async def replace_items(db: Prisma, book_id: str, items: List[Dict], content_hash: Optional[str] = None):
+    """Atomically replace a book's extracted items and mark it analyzed
+
+    content_hash, the hash of the PDF the items came from, is recorded on
+    the book (older books have none), so its page text can be served.
+
+    Everything happens in one transaction, so readers see either the old
+    items or the new ones. Updating the book first locks its row until
+    commit, so the old counts are read only once an overlapping job for
+    the same book has committed, and the item type counters can't drift.
+    """
+    rows = [
+        {
+            "bookId": book_id,
+            "type": item['type'],
+            "content": item['content'],
+            "pageNumber": item.get('pageNumber'),
+            "position": item['position']
+        }
+        for item in items
+    ]
+    new_counts = Counter(row["type"] for row in rows)
+
+    async with db.tx() as tx:
+        data = {"analyzedAt": datetime.now()}
+        if content_hash:
+            data["contentHash"] = content_hash
+        await tx.book.update(where={"id": book_id}, data=data)
+
+        # Item type counters move by the difference between the two sets
+        old_counts = await count_items_by_type(tx, {"bookId": book_id})
+
+        await tx.extracteditem.delete_many(where={"bookId": book_id})
+        if SUPPORTS_CREATE_MANY:
+            for start in range(0, len(rows), ITEM_BATCH_SIZE):
+                await tx.extracteditem.create_many(data=rows[start:start + ITEM_BATCH_SIZE])
+        else:
+            for row in rows:
+                await tx.extracteditem.create(data=row)
+        await apply_stat_changes(tx, item_stat_changes(old_counts, new_counts))
+
+    await index_book_items(db, book_id)
+    await response_cache.invalidate(book_tag(book_id), TAG_STATS)
+
+def assign_missing_positions(rows: List[Dict]) -> List[Tuple[str, int]]:
+    """(id, position) for each item row without a position
+
+    Items are paged in position order, so a missing position is placed
+    after the last positioned item of its book, in id order.
+    """
+    last_positions: Dict[str, int] = {}
+    for row in rows:
+        if row["position"] is not None:
+            last_positions[row["bookId"]] = max(last_positions.get(row["bookId"], -1), row["position"])
+
+    updates = []
+    for row in sorted((row for row in rows if row["position"] is None), key=lambda row: (row["bookId"], row["id"])):
+        position = last_positions.get(row["bookId"], -1) + 1
+        last_positions[row["bookId"]] = position
+        updates.append((row["id"], position))
+    return updates
+
+async def backfill_item_positions(db: Prisma) -> int:
+    """Give every extracted item stored without a position one
+
+    Run before making ExtractedItem.position required. Raw SQL, so it
+    works with a client generated from either schema. Returns the
+    number of items updated.
+    """
+    rows = await db.query_raw(
+        'SELECT "id", "bookId", "position" FROM "ExtractedItem" '
+        'WHERE "bookId" IN (SELECT "bookId" FROM "ExtractedItem" WHERE "position" IS NULL)'
+    )
+    updates = assign_missing_positions(rows)
+    if IS_SQLITE:
+        statement = 'UPDATE "ExtractedItem" SET "position" = ? WHERE "id" = ?'
+    else:
+        statement = 'UPDATE "ExtractedItem" SET "position" = $1 WHERE "id" = $2'
+    for start in range(0, len(updates), ITEM_BATCH_SIZE):
+        async with db.tx() as tx:
+            for item_id, position in updates[start:start + ITEM_BATCH_SIZE]:
+                await tx.execute_raw(statement, position, item_id)
+    return len(updates)
+
+async def send_heartbeats(db: Prisma, job_id: str, interval: float = JOB_HEARTBEAT_INTERVAL):
+    """Refresh a running job's heartbeat until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await db.analysisjob.update_many(
+                where={"id": job_id, "status": JOB_RUNNING},
+                data={"heartbeatAt": datetime.now()}
+            )
+        except Exception as e:
+            print(f"Could not record heartbeat of job {job_id}: {str(e)}")
+
+async def run_job(db: Prisma, job):
+    """Run a claimed analysis job, keeping its heartbeat fresh, and record its outcome"""
+    heartbeat = asyncio.create_task(send_heartbeats(db, job.id))
+    try:
+        await _run_job(db, job)
+    finally:
+        heartbeat.cancel()
+
+async def _run_job(db: Prisma, job):
+    try:
+        book = await db.book.find_unique(where={"id": job.bookId})
+        if not book:
+            raise Exception("Book not found")
+        if not book.pdfUrl:
+            raise Exception("Book has no PDF file")
+
+        pdf_path = resolve_upload_path(book.pdfUrl)
+        content_hash = book.contentHash or await asyncio.to_thread(hash_file, pdf_path)
+
+        # Selected on the first pages the first time the PDF is parsed
+        backend = ExtractorBackend(pdf_path)
+        started = time.perf_counter()
+
+        # Items stream in page by page while the PDF is still being parsed,
+        # and the parsed pages' text is stored next to the PDF in the same
+        # pass; an unchanged PDF is served from the analysis cache. Items are
+        # capped at MAX_ITEMS, so they are held until the end and written
+        # in one transaction instead of replacing the old set piecemeal.
+        items: List[Dict] = []
+        async for new_items in iter_cached_pdf_items(pdf_path, content_hash, backend):
+            items.extend(new_items)
+        extraction_seconds = time.perf_counter() - started
+
+        await replace_items(db, book.id, items, content_hash)
+
+        await db.analysisjob.update(
+            where={"id": job.id},
+            data={
+                "status": JOB_SUCCEEDED,
+                "itemsExtracted": len(items),
+                "extractorBackend": backend.name,
+                "extractionSeconds": round(extraction_seconds, 3),
+                "extractorSample": json.dumps(backend.sample) if backend.sample else None,
+                "error": None,
+                "finishedAt": datetime.now()
+            }
+        )
+
+        # Parsing stopped at the item limit; store the remaining pages'
+        # text too, so the whole book can be read without the PDF
+        try:
+            await complete_page_store(pdf_path, content_hash, backend)
+        except Exception as e:
+            print(f"Could not store page text of book {book.id}: {str(e)}")
+    except Exception as e:
+        print(f"Error during PDF analysis (job {job.id}): {str(e)}")
+        # Retry until the attempt budget is spent
+        retry = job.attempts < JOB_MAX_ATTEMPTS
+        await db.analysisjob.update(
+            where={"id": job.id},
+            data={
+                "status": JOB_PENDING if retry else JOB_FAILED,
+                "error": str(e),
+                "finishedAt": None if retry else datetime.now()
+            }
+        )
+
+async def worker_loop(db: Prisma, stop_event: asyncio.Event):
+    """Claim and run jobs until stop_event is set"""
+    while not stop_event.is_set():
+        try:
+            job = await claim_next_job(db)
+        except Exception as e:
+            print(f"Error claiming job: {str(e)}")
+            job = None
+
+        if job:
+            await run_job(db, job)
+            continue
+
+        # Queue is empty, wait before polling again
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+async def start_job_workers(db: Prisma, concurrency: int = JOB_CONCURRENCY):
+    """Start background job workers"""
+    global _stop_event
+    await requeue_stale_jobs(db)
+
+    _stop_event = asyncio.Event()
+    for _ in range(concurrency):
+        _worker_tasks.append(asyncio.create_task(worker_loop(db, _stop_event)))
+
+async def stop_job_workers():
+    """Stop background job workers and the process pool"""
+    if _stop_event is not None:
+        _stop_event.set()
+    if _worker_tasks:
+        await asyncio.gather(*_worker_tasks, return_exceptions=True)
+        _worker_tasks.clear()
+    shutdown_process_pool()
@@ -0,0 +1,143 @@
+import os
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Metrics configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Set by prometheus_client's multiprocess mode (several uvicorn workers)
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Route label of requests that matched no route, so unknown paths can't
+# create unbounded label values
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "HTTP requests",
+    ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, until the last byte of the response",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being handled",
+    multiprocess_mode="livesum"
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries made by a request",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent waiting on database queries",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS
+)
+
+class RequestMetrics:
+    """Database usage of the current request
+
+    Tasks started by the request (e.g. asyncio.gather) share the object
+    through the context, so their queries are counted too.
+    """
+
+    __slots__ = ('db_queries', 'db_seconds')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+def start_request() -> RequestMetrics:
+    """Start counting database usage for the current request"""
+    metrics = RequestMetrics()
+    _current.set(metrics)
+    return metrics
+
+def record_db_query(seconds: float):
+    """Add a query to the current request's totals (ignored outside requests)"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.db_queries += 1
+        metrics.db_seconds += seconds
+
+def observe_request(method: str, route: str, status: int, seconds: float, size: int, metrics: RequestMetrics):
+    """Record a finished request"""
+    REQUEST_COUNT.labels(method, route, str(status)).inc()
+    REQUEST_LATENCY.labels(method, route).observe(seconds)
+    REQUEST_DB_QUERIES.labels(method, route).observe(metrics.db_queries)
+    REQUEST_DB_TIME.labels(method, route).observe(metrics.db_seconds)
+    RESPONSE_SIZE.labels(method, route).observe(size)
+
+def server_timing(total_seconds: float, metrics: RequestMetrics) -> str:
+    """Server-Timing header value (durations in milliseconds)
+
+    Concurrent queries can add up to more than the request took, so the
+    application time is clamped at zero.
+    """
+    app_seconds = max(0.0, total_seconds - metrics.db_seconds)
+    return (
+        f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_queries} queries", '
+        f'app;dur={app_seconds * 1000:.1f}, '
+        f'total;dur={total_seconds * 1000:.1f}'
+    )
+
+class PoolCollector:
+    """Exposes the database pool's usage (see app.database.ConnectionPool)"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def collect(self):
+        stats = self.pool.stats()
+        yield GaugeMetricFamily("db_pool_size", "Requests allowed to use the database at once", value=stats["size"])
+        yield GaugeMetricFamily("db_pool_in_use", "Pool slots in use", value=stats["inUse"])
+        yield GaugeMetricFamily("db_pool_waiting", "Requests waiting for a pool slot", value=stats["waiting"])
+        yield CounterMetricFamily("db_pool_acquired", "Pool slots handed out", value=stats["acquired"])
+        yield CounterMetricFamily("db_pool_timeouts", "Requests that gave up waiting for a slot", value=stats["timeouts"])
+        yield CounterMetricFamily(
+            "db_pool_wait_seconds", "Time spent waiting for pool slots", value=self.pool.wait_seconds_total
+        )
+
+def register_pool(pool):
+    """Add the pool's metrics to the default registry"""
+    REGISTRY.register(PoolCollector(pool))
+
+def render_metrics() -> bytes:
+    """All metrics in the Prometheus text format"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
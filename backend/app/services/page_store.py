@@ -0,0 +1,197 @@
+import asyncio
+import os
+import struct
+import tempfile
+import zlib
+from typing import List, Optional
+from app.services.pdf_extractor import PAGE_TEXT_VERSION, ExtractorBackend, iter_page_chunks, read_pdf_page_range
+from app.services.storage import remove_file
+
+# Page text is kept in a sidecar next to each PDF ("<name>.pdf.pages")
+PAGE_STORE_ENABLED = os.getenv("PAGE_STORE_ENABLED", "true").lower() == "true"
+PAGE_STORE_SUFFIX = ".pages"
+
+# Sidecar layout:
+#   MAGIC
+#   one zlib block of UTF-8 text per page that has text; pages without
+#   any are skipped, so page n is the one ExtractedItem.pageNumber n means
+#   index: (offset, length) of each block
+#   footer: index offset, page count, next PDF page to read, whether the
+#   whole PDF was read, text extraction backend, content hash,
+#   PAGE_TEXT_VERSION, MAGIC
+# The footer is written last, so a truncated file is never mistaken for
+# a complete one. Item extraction stops at MAX_ITEMS, so a sidecar may
+# hold only the first pages; complete_page_store() adds the rest.
+MAGIC = b"BLPAGES4"
+INDEX_ENTRY = struct.Struct("<QI")
+FOOTER = struct.Struct("<QII?16s64s8s8s")
+
+COMPRESSION_LEVEL = 6
+
+def page_store_path(pdf_path: str) -> str:
+    """Sidecar path of a PDF"""
+    return pdf_path + PAGE_STORE_SUFFIX
+
+def compress_page_text(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+def compress_page_range(pdf_path: str, start: int, end: int, backend: Optional[str] = None) -> List[bytes]:
+    """Compressed text of the non-empty pages in [start, end) of a PDF (runs in a worker process)"""
+    return [compress_page_text(text) for text in read_pdf_page_range(pdf_path, start, end, backend)]
+
+class PageStore:
+    """Random access to the pages of a sidecar
+
+    Only the offset index is held in memory; each page is read and
+    decompressed on its own.
+    """
+
+    def __init__(self, path: str, content_hash: str):
+        self.file = open(path, 'rb')
+        try:
+            self.file.seek(0, os.SEEK_END)
+            size = self.file.tell()
+            if size < len(MAGIC) + FOOTER.size:
+                raise ValueError("truncated page store")
+            self.file.seek(size - FOOTER.size)
+            index_offset, page_count, self.next_page, self.complete, backend, stored_hash, version, magic = FOOTER.unpack(
+                self.file.read(FOOTER.size)
+            )
+            self.backend = backend.rstrip(b"\0").decode('ascii') or None
+            if magic != MAGIC or index_offset + page_count * INDEX_ENTRY.size != size - FOOTER.size:
+                raise ValueError("corrupt page store")
+            if version.rstrip(b"\0").decode('ascii') != PAGE_TEXT_VERSION:
+                raise ValueError("page store written by another text extractor version")
+            if stored_hash.rstrip(b"\0").decode('ascii') != content_hash:
+                raise ValueError("page store belongs to another version of the PDF")
+
+            self.file.seek(index_offset)
+            self.index = list(INDEX_ENTRY.iter_unpack(self.file.read(page_count * INDEX_ENTRY.size)))
+        except:
+            self.file.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def block(self, number: int) -> bytes:
+        """Compressed text of a page, numbered from 1"""
+        if not 1 <= number <= len(self.index):
+            raise IndexError(f"page {number} out of range (1-{len(self.index)})")
+        offset, length = self.index[number - 1]
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def page(self, number: int) -> str:
+        """Text of a page, numbered from 1 like ExtractedItem.pageNumber"""
+        return zlib.decompress(self.block(number)).decode('utf-8')
+
+    def pages(self, start: int, end: int) -> List[str]:
+        """Text of pages [start, end), counted from 0 like a list, so callers can read a chunk at a time"""
+        return [self.page(number) for number in range(start + 1, min(end, len(self.index)) + 1)]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "PageStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PageStoreWriter:
+    """Writes a sidecar page by page, then moves it into place atomically
+
+    Continuing a partial sidecar copies its compressed pages first.
+    """
+
+    def __init__(self, pdf_path: str, base: Optional[PageStore] = None):
+        self.path = page_store_path(pdf_path)
+        fd, self.tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        self.file = os.fdopen(fd, 'wb')
+        self.index: List[bytes] = []
+        try:
+            self.file.write(MAGIC)
+            if base is not None:
+                for number in range(1, len(base) + 1):
+                    self.add(base.block(number))
+        except:
+            self.abort()
+            raise
+
+    def add(self, block: bytes):
+        """Append a page's compressed text"""
+        self.index.append(INDEX_ENTRY.pack(self.file.tell(), len(block)))
+        self.file.write(block)
+
+    def add_texts(self, texts: List[str]):
+        """Compress and append the text of pages"""
+        for text in texts:
+            self.add(compress_page_text(text))
+
+    def finish(self, content_hash: str, next_page: int, complete: bool, backend: Optional[str]):
+        index_offset = self.file.tell()
+        self.file.write(b"".join(self.index))
+        self.file.write(FOOTER.pack(
+            index_offset,
+            len(self.index),
+            next_page,
+            complete,
+            (backend or "").encode('ascii'),
+            content_hash.encode('ascii'),
+            PAGE_TEXT_VERSION.encode('ascii'),
+            MAGIC
+        ))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        remove_file(self.tmp_path)
+
+def open_page_store(pdf_path: str, content_hash: str) -> Optional[PageStore]:
+    """The PDF's sidecar, or None if it is missing, stale or for other content"""
+    try:
+        return PageStore(page_store_path(pdf_path), content_hash)
+    except (OSError, ValueError, struct.error):
+        return None
+
+async def complete_page_store(pdf_path: str, content_hash: str, backend: Optional[ExtractorBackend] = None):
+    """Parse the pages the PDF's sidecar is missing (all of them if there is none) and rewrite it
+
+    Analysis writes the sidecar while extracting items, and stops with
+    them; this adds the pages after the item limit.
+    """
+    if not PAGE_STORE_ENABLED:
+        return
+    store = await asyncio.to_thread(open_page_store, pdf_path, content_hash)
+    if store is not None and store.complete:
+        store.close()
+        return
+    backend = backend or ExtractorBackend(pdf_path)
+    if store is not None:
+        backend.pin(store.backend)
+    try:
+        writer = await asyncio.to_thread(PageStoreWriter, pdf_path, store)
+        next_page = store.next_page if store is not None else 0
+    finally:
+        if store is not None:
+            store.close()
+
+    chunks = iter_page_chunks(pdf_path, compress_page_range, next_page, backend)
+    try:
+        async for next_page, blocks in chunks:
+            for block in blocks:
+                writer.add(block)
+        await asyncio.to_thread(writer.finish, content_hash, next_page, True, backend.name)
+    except:
+        writer.abort()
+        raise
+    finally:
+        await chunks.aclose()
+
+def remove_page_store(pdf_path: str):
+    """Delete the PDF's sidecar, if any"""
+    remove_file(page_store_path(pdf_path))
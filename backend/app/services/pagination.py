@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (field, "asc" | "desc") pairs; the last field must be unique (e.g. id).
+# Fields must be non-null: NULLs can't be compared with gt/lt, and SQLite
+# sorts them first where PostgreSQL sorts them last
+SortOrder = Sequence[Tuple[str, str]]
+
+# Newest first, ties broken by id
+NEWEST_FIRST: SortOrder = (("createdAt", "desc"), ("id", "desc"))
+
+# Document order of a book's extracted items
+DOCUMENT_ORDER: SortOrder = (("position", "asc"), ("id", "asc"))
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded"""
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, order: SortOrder) -> List[Any]:
+    """Decode a cursor made by encode_cursor for the same sort order"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError("wrong number of values")
+        if any(v is None for v in values):
+            raise ValueError("null sort key")
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for results ranked per query (e.g. search), which page by offset"""
+    return encode_cursor([offset])
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """Offset stored in a cursor made by encode_offset_cursor (0 without one)"""
+    if not cursor:
+        return 0
+    offset = decode_cursor(cursor, (("offset", "asc"),))[0]
+    if not isinstance(offset, int) or offset < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return offset
+
+def keyset_order(order: SortOrder) -> List[Dict[str, str]]:
+    """Prisma order argument for a sort order"""
+    return [{field: direction} for field, direction in order]
+
+def keyset_where(order: SortOrder, values: List[Any]) -> Dict:
+    """Prisma filter for the rows that come after values in the sort order
+
+    For (createdAt desc, id desc) this is
+    createdAt < c OR (createdAt = c AND id < i), which the database
+    answers with an index range scan however deep the page is.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(order):
+        branch = {f: values[j] for j, (f, _) in enumerate(order[:i])}
+        branch[field] = {"lt" if direction == "desc" else "gt": values[i]}
+        branches.append(branch)
+    return {"OR": branches}
+
+def keyset_page(
+    where: Dict,
+    order: SortOrder,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Dict:
+    """find_many arguments for one page (one extra row tells if there are more)"""
+    if cursor:
+        where = {"AND": [where, keyset_where(order, decode_cursor(cursor, order))]}
+    return {
+        "where": where,
+        "order": keyset_order(order),
+        "take": limit + 1
+    }
+
+def page_result(rows: List[Any], order: SortOrder, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trim the extra row fetched by keyset_page and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field) for field, _ in order])
+
+async def find_page(
+    delegate: Any,
+    where: Dict,
+    order: SortOrder,
+    limit: int,
+    cursor: Optional[str] = None,
+    **kwargs
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page of a model (e.g. db.book) and the cursor of the next"""
+    rows = await delegate.find_many(**keyset_page(where, order, limit, cursor), **kwargs)
+    return page_result(rows, order, limit)
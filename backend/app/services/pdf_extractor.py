@@ -1,7 +1,54 @@
 import PyPDF2
 import pdfplumber
-from typing import List, Dict
+import asyncio
+import functools
+import itertools
+import os
+import time
+from collections import Counter, deque
+from typing import AsyncIterator, Callable, List, Dict, Optional, Set, Tuple
 import re
+from app.services.pool import ANALYSIS_WORKERS, get_process_pool
+from app.services.text_classifier import classifier, is_meaningful_text
+
+# Documents larger than this are split into page ranges extracted in parallel
+PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "50"))
+
+# Page ranges submitted to the pool ahead of the consumer
+MAX_CHUNKS_IN_FLIGHT = int(os.getenv("PDF_CHUNKS_IN_FLIGHT", str(ANALYSIS_WORKERS)))
+
+# Text extraction backend: "auto" samples the first pages of each document
+# with every backend and uses the fastest one whose text is close enough
+# to REFERENCE_BACKEND's; a backend name always uses that backend
+PDF_EXTRACTOR_BACKEND = os.getenv("PDF_EXTRACTOR_BACKEND", "auto")
+AUTO_BACKEND = "auto"
+
+# Pages read with each backend when sampling
+BACKEND_SAMPLE_PAGES = int(os.getenv("PDF_BACKEND_SAMPLE_PAGES", "5"))
+
+# Share of the reference text's words a backend must reproduce to be used
+BACKEND_MIN_QUALITY = float(os.getenv("PDF_BACKEND_MIN_QUALITY", "0.95"))
+
+# Limit to 300 high-quality items per book
+MAX_ITEMS = 300
+
+# Bump when page text extraction changes (invalidates cached page text and items)
+PAGE_TEXT_VERSION = "1"
+
+# Bump when the item heuristics change (invalidates cached items only)
+ITEM_EXTRACTOR_VERSION = "1"
+
+# Deduplication rules applied to candidates from each extraction pass
+DEDUP_QUOTE = "quote"
+DEDUP_VERSE = "verse"
+DEDUP_STATEMENT = "statement"
+DEDUP_NONE = "none"
+
+# Key length for substring lookups; shorter than any item can be
+CONTAINMENT_KEY_LENGTH = 20
+
+# (dedup rule, item type, content)
+Candidate = Tuple[str, str, str]
 
 def word_count(text: str) -> int:
     """Count words in text"""
@@ -13,290 +60,529 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\n{3,}', '\n\n', text)  # Normalize line breaks
     return text.strip()
 
-def is_meaningful_text(text: str) -> bool:
-    """Check if text is meaningful (not just filler)"""
-    trimmed = text.strip()
+def count_pdf_pages(pdf_path: str) -> int:
+    """Count the pages in a PDF file"""
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    except:
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+def read_pdfplumber_page_texts(pdf_path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end) using pdfplumber (layout aware, slower)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return [(page.extract_text() or "").strip() for page in pdf.pages[start:end]]
+
+def read_pypdf2_page_texts(pdf_path: str, start: int, end: int) -> List[str]:
+    """Text of pages [start, end) using PyPDF2 (content stream order, faster)"""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [(page.extract_text() or "").strip() for page in pdf_reader.pages[start:end]]
+
+# Text extraction backends, most accurate first. Each returns the text of
+# every page in [start, end), "" for pages without text.
+EXTRACTOR_BACKENDS: Dict[str, Callable[[str, int, int], List[str]]] = {
+    "pdfplumber": read_pdfplumber_page_texts,
+    "pypdf2": read_pypdf2_page_texts,
+}
+REFERENCE_BACKEND = "pdfplumber"
+
+def read_pdf_page_texts(pdf_path: str, start: int, end: int, backend: Optional[str] = None) -> List[str]:
+    """Synchronously extract the text of every page in [start, end) of a PDF file
     
-    # Skip very short or very long texts
-    if len(trimmed) < 25 or len(trimmed) > 600:
-        return False
+    Pages without text are kept as empty strings, so results line up with
+    page numbers. The other backends are tried in turn if backend fails;
+    without one, they are tried most accurate first.
+    """
+    names = list(EXTRACTOR_BACKENDS)
+    if backend:
+        names.remove(backend)
+        names.insert(0, backend)
     
-    # Skip if it's just numbers or page numbers
-    if re.match(r'^\d+$', trimmed) or re.match(r'^Page \d+', trimmed, re.IGNORECASE):
-        return False
+    for name in names[:-1]:
+        try:
+            return EXTRACTOR_BACKENDS[name](pdf_path, start, end)
+        except:
+            pass
+    return EXTRACTOR_BACKENDS[names[-1]](pdf_path, start, end)
+
+def read_pdf_page_range(pdf_path: str, start: int, end: int, backend: Optional[str] = None) -> List[str]:
+    """Synchronously extract text from the non-empty pages in [start, end) of a PDF file"""
+    return [text for text in read_pdf_page_texts(pdf_path, start, end, backend) if text]
+
+def text_similarity(reference: List[str], candidate: List[str]) -> float:
+    """Share of words the two texts have in common, relative to the longer one"""
+    expected = Counter(" ".join(reference).split())
+    found = Counter(" ".join(candidate).split())
+    total = max(sum(expected.values()), sum(found.values()))
+    if not total:
+        return 1.0
+    return sum((expected & found).values()) / total
+
+def sample_backends(pdf_path: str, pages: int = BACKEND_SAMPLE_PAGES) -> Dict[str, Dict]:
+    """Time every backend on the first pages of a PDF and score its text against the reference's
     
-    # Skip common headers/footers
-    header_footer_patterns = [
-        r'^(Chapter|Section|Page \d+|\d+)$',
-        r'^(Table of Contents|Index|Bibliography)$',
-        r'^\d+$',
-        r'^[A-Z\s]{1,5}$',
-    ]
+    Returns {backend: {"seconds", "quality"}}, or {backend: {"error"}} for
+    backends that can't read the document. Quality is None when the
+    reference backend failed.
+    """
+    texts = {}
+    sample = {}
+    for name, read in EXTRACTOR_BACKENDS.items():
+        started = time.perf_counter()
+        try:
+            texts[name] = read(pdf_path, 0, pages)
+        except Exception as e:
+            sample[name] = {"error": f"{type(e).__name__}: {str(e)}"}
+            continue
+        sample[name] = {"seconds": round(time.perf_counter() - started, 6)}
     
-    for pattern in header_footer_patterns:
-        if re.match(pattern, trimmed, re.IGNORECASE):
-            return False
+    reference = texts.get(REFERENCE_BACKEND)
+    for name, text in texts.items():
+        sample[name]["quality"] = round(text_similarity(reference, text), 4) if reference is not None else None
+    return sample
+
+def choose_backend(sample: Dict[str, Dict], min_quality: float = BACKEND_MIN_QUALITY) -> str:
+    """The fastest sampled backend whose quality is good enough
     
-    # Must have some actual words
-    words = [w for w in trimmed.split() if len(w) > 2]
-    if len(words) < 4:
-        return False
+    If the reference backend failed, any backend that read the sample
+    will do. If none did, the reference backend is returned so reading
+    falls back through every backend as usual.
+    """
+    usable = [
+        (result["seconds"], name)
+        for name, result in sample.items()
+        if "error" not in result and (result["quality"] is None or result["quality"] >= min_quality)
+    ]
+    return min(usable)[1] if usable else REFERENCE_BACKEND
+
+def select_backend(pdf_path: str) -> Tuple[str, Optional[Dict]]:
+    """Pick the backend for a whole PDF (runs in a worker process)
     
-    # Skip if mostly special characters
-    special_chars = len(re.findall(r'[^a-zA-Z0-9\s]', trimmed))
-    if special_chars / len(trimmed) > 0.4:
-        return False
+    Returns (backend, sample), sample being None when nothing was
+    sampled: a fixed PDF_EXTRACTOR_BACKEND, or a document no longer than
+    the sample, which is read with the reference backend.
+    """
+    if PDF_EXTRACTOR_BACKEND != AUTO_BACKEND:
+        if PDF_EXTRACTOR_BACKEND not in EXTRACTOR_BACKENDS:
+            raise ValueError(
+                f"Unknown PDF_EXTRACTOR_BACKEND {PDF_EXTRACTOR_BACKEND!r} "
+                f"(use {AUTO_BACKEND!r} or one of {', '.join(EXTRACTOR_BACKENDS)})"
+            )
+        return PDF_EXTRACTOR_BACKEND, None
     
-    # Check for meaningful words
-    meaningful_words = ['the', 'and', 'for', 'was', 'are', 'with', 'this', 'that', 'from', 'have']
-    has_meaningful = any(word in trimmed.lower() for word in meaningful_words)
+    if count_pdf_pages(pdf_path) <= BACKEND_SAMPLE_PAGES:
+        return REFERENCE_BACKEND, None
     
-    return has_meaningful or len(words) >= 8
+    sample = sample_backends(pdf_path)
+    return choose_backend(sample), sample
 
-def is_quotation(text: str) -> bool:
-    """Check if text looks like a quotation"""
-    trimmed = text.strip()
+class ExtractorBackend:
+    """Text extraction backend of one document, selected on first use
     
-    # Has quotation marks
-    has_quotes = bool(re.search(r'["\'«»"]', trimmed))
+    Shared by everything that parses the document during an analysis, so
+    it is sampled once and the choice can be recorded afterwards. name
+    stays None if the document never had to be parsed. Text stored by an
+    earlier analysis pins the backend it was read with, so a document's
+    pages never mix backends.
+    """
     
-    # Starts with capital letter
-    starts_with_capital = bool(re.match(r'^[A-Z]', trimmed))
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+        self.name: Optional[str] = None
+        self.sample: Optional[Dict] = None
     
-    # Has complete sentences
-    has_complete_sentence = bool(re.search(r'[.!?]$', trimmed))
+    async def select(self) -> str:
+        if self.name is None:
+            loop = asyncio.get_running_loop()
+            self.name, self.sample = await loop.run_in_executor(get_process_pool(), select_backend, self.pdf_path)
+        return self.name
     
-    # Contains dialogue indicators
-    has_dialogue = bool(re.search(r'(said|says|told|asked|replied|exclaimed|whispered|shouted)', trimmed, re.IGNORECASE))
+    def pin(self, name: Optional[str]):
+        """Use the backend earlier pages were read with instead of selecting one"""
+        if name in EXTRACTOR_BACKENDS:
+            self.name = name
+
+def split_page_ranges(page_count: int, chunk_size: int = PAGES_PER_CHUNK) -> List[Tuple[int, int]]:
+    """Split a document into consecutive [start, end) page ranges"""
+    chunk_size = max(1, chunk_size)
+    return [
+        (start, min(start + chunk_size, page_count))
+        for start in range(0, page_count, chunk_size)
+    ]
+
+async def iter_page_chunks(
+    pdf_path: str,
+    range_fn: Callable[..., List],
+    start_page: int = 0,
+    backend: Optional[ExtractorBackend] = None
+) -> AsyncIterator[Tuple[int, List]]:
+    """Run range_fn over consecutive page ranges in the process pool
+    
+    Yields (end page, per-page results) for each range in document order
+    as soon as it is done, starting at start_page. Only
+    MAX_CHUNKS_IN_FLIGHT ranges are outstanding at once, so memory stays
+    flat however long the document is. range_fn is passed the selected
+    text extraction backend as its backend argument.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
     
-    # Is a statement
-    sentences = [s.strip() for s in re.split(r'[.!?]', trimmed) if len(s.strip()) > 10]
-    is_statement = len(sentences) >= 1
+    backend = backend or ExtractorBackend(pdf_path)
+    range_fn = functools.partial(range_fn, backend=await backend.select())
+    page_count = await loop.run_in_executor(pool, count_pdf_pages, pdf_path)
+    ranges = iter([
+        (start + start_page, end + start_page)
+        for start, end in split_page_ranges(max(0, page_count - start_page))
+    ])
     
-    return (has_quotes and has_complete_sentence) or \
-           (starts_with_capital and is_statement and not has_dialogue and word_count(trimmed) >= 10)
+    pending = deque()
+    try:
+        for start, end in itertools.islice(ranges, MAX_CHUNKS_IN_FLIGHT):
+            pending.append((end, loop.run_in_executor(pool, range_fn, pdf_path, start, end)))
+        
+        while pending:
+            end, future = pending.popleft()
+            chunk = await future
+            
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append((next_range[1], loop.run_in_executor(pool, range_fn, pdf_path, *next_range)))
+            
+            yield end, chunk
+    finally:
+        # Stop outstanding work if the consumer stops early
+        for _, future in pending:
+            future.cancel()
 
-def is_verse(text: str) -> bool:
-    """Check if text looks like a verse"""
-    trimmed = text.strip()
+async def iter_page_ranges(pdf_path: str, range_fn: Callable[..., List], backend: Optional[ExtractorBackend] = None) -> AsyncIterator:
+    """Yield the per-page results of range_fn in document order"""
+    chunks = iter_page_chunks(pdf_path, range_fn, backend=backend)
+    try:
+        async for _, chunk in chunks:
+            for page_result in chunk:
+                yield page_result
+    finally:
+        await chunks.aclose()
+
+def find_quotations(cleaned_text: str) -> List[Candidate]:
+    """Pass 1: proper quotations (with quotation marks)"""
+    candidates = []
+    quote_patterns = [
+        r'"([^"]{30,500})"',
+        r"'([^']{30,500})'",
+        r'«([^»]{30,500})»',
+        r'"([^"\n]{30,400})"',
+    ]
     
-    # Numbered verse
-    if re.match(r'^\d+[\.\)]\s+[A-Z]', trimmed):
-        return True
+    for pattern in quote_patterns:
+        for match in re.finditer(pattern, cleaned_text, re.MULTILINE):
+            content = clean_text(match.group(1) or match.group(0))
+            features = classifier.classify(content)
+            if features.meaningful and features.quotation:
+                candidates.append((DEDUP_QUOTE, 'quote', content))
     
-    # Poetic structure
-    lines = [l.strip() for l in trimmed.split('\n') if l.strip()]
-    if 2 <= len(lines) <= 8:
-        avg_length = sum(len(l) for l in lines) / len(lines)
-        if 20 < avg_length < 100:
-            capitalized = sum(1 for l in lines if re.match(r'^[A-Z]', l))
-            if capitalized >= len(lines) * 0.7:
-                return True
+    return candidates
+
+def find_numbered_verses(cleaned_text: str) -> List[Candidate]:
+    """Pass 2: numbered verses"""
+    candidates = []
+    verse_pattern = r'^\s*(\d+)[\.\)]\s+([^\n]{25,300})'
+    for match in re.finditer(verse_pattern, cleaned_text, re.MULTILINE):
+        content = clean_text(match.group(2))
+        if is_meaningful_text(content):
+            candidates.append((DEDUP_VERSE, 'verse', content))
     
-    # Short meaningful statement
-    if 30 <= len(trimmed) <= 200 and \
-       re.match(r'^[A-Z]', trimmed) and \
-       5 <= word_count(trimmed) <= 40:
-        sentence_count = len(re.findall(r'[.!?]', trimmed))
-        if sentence_count <= 2:
-            return True
+    return candidates
+
+def find_poetic_verses(cleaned_text: str) -> List[Candidate]:
+    """Pass 3: runs of 2-6 short capitalised lines"""
+    candidates = []
+    lines = [l.strip() for l in cleaned_text.split('\n') if l.strip()]
     
-    return False
+    i = 0
+    while i < len(lines) - 1:
+        group = []
+        j = i
+        
+        while j < len(lines) and len(group) < 6:
+            line = lines[j]
+            if 20 <= len(line) <= 150 and re.match(r'^[A-Z]', line):
+                group.append(line)
+                j += 1
+            else:
+                break
+        
+        if 2 <= len(group) <= 6:
+            verse_content = ' '.join(group)
+            features = classifier.classify(verse_content)
+            if features.verse and features.meaningful:
+                candidates.append((DEDUP_VERSE, 'verse', verse_content))
+                i = j - 1
+                continue
+        
+        i += 1
+    
+    return candidates
 
-async def extract_text_from_pdf(pdf_path: str) -> List[str]:
-    """Extract text from PDF file, returning list of pages"""
-    try:
-        pages = []
+def find_statements(cleaned_text: str) -> List[Candidate]:
+    """Pass 4: meaningful standalone statements"""
+    candidates = []
+    paragraphs = [clean_text(p) for p in cleaned_text.split('\n\n+')]
+    
+    for para in paragraphs:
+        features = classifier.classify(para)
+        if not features.meaningful:
+            continue
         
-        # Try using pdfplumber first (better text extraction)
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text and text.strip():
-                        pages.append(text.strip())
-        except:
-            # Fallback to PyPDF2
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    if text and text.strip():
-                        pages.append(text.strip())
+        word_cnt = word_count(para)
+        sentence_count = len(re.findall(r'[.!?]', para))
         
-        return pages if pages else [""]
-    except Exception as e:
-        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+        if (sentence_count >= 1 and sentence_count <= 3 and
+            10 <= word_cnt <= 50 and
+            re.match(r'^[A-Z]', para) and
+            re.search(r'[.!?]$', para.strip())):
+            
+            item_type = 'quote' if features.quotation else 'verse'
+            candidates.append((DEDUP_STATEMENT, item_type, para))
+    
+    return candidates
 
-def extract_items_from_text(pages: List[str]) -> List[Dict]:
-    """Extract quotations, verses, and code from text pages"""
-    items = []
-    position = 0
+def find_code_blocks(cleaned_text: str) -> List[Candidate]:
+    """Pass 5: code blocks"""
+    candidates = []
+    code_patterns = [
+        r'```[\s\S]{20,500}?```',
+        r'<code>[\s\S]{20,500}?</code>',
+    ]
+    
+    for pattern in code_patterns:
+        for match in re.finditer(pattern, cleaned_text, re.IGNORECASE):
+            content = clean_text(match.group(0))
+            if 20 < len(content) < 1000:
+                candidates.append((DEDUP_NONE, 'code', content))
+    
+    return candidates
+
+# Extraction passes in the order their candidates are deduplicated
+EXTRACTION_PASSES: List[Tuple[str, Callable[[str], List[Candidate]]]] = [
+    ("quotations", find_quotations),
+    ("numbered_verses", find_numbered_verses),
+    ("poetic_verses", find_poetic_verses),
+    ("statements", find_statements),
+    ("code_blocks", find_code_blocks),
+]
+
+def extract_page_candidates(page_text: str) -> List[Candidate]:
+    """Find candidate items on a single page
+    
+    Returns (dedup rule, type, content) tuples in the order they were
+    found. Candidates only depend on the page text, so this can run in a
+    worker process; deduplication against earlier pages is left to
+    ItemExtractor.
+    """
+    cleaned_text = clean_text(page_text)
+    candidates = []
+    for _, find in EXTRACTION_PASSES:
+        candidates.extend(find(cleaned_text))
+    return candidates
+
+def extract_page_range_candidates(pdf_path: str, start: int, end: int, backend: Optional[str] = None) -> List[List[Candidate]]:
+    """Extract text and candidate items from pages [start, end) of a PDF file"""
+    return [extract_page_candidates(text) for text in read_pdf_page_range(pdf_path, start, end, backend)]
+
+def read_page_range_with_candidates(pdf_path: str, start: int, end: int, backend: Optional[str] = None) -> List[Tuple[str, List[Candidate]]]:
+    """Extract (page text, candidate items) for pages [start, end) of a PDF file"""
+    return [(text, extract_page_candidates(text)) for text in read_pdf_page_range(pdf_path, start, end, backend)]
+
+def extract_pages_candidates(pages: List[str]) -> List[List[Candidate]]:
+    """Find the candidate items of already extracted pages"""
+    return [extract_page_candidates(text) for text in pages]
+
+class DedupIndex:
+    """Hashed lookups over the items found so far
+    
+    Each check gives the same answer as scanning every earlier item, but
+    costs time proportional to the candidate rather than the item count.
+    """
+    
+    def __init__(self):
+        self.contents: List[str] = []
+        self.prefixes_50: Set[str] = set()
+        self.prefixes_40: Set[str] = set()
+        # item['content'][:30] keyed by its first CONTAINMENT_KEY_LENGTH chars
+        self.heads: Dict[str, Set[str]] = {}
+        self.short_heads: Set[str] = set()
+        # CONTAINMENT_KEY_LENGTH-char windows of item contents -> item indexes,
+        # built on demand since statement candidates are rare
+        self.windows: Dict[str, List[int]] = {}
+        self.windowed = 0
     
-    for page_index, page_text in enumerate(pages):
-        page_number = page_index + 1
-        cleaned_text = clean_text(page_text)
+    def add(self, content: str):
+        """Record a new item"""
+        self.contents.append(content)
+        self.prefixes_50.add(content[:50].lower())
+        self.prefixes_40.add(content[:40].lower())
         
-        # 1. Extract proper quotations (with quotation marks)
-        quote_patterns = [
-            r'"([^"]{30,500})"',
-            r"'([^']{30,500})'",
-            r'«([^»]{30,500})»',
-            r'"([^"\n]{30,400})"',
-        ]
+        head = content[:30]
+        if len(head) >= CONTAINMENT_KEY_LENGTH:
+            self.heads.setdefault(head[:CONTAINMENT_KEY_LENGTH], set()).add(head)
+        else:
+            self.short_heads.add(head)
+    
+    def has_prefix_50(self, content: str) -> bool:
+        """Whether an item shares the first 50 chars (case-insensitive)"""
+        return content[:50].lower() in self.prefixes_50
+    
+    def has_prefix_40(self, content: str) -> bool:
+        """Whether an item shares the first 40 chars (case-insensitive)"""
+        return content[:40].lower() in self.prefixes_40
+    
+    def contains_item_head(self, text: str) -> bool:
+        """Whether the first 30 chars of any item occur in text"""
+        if any(head in text for head in self.short_heads):
+            return True
         
-        for pattern in quote_patterns:
-            for match in re.finditer(pattern, cleaned_text, re.MULTILINE):
-                content = clean_text(match.group(1) or match.group(0))
-                if is_meaningful_text(content) and is_quotation(content):
-                    # Check for duplicates
-                    is_duplicate = any(
-                        item['content'][:50].lower() == content[:50].lower()
-                        for item in items
-                    )
-                    if not is_duplicate:
-                        items.append({
-                            'type': 'quote',
-                            'content': content,
-                            'pageNumber': page_number,
-                            'position': position
-                        })
-                        position += 1
+        for i in range(len(text) - CONTAINMENT_KEY_LENGTH + 1):
+            heads = self.heads.get(text[i:i + CONTAINMENT_KEY_LENGTH])
+            if heads and any(text.startswith(head, i) for head in heads):
+                return True
+        return False
+    
+    def in_any_item(self, text: str) -> bool:
+        """Whether text occurs inside any item"""
+        if len(text) < CONTAINMENT_KEY_LENGTH:
+            return any(text in content for content in self.contents)
         
-        # 2. Extract numbered verses
-        verse_pattern = r'^\s*(\d+)[\.\)]\s+([^\n]{25,300})'
-        for match in re.finditer(verse_pattern, cleaned_text, re.MULTILINE):
-            content = clean_text(match.group(2))
-            if is_meaningful_text(content):
-                is_duplicate = any(
-                    item['content'][:40].lower() == content[:40].lower()
-                    for item in items
-                )
-                if not is_duplicate:
-                    items.append({
-                        'type': 'verse',
-                        'content': content,
-                        'pageNumber': page_number,
-                        'position': position
-                    })
-                    position += 1
+        self._index_windows()
+        for index in self.windows.get(text[:CONTAINMENT_KEY_LENGTH], ()):
+            if text in self.contents[index]:
+                return True
+        return False
+    
+    def _index_windows(self):
+        """Add the windows of items recorded since the last lookup"""
+        for index in range(self.windowed, len(self.contents)):
+            content = self.contents[index]
+            for i in range(len(content) - CONTAINMENT_KEY_LENGTH + 1):
+                indexes = self.windows.setdefault(content[i:i + CONTAINMENT_KEY_LENGTH], [])
+                if not indexes or indexes[-1] != index:
+                    indexes.append(index)
+        self.windowed = len(self.contents)
+
+class ItemExtractor:
+    """Incrementally turns per-page candidates into the final item list
+    
+    Pages must be fed in document order. add_page() returns the items
+    that made it through deduplication, so callers can save them as they
+    arrive instead of waiting for the whole book.
+    """
+    
+    def __init__(self, limit: int = MAX_ITEMS):
+        self.limit = limit
+        self.accepted = 0
+        self.page_number = 0
+        self.position = 0
+        self.index = DedupIndex()
+        # content.lower()[:50] of every accepted item
+        self.seen_content: Set[str] = set()
+    
+    @property
+    def done(self) -> bool:
+        """Whether the item limit has been reached (later pages can't add items)"""
+        return self.accepted >= self.limit
+    
+    def is_duplicate(self, rule: str, content: str) -> bool:
+        """Check a candidate against items found so far"""
+        if rule == DEDUP_QUOTE:
+            return self.index.has_prefix_50(content)
+        if rule == DEDUP_VERSE:
+            return self.index.has_prefix_40(content)
+        if rule == DEDUP_STATEMENT:
+            # Check if already captured
+            return self.index.contains_item_head(content) or self.index.in_any_item(content[:30])
+        return False
+    
+    def accept(self, item: Dict) -> bool:
+        """Final deduplication and quality check for a new item"""
+        if self.done:
+            return False
         
-        # 3. Extract poetic verses
-        lines = [l.strip() for l in cleaned_text.split('\n') if l.strip()]
+        # Exact and near-duplicates both share the first 50 normalized chars
+        normalized = item['content'].lower()[:50]
+        if normalized in self.seen_content:
+            return False
         
-        i = 0
-        while i < len(lines) - 1:
-            group = []
-            j = i
-            
-            while j < len(lines) and len(group) < 6:
-                line = lines[j]
-                if 20 <= len(line) <= 150 and re.match(r'^[A-Z]', line):
-                    group.append(line)
-                    j += 1
-                else:
-                    break
-            
-            if 2 <= len(group) <= 6:
-                verse_content = ' '.join(group)
-                if is_verse(verse_content) and is_meaningful_text(verse_content):
-                    is_duplicate = any(
-                        item['content'][:40].lower() == verse_content[:40].lower()
-                        for item in items
-                    )
-                    if not is_duplicate:
-                        items.append({
-                            'type': 'verse',
-                            'content': verse_content,
-                            'pageNumber': page_number,
-                            'position': position
-                        })
-                        position += 1
-                    i = j - 1
-                    continue
-            
-            i += 1
+        if not is_meaningful_text(item['content']):
+            return False
         
-        # 4. Extract meaningful standalone statements
-        paragraphs = [clean_text(p) for p in cleaned_text.split('\n\n+')]
+        self.seen_content.add(normalized)
+        self.accepted += 1
+        return True
+    
+    def add_page(self, candidates: List[Candidate]) -> List[Dict]:
+        """Add the candidates of the next page, returning newly accepted items"""
+        self.page_number += 1
+        new_items = []
         
-        for para in paragraphs:
-            if not is_meaningful_text(para):
+        for rule, item_type, content in candidates:
+            if self.is_duplicate(rule, content):
                 continue
             
-            word_cnt = word_count(para)
-            sentence_count = len(re.findall(r'[.!?]', para))
+            item = {
+                'type': item_type,
+                'content': content,
+                'pageNumber': self.page_number,
+                'position': self.position
+            }
+            self.position += 1
+            self.index.add(content)
             
-            if (sentence_count >= 1 and sentence_count <= 3 and
-                10 <= word_cnt <= 50 and
-                re.match(r'^[A-Z]', para) and
-                re.search(r'[.!?]$', para.strip())):
-                
-                # Check if already captured
-                already_captured = any(
-                    item['content'][:30] in para or para[:30] in item['content']
-                    for item in items
-                )
-                
-                if not already_captured:
-                    item_type = 'quote' if is_quotation(para) else 'verse'
-                    items.append({
-                        'type': item_type,
-                        'content': para,
-                        'pageNumber': page_number,
-                        'position': position
-                    })
-                    position += 1
-        
-        # 5. Extract code blocks
-        code_patterns = [
-            r'```[\s\S]{20,500}?```',
-            r'<code>[\s\S]{20,500}?</code>',
-        ]
-        
-        for pattern in code_patterns:
-            for match in re.finditer(pattern, cleaned_text, re.IGNORECASE):
-                content = clean_text(match.group(0))
-                if 20 < len(content) < 1000:
-                    items.append({
-                        'type': 'code',
-                        'content': content,
-                        'pageNumber': page_number,
-                        'position': position
-                    })
-                    position += 1
-    
-    # Final deduplication
-    unique_items = []
-    seen_content = set()
-    
-    for item in items:
-        normalized = item['content'].lower()[:60]
+            if self.accept(item):
+                new_items.append(item)
         
-        if normalized in seen_content:
-            continue
-        
-        if not is_meaningful_text(item['content']):
-            continue
-        
-        # Check for near-duplicates
-        is_duplicate = any(
-            seen[:50] == normalized[:50] for seen in seen_content
-        )
-        
-        if not is_duplicate:
-            seen_content.add(normalized)
-            unique_items.append(item)
-    
-    # Sort by page number and position
-    unique_items.sort(key=lambda x: (x['pageNumber'], x.get('position', 0)))
-    
-    # Limit to 300 high-quality items
-    return unique_items[:300]
-
-
-
-
+        return new_items
 
+async def iter_pdf_items(pdf_path: str, backend: Optional[ExtractorBackend] = None) -> AsyncIterator[List[Dict]]:
+    """Yield batches of extracted items page by page while the PDF is parsed"""
+    extractor = ItemExtractor()
+    
+    pages = iter_page_ranges(pdf_path, extract_page_range_candidates, backend)
+    try:
+        async for candidates in pages:
+            new_items = extractor.add_page(candidates)
+            if new_items:
+                yield new_items
+            
+            # Items are in page order, so nothing later can make the cut
+            if extractor.done:
+                break
+    finally:
+        await pages.aclose()
 
+def read_pdf_items(pdf_path: str) -> List[Dict]:
+    """Synchronously extract a PDF's items, reading pages only until the item limit is reached"""
+    extractor = ItemExtractor()
+    items = []
+    backend, _ = select_backend(pdf_path)
+    
+    for start, end in split_page_ranges(count_pdf_pages(pdf_path)):
+        for page_text in read_pdf_page_range(pdf_path, start, end, backend):
+            items.extend(extractor.add_page(extract_page_candidates(page_text)))
+            if extractor.done:
+                return items
+    
+    return items
 
+def extract_items_from_text(pages: List[str]) -> List[Dict]:
+    """Extract quotations, verses, and code from text pages"""
+    extractor = ItemExtractor()
+    items = []
+    
+    for page_text in pages:
+        items.extend(extractor.add_page(extract_page_candidates(page_text)))
+        if extractor.done:
+            break
+    
+    return items
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Optional
+from prisma import Prisma
+
+def average_rating(rating_sum: int, rating_count: int) -> Optional[float]:
+    """Average rating, or None for a book without reviews"""
+    if rating_count <= 0:
+        return None
+    return rating_sum / rating_count
+
+async def apply_rating_change(tx: Prisma, book_id: str, count_delta: int, sum_delta: int):
+    """Adjust a book's rating aggregates inside a transaction
+
+    The increments are applied by the database, so concurrent reviews of
+    the same book can't overwrite each other's changes. The update locks
+    the book row until commit, so the average written next always matches
+    the count and sum it was computed from.
+    """
+    book = await tx.book.update(
+        where={"id": book_id},
+        data={
+            "ratingCount": {"increment": count_delta},
+            "ratingSum": {"increment": sum_delta}
+        }
+    )
+    await tx.book.update(
+        where={"id": book_id},
+        data={"avgRating": average_rating(book.ratingSum, book.ratingCount)}
+    )
+
+async def lock_review(tx: Prisma, review_id: str):
+    """Lock a review row for the rest of the transaction, or return None if missing
+
+    Reading the old rating only after the row is locked means two
+    concurrent edits of the same review can't both subtract the same
+    old rating from the book's aggregates.
+    """
+    locked = await tx.review.update_many(
+        where={"id": review_id},
+        data={"updatedAt": datetime.now()}
+    )
+    if not locked:
+        return None
+    return await tx.review.find_unique(where={"id": review_id})
+
+async def reconcile_rating_aggregates(db: Prisma) -> int:
+    """Rebuild every book's rating aggregates from its reviews
+
+    Returns the number of books that have reviews.
+    """
+    groups = await db.review.group_by(
+        by=["bookId"],
+        count=True,
+        sum={"rating": True}
+    )
+
+    # One batch, so readers never see the aggregates half rebuilt
+    async with db.batch_() as batcher:
+        batcher.book.update_many(
+            where={},
+            data={"ratingCount": 0, "ratingSum": 0, "avgRating": None}
+        )
+        for group in groups:
+            rating_count = group["_count"]["_all"]
+            rating_sum = group["_sum"]["rating"] or 0
+            batcher.book.update_many(
+                where={"id": group["bookId"]},
+                data={
+                    "ratingCount": rating_count,
+                    "ratingSum": rating_sum,
+                    "avgRating": average_rating(rating_sum, rating_count)
+                }
+            )
+
+    return len(groups)
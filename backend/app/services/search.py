@@ -0,0 +1,273 @@
+import html
+import re
+from typing import Dict, List, Optional, Tuple
+from prisma import Prisma
+from app.database import IS_SQLITE
+
+# Search documents (one row per book and per extracted item)
+KIND_BOOK = "book"
+KIND_ITEM = "item"
+
+# Rows per INSERT statement when (re)indexing
+INDEX_BATCH_SIZE = 100
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Private-use characters the database puts around matches. The snippet
+# is HTML-escaped before they become HIGHLIGHT_START/END, because the
+# text around them comes straight from uploads.
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+# The index lives outside the Prisma schema: Prisma can't declare FTS5
+# tables or generated tsvector columns, so it is created on startup.
+SQLITE_SCHEMA = [
+    # book_id is indexed (but never searched by users) so a book's rows can
+    # be found through the index when they are replaced or deleted
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED,
+        ref_id UNINDEXED,
+        item_type UNINDEXED,
+        book_id,
+        title,
+        author,
+        body,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+POSTGRES_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS search_index (
+        kind TEXT NOT NULL,
+        ref_id TEXT NOT NULL,
+        item_type TEXT,
+        book_id TEXT NOT NULL,
+        title TEXT,
+        author TEXT,
+        body TEXT,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(author, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(body, '')), 'C')
+        ) STORED,
+        PRIMARY KEY (kind, ref_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS search_index_document_idx ON search_index USING GIN (document)",
+    "CREATE INDEX IF NOT EXISTS search_index_book_id_idx ON search_index (book_id)",
+]
+
+# Column weights: title, author, body (kind, ref_id, item_type, book_id are 0)
+SQLITE_SEARCH = """
+    SELECT search_index.kind AS kind,
+           search_index.ref_id AS id,
+           search_index.item_type AS itemType,
+           search_index.book_id AS bookId,
+           b.title AS bookTitle,
+           snippet(search_index, -1, '{start}', '{end}', '…', 24) AS snippet,
+           -bm25(search_index, 0, 0, 0, 0, 10.0, 5.0, 1.0) AS score
+    FROM search_index
+    JOIN "Book" b ON b.id = search_index.book_id
+    WHERE search_index MATCH ? AND b."isPublic" = true {kind_filter}
+    ORDER BY score DESC
+    LIMIT ? OFFSET ?
+""".format(start=MATCH_START, end=MATCH_END, kind_filter="{kind_filter}")
+
+POSTGRES_SEARCH = """
+    SELECT s.kind AS kind,
+           s.ref_id AS id,
+           s.item_type AS "itemType",
+           s.book_id AS "bookId",
+           b.title AS "bookTitle",
+           ts_headline(
+               'english', concat_ws(' ', s.title, s.author, s.body), q,
+               'StartSel={start}, StopSel={end}, MinWords=15, MaxWords=35'
+           ) AS snippet,
+           ts_rank_cd(s.document, q) AS score
+    FROM search_index s
+    JOIN "Book" b ON b.id = s.book_id,
+         websearch_to_tsquery('english', $1) q
+    WHERE s.document @@ q AND b."isPublic" = true {kind_filter}
+    ORDER BY score DESC, s.ref_id
+    LIMIT $2 OFFSET $3
+""".format(start=MATCH_START, end=MATCH_END, kind_filter="{kind_filter}")
+
+SEARCH_TOKEN = re.compile(r'\w+')
+
+def fts5_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query over the searchable columns
+
+    Every word must match; the last one also matches as a prefix so
+    results show up while the user is still typing. Quoting each word
+    keeps FTS5 operators in user input from being interpreted.
+    """
+    tokens = SEARCH_TOKEN.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return "{title author body} : (" + " ".join(terms) + ")"
+
+def highlight_snippet(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escape a snippet, then turn its match markers into <mark> tags"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+
+def _placeholders(count: int, columns: int, start: int = 1) -> str:
+    """VALUES placeholders for count rows of columns values each"""
+    if IS_SQLITE:
+        row = "(" + ", ".join("?" * columns) + ")"
+        return ", ".join([row] * count)
+    rows = []
+    for r in range(count):
+        first = start + r * columns
+        rows.append("(" + ", ".join(f"${first + c}" for c in range(columns)) + ")")
+    return ", ".join(rows)
+
+def _param(index: int) -> str:
+    """The index-th (1-based) query parameter placeholder"""
+    return "?" if IS_SQLITE else f"${index}"
+
+async def ensure_search_index(db: Prisma):
+    """Create the search index if it doesn't exist yet"""
+    for statement in (SQLITE_SCHEMA if IS_SQLITE else POSTGRES_SCHEMA):
+        await db.execute_raw(statement)
+
+async def _insert_documents(db: Prisma, documents: List[Tuple]):
+    """Insert (kind, ref_id, item_type, book_id, title, author, body) rows"""
+    for start in range(0, len(documents), INDEX_BATCH_SIZE):
+        batch = documents[start:start + INDEX_BATCH_SIZE]
+        await db.execute_raw(
+            "INSERT INTO search_index (kind, ref_id, item_type, book_id, title, author, body) "
+            f"VALUES {_placeholders(len(batch), 7)}",
+            *[value for document in batch for value in document]
+        )
+
+async def _delete_documents(db: Prisma, book_id: str, kind: Optional[str] = None):
+    """Delete a book's documents (all of them, or only one kind)"""
+    if IS_SQLITE:
+        # Look the rows up through the index instead of scanning the table
+        query = (
+            "DELETE FROM search_index WHERE rowid IN "
+            "(SELECT rowid FROM search_index WHERE search_index MATCH ?)"
+        )
+        params = [f'book_id : "{book_id}"']
+    else:
+        query = "DELETE FROM search_index WHERE book_id = $1"
+        params = [book_id]
+
+    if kind:
+        query += f" AND kind = {_param(2)}"
+        params.append(kind)
+
+    await db.execute_raw(query, *params)
+
+def _book_document(book) -> Tuple:
+    return (KIND_BOOK, book.id, None, book.id, book.title, book.author, book.description)
+
+def _item_document(item) -> Tuple:
+    return (KIND_ITEM, item.id, item.type, item.bookId, None, None, item.content)
+
+async def index_book(db: Prisma, book):
+    """Add or refresh a book's own search document
+
+    Failures are logged rather than raised so a search index problem
+    never fails the write that triggered it; rebuild_search_index() fixes
+    any drift.
+    """
+    try:
+        await _delete_documents(db, book.id, KIND_BOOK)
+        await _insert_documents(db, [_book_document(book)])
+    except Exception as e:
+        print(f"Error indexing book {book.id}: {str(e)}")
+
+async def index_new_books(db: Prisma, books: List):
+    """Add the search documents of books that aren't indexed yet, in batched inserts"""
+    try:
+        await _insert_documents(db, [_book_document(book) for book in books])
+    except Exception as e:
+        print(f"Error indexing {len(books)} new books: {str(e)}")
+
+async def index_new_items(db: Prisma, items: List):
+    """Add the search documents of items that aren't indexed yet, in batched inserts"""
+    try:
+        await _insert_documents(db, [_item_document(item) for item in items])
+    except Exception as e:
+        print(f"Error indexing {len(items)} new items: {str(e)}")
+
+async def index_book_items(db: Prisma, book_id: str):
+    """Replace the search documents of a book's extracted items"""
+    try:
+        items = await db.extracteditem.find_many(where={"bookId": book_id})
+        await _delete_documents(db, book_id, KIND_ITEM)
+        await _insert_documents(db, [_item_document(item) for item in items])
+    except Exception as e:
+        print(f"Error indexing items of book {book_id}: {str(e)}")
+
+async def remove_book_from_index(db: Prisma, book_id: str):
+    """Remove a book and its items from the search index"""
+    try:
+        await _delete_documents(db, book_id)
+    except Exception as e:
+        print(f"Error removing book {book_id} from search index: {str(e)}")
+
+async def rebuild_search_index(db: Prisma, batch_size: int = 500) -> int:
+    """Rebuild the whole search index from the database, returning the document count"""
+    await ensure_search_index(db)
+    await db.execute_raw("DELETE FROM search_index")
+
+    total = 0
+    for delegate, to_document in ((db.book, _book_document), (db.extracteditem, _item_document)):
+        last_id = None
+        while True:
+            rows = await delegate.find_many(
+                where={"id": {"gt": last_id}} if last_id else {},
+                order={"id": "asc"},
+                take=batch_size
+            )
+            if not rows:
+                break
+            await _insert_documents(db, [to_document(row) for row in rows])
+            total += len(rows)
+            last_id = rows[-1].id
+
+    return total
+
+async def search(
+    db: Prisma,
+    text: str,
+    kind: Optional[str],
+    limit: int,
+    offset: int
+) -> List[Dict]:
+    """Ranked, highlighted matches among public books and their items
+
+    Snippets are HTML: escaped text with the matches wrapped in <mark>.
+    """
+    if IS_SQLITE:
+        query = fts5_query(text)
+        if query is None:
+            return []
+        sql = SQLITE_SEARCH
+    else:
+        query = text
+        sql = POSTGRES_SEARCH
+
+    kind_filter = f"AND kind = {_param(4)}" if kind else ""
+    kind_params = [kind] if kind else []
+
+    # SQLite binds "?" in textual order, PostgreSQL by number ($4 is kind)
+    if IS_SQLITE:
+        params = [query, *kind_params, limit, offset]
+    else:
+        params = [query, limit, offset, *kind_params]
+
+    results = await db.query_raw(sql.format(kind_filter=kind_filter), *params)
+    for result in results:
+        result["snippet"] = highlight_snippet(result["snippet"])
+    return results
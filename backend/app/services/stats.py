@@ -0,0 +1,269 @@
+import asyncio
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from prisma import Prisma
+
+# "materialized" reads the StatCounter table kept up to date by writes,
+# "live" counts the tables on every request
+DASHBOARD_STATS_SOURCE = os.getenv("DASHBOARD_STATS_SOURCE", "materialized").lower()
+
+REVIEW_DAYS = 30
+TOP_RATED_LIMIT = 10
+
+# StatCounter keys. Book counters cover public books, like totalBooks.
+STAT_BOOKS = "books"
+STAT_COLLECTIONS = "collections"  # public collections
+STAT_REVIEWS = "reviews"
+CATEGORY_PREFIX = "books:category:"
+LICENSE_PREFIX = "books:license:"
+ITEM_TYPE_PREFIX = "items:type:"
+REVIEW_DAY_PREFIX = "reviews:day:"
+
+# Stands in for a missing category in keys and results
+UNCATEGORIZED = "uncategorized"
+
+def category_key(category: Optional[str]) -> str:
+    return CATEGORY_PREFIX + (category or UNCATEGORIZED)
+
+def license_key(license_type: str) -> str:
+    return LICENSE_PREFIX + license_type
+
+def item_type_key(item_type: str) -> str:
+    return ITEM_TYPE_PREFIX + item_type
+
+def review_day_key(day: date) -> str:
+    return REVIEW_DAY_PREFIX + day.isoformat()
+
+def utc_day(moment: datetime) -> date:
+    """Calendar day of a timestamp in UTC (naive timestamps are taken as UTC)"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+def recent_days(days: int = REVIEW_DAYS) -> List[date]:
+    """The last `days` UTC days, oldest first, ending today"""
+    today = datetime.now(timezone.utc).date()
+    return [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+
+def book_stat_changes(book, sign: int) -> Dict[str, int]:
+    """Counter changes for adding (sign=1) or removing (sign=-1) a book"""
+    if not book.isPublic:
+        return {}
+    return {
+        STAT_BOOKS: sign,
+        category_key(book.category): sign,
+        license_key(book.licenseType): sign
+    }
+
+def item_stat_changes(old_counts: Dict[str, int], new_counts: Dict[str, int]) -> Dict[str, int]:
+    """Counter changes for replacing items with old_counts per type by new_counts"""
+    changes = {}
+    for item_type in set(old_counts) | set(new_counts):
+        delta = new_counts.get(item_type, 0) - old_counts.get(item_type, 0)
+        if delta:
+            changes[item_type_key(item_type)] = delta
+    return changes
+
+def _upsert_args(key: str, delta: int) -> Dict[str, Any]:
+    return {
+        "where": {"key": key},
+        "data": {
+            "create": {"key": key, "value": delta},
+            "update": {"value": {"increment": delta}}
+        }
+    }
+
+async def apply_stat_changes(client: Prisma, changes: Dict[str, int]):
+    """Apply counter changes with a client or an interactive transaction"""
+    for key, delta in changes.items():
+        if delta:
+            await client.statcounter.upsert(**_upsert_args(key, delta))
+
+def queue_stat_changes(batcher: Any, changes: Dict[str, int]):
+    """Add counter changes to a Prisma batch"""
+    for key, delta in changes.items():
+        if delta:
+            batcher.statcounter.upsert(**_upsert_args(key, delta))
+
+async def count_items_by_type(db: Prisma, where: Optional[Dict] = None) -> Dict[str, int]:
+    """Number of extracted items per type"""
+    groups = await db.extracteditem.group_by(by=["type"], where=where or {}, count=True)
+    return {group["type"]: group["_count"]["_all"] for group in groups}
+
+async def _count_books_by(db: Prisma, field: str) -> Dict[str, int]:
+    groups = await db.book.group_by(by=[field], where={"isPublic": True}, count=True)
+    return {group[field] or UNCATEGORIZED: group["_count"]["_all"] for group in groups}
+
+async def _top_rated_books(db: Prisma) -> List[Dict]:
+    """Highest average rating first; avgRating is maintained by review writes"""
+    books = await db.book.find_many(
+        where={"isPublic": True, "ratingCount": {"gt": 0}},
+        order=[{"avgRating": "desc"}, {"ratingCount": "desc"}],
+        take=TOP_RATED_LIMIT
+    )
+    return [
+        {
+            "id": book.id,
+            "title": book.title,
+            "author": book.author,
+            "avgRating": book.avgRating,
+            "ratingCount": book.ratingCount
+        }
+        for book in books
+    ]
+
+def _stats_response(
+    totals: Dict[str, int],
+    books_by_category: Dict[str, int],
+    books_by_license: Dict[str, int],
+    items_by_type: Dict[str, int],
+    reviews_by_day: Dict[date, int],
+    top_rated: List[Dict]
+) -> Dict:
+    return {
+        "totalBooks": totals["books"],
+        "totalCollections": totals["collections"],
+        "totalReviews": totals["reviews"],
+        "totalUsers": totals["users"],
+        "booksByCategory": books_by_category,
+        "booksByLicense": books_by_license,
+        "itemsByType": items_by_type,
+        "reviewsPerDay": [
+            {"date": day.isoformat(), "count": reviews_by_day.get(day, 0)}
+            for day in recent_days()
+        ],
+        "topRatedBooks": top_rated
+    }
+
+async def live_stats(db: Prisma) -> Dict:
+    """Dashboard statistics counted from the tables, all queries at once"""
+    since = datetime.combine(recent_days()[0], datetime.min.time(), tzinfo=timezone.utc)
+    (
+        total_books, total_collections, total_reviews, total_users,
+        by_category, by_license, by_type, recent_reviews, top_rated
+    ) = await asyncio.gather(
+        db.book.count(where={"isPublic": True}),
+        db.collection.count(where={"isPublic": True}),
+        db.review.count(),
+        db.user.count(),
+        _count_books_by(db, "category"),
+        _count_books_by(db, "licenseType"),
+        count_items_by_type(db),
+        db.review.find_many(where={"createdAt": {"gte": since}}),
+        _top_rated_books(db)
+    )
+
+    return _stats_response(
+        {"books": total_books, "collections": total_collections, "reviews": total_reviews, "users": total_users},
+        by_category,
+        by_license,
+        by_type,
+        Counter(utc_day(review.createdAt) for review in recent_reviews),
+        top_rated
+    )
+
+def _with_prefix(counters: Dict[str, int], prefix: str) -> Dict[str, int]:
+    return {key[len(prefix):]: value for key, value in counters.items() if key.startswith(prefix) and value}
+
+async def materialized_stats(db: Prisma) -> Dict:
+    """Dashboard statistics read from StatCounter rows
+
+    The cost doesn't depend on how many books, items or reviews there
+    are. Users are signed up by the Next.js app, outside this API, so
+    they are still counted live.
+    """
+    days = recent_days()
+    counter_rows, day_rows, total_users, top_rated = await asyncio.gather(
+        db.statcounter.find_many(where={"NOT": {"key": {"startswith": REVIEW_DAY_PREFIX}}}),
+        db.statcounter.find_many(where={"key": {"in": [review_day_key(day) for day in days]}}),
+        db.user.count(),
+        _top_rated_books(db)
+    )
+    counters = {row.key: row.value for row in counter_rows}
+    reviews_by_day = {date.fromisoformat(row.key[len(REVIEW_DAY_PREFIX):]): row.value for row in day_rows}
+
+    return _stats_response(
+        {
+            "books": counters.get(STAT_BOOKS, 0),
+            "collections": counters.get(STAT_COLLECTIONS, 0),
+            "reviews": counters.get(STAT_REVIEWS, 0),
+            "users": total_users
+        },
+        _with_prefix(counters, CATEGORY_PREFIX),
+        _with_prefix(counters, LICENSE_PREFIX),
+        _with_prefix(counters, ITEM_TYPE_PREFIX),
+        reviews_by_day,
+        top_rated
+    )
+
+async def get_dashboard_stats(db: Prisma) -> Dict:
+    """Dashboard statistics from the configured source"""
+    if DASHBOARD_STATS_SOURCE == "live":
+        return await live_stats(db)
+    return await materialized_stats(db)
+
+async def rebuild_stat_counters(db: Prisma) -> int:
+    """Recompute every StatCounter row from the tables, returning the row count"""
+    total_books, total_collections, total_reviews, by_category, by_license, by_type = await asyncio.gather(
+        db.book.count(where={"isPublic": True}),
+        db.collection.count(where={"isPublic": True}),
+        db.review.count(),
+        _count_books_by(db, "category"),
+        _count_books_by(db, "licenseType"),
+        count_items_by_type(db)
+    )
+
+    counters = {
+        STAT_BOOKS: total_books,
+        STAT_COLLECTIONS: total_collections,
+        STAT_REVIEWS: total_reviews
+    }
+    counters.update({category_key(None if c == UNCATEGORIZED else c): n for c, n in by_category.items()})
+    counters.update({license_key(l): n for l, n in by_license.items()})
+    counters.update({item_type_key(t): n for t, n in by_type.items()})
+
+    # Review history, a page at a time
+    reviews_per_day: Counter = Counter()
+    last_id = None
+    while True:
+        reviews = await db.review.find_many(
+            where={"id": {"gt": last_id}} if last_id else {},
+            order={"id": "asc"},
+            take=1000
+        )
+        if not reviews:
+            break
+        reviews_per_day.update(utc_day(review.createdAt) for review in reviews)
+        last_id = reviews[-1].id
+    counters.update({review_day_key(day): n for day, n in reviews_per_day.items()})
+
+    # One batch, so readers never see the counters half rebuilt
+    async with db.batch_() as batcher:
+        batcher.statcounter.delete_many(where={})
+        for key, value in counters.items():
+            batcher.statcounter.create(data={"key": key, "value": value})
+
+    return len(counters)
+
+def review_stat_changes(review, sign: int) -> Dict[str, int]:
+    """Counter changes for creating (sign=1) or deleting (sign=-1) a review"""
+    return {
+        STAT_REVIEWS: sign,
+        review_day_key(utc_day(review.createdAt)): sign
+    }
+
+def collection_stat_changes(collection, sign: int) -> Dict[str, int]:
+    """Counter changes for creating (sign=1) or deleting (sign=-1) a collection"""
+    return {STAT_COLLECTIONS: sign} if collection.isPublic else {}
+
+async def book_removal_changes(db: Prisma, book) -> Dict[str, int]:
+    """Counter changes for deleting a book along with its items and reviews"""
+    item_counts = await count_items_by_type(db, {"bookId": book.id})
+    reviews = await db.review.find_many(where={"bookId": book.id})
+    changes = Counter(book_stat_changes(book, -1))
+    changes.update(item_stat_changes(item_counts, {}))
+    for review in reviews:
+        changes.update(review_stat_changes(review, -1))
+    return dict(changes)
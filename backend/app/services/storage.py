@@ -0,0 +1,96 @@
+import hashlib
+import os
+from typing import BinaryIO, Optional
+import aiofiles
+from fastapi import UploadFile
+
+# Go up from backend/app/services to backend, then to project root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+PROJECT_ROOT = os.path.dirname(BASE_DIR)
+UPLOADS_DIR = os.path.join(PROJECT_ROOT, "public", "uploads", "books")
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Size limits
+MAX_PDF_SIZE = int(os.getenv("MAX_PDF_SIZE", str(500 * 1024 * 1024)))
+MAX_COVER_IMAGE_SIZE = 5 * 1024 * 1024
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload goes over its size limit while being saved"""
+
+class SavedUpload:
+    """Size and SHA-256 of a file saved by save_upload"""
+
+    def __init__(self, path: str, size: int, content_hash: str):
+        self.path = path
+        self.size = size
+        self.content_hash = content_hash
+
+def resolve_upload_path(url: str) -> str:
+    """Map a public upload URL (e.g. /uploads/books/x.pdf) to its path on disk"""
+    return os.path.join(PROJECT_ROOT, "public", url.lstrip("/"))
+
+async def save_upload(upload: UploadFile, path: str, max_size: Optional[int] = None) -> SavedUpload:
+    """Stream an upload to disk in fixed-size chunks
+
+    The file is hashed in the same pass and never held in memory as a
+    whole. If it grows past max_size the partial file is removed and
+    UploadTooLargeError is raised.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLargeError(f"{upload.filename} is larger than {max_size} bytes")
+
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        remove_file(path)
+        raise
+
+    return SavedUpload(path, size, digest.hexdigest())
+
+def save_stream(source: BinaryIO, path: str, max_size: Optional[int] = None) -> SavedUpload:
+    """Blocking counterpart of save_upload for file objects (e.g. archive members)"""
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(path, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise UploadTooLargeError(f"{os.path.basename(path)} is larger than {max_size} bytes")
+
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        remove_file(path)
+        raise
+
+    return SavedUpload(path, size, digest.hexdigest())
+
+def safe_filename(filename: str) -> str:
+    """Keep only characters that are safe in an upload's file name"""
+    return "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_', '.'))
+
+def remove_file(path: str):
+    """Delete a file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
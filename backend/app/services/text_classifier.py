@@ -0,0 +1,195 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+# Classifications remembered per classifier (candidates repeat across passes)
+CLASSIFIER_CACHE_SIZE = int(os.getenv("CLASSIFIER_CACHE_SIZE", "8192"))
+
+# Patterns are compiled once at import time
+NUMBERS_OR_PAGE = re.compile(r'\d+$|Page \d+', re.IGNORECASE)
+# Deleting [a-zA-Z0-9\s] with str.translate leaves exactly the characters
+# r'[^a-zA-Z0-9\s]' matches, about twice as fast as findall(). U+3000 is
+# the highest whitespace code point.
+NON_SPECIAL_CHARS = {
+    code: None for code in range(0x3001)
+    if chr(code).isspace() or (code < 128 and chr(code).isalnum())
+}
+MEANINGFUL_WORD = re.compile(r'the|and|for|was|are|with|this|that|from|have')
+QUOTE_MARK = re.compile(r'["\'«»"]')
+# Dialogue indicators are looked up in lowercased text, which is much
+# faster than an IGNORECASE regex. The regex is only needed for ſ and ı,
+# which IGNORECASE treats as s and i but lower() leaves alone.
+DIALOGUE_WORDS = ('said', 'says', 'told', 'asked', 'replied', 'exclaimed', 'whispered', 'shouted')
+DIALOGUE_WORD = re.compile(r'[sſ]a[iı]d|[sſ]ay[sſ]|told|a[sſ]ked|repl[iı]ed|excla[iı]med|wh[iı][sſ]pered|[sſ]houted')
+# A run between sentence marks whose stripped length is over 10 chars
+LONG_SENTENCE = re.compile(r'[^.!?\s][^.!?]{9,}[^.!?\s]')
+NUMBERED_VERSE = re.compile(r'\d+[\.\)]\s+[A-Z]')
+
+SENTENCE_END = ('.', '!', '?')
+
+# Words split off the front of a text; most checks only need to know
+# whether there are "at least N" words, for N no larger than this
+HEAD_WORDS = 15
+
+def starts_with_capital(text: str) -> bool:
+    """Check if text starts with an ASCII capital letter"""
+    return 'A' <= text[:1] <= 'Z'
+
+def has_dialogue(text: str) -> bool:
+    """Check for dialogue indicators, ignoring case"""
+    # İ is the one letter lower() expands to two characters
+    lowered = text.replace('İ', 'i').lower()
+    if 'ſ' in lowered or 'ı' in lowered:
+        return DIALOGUE_WORD.search(lowered) is not None
+    return any(word in lowered for word in DIALOGUE_WORDS)
+
+def count_long_words(words: List[str]) -> int:
+    """Count words longer than 2 chars, stopping at 8 (all the checks need)"""
+    long_words = 0
+    for word in words:
+        if len(word) > 2:
+            long_words += 1
+            if long_words == 8:
+                break
+    return long_words
+
+def sentence_mark_count(text: str) -> int:
+    """Count sentence-ending punctuation marks"""
+    return text.count('.') + text.count('!') + text.count('?')
+
+class TextFeatures:
+    """Features of one candidate text
+
+    The text is stripped, measured and split once and every feature reuses
+    that work. Every caller asks whether a candidate is meaningful, so that
+    is decided up front; quotation and verse are evaluated on first use and
+    then remembered, so a page-sized paragraph that fails the length check
+    never pays for the quotation heuristics.
+    """
+
+    __slots__ = ('trimmed', 'capital', 'meaningful', '_head', '_quotation', '_verse')
+
+    def __init__(self, text: str):
+        self.trimmed = text.strip()
+        self.capital = starts_with_capital(self.trimmed)
+        self._head: Optional[List[str]] = None
+        self._quotation: Optional[bool] = None
+        self._verse: Optional[bool] = None
+        self.meaningful = self._is_meaningful()
+
+    @property
+    def head(self) -> List[str]:
+        """The first HEAD_WORDS words, followed by the unsplit rest if any"""
+        if self._head is None:
+            self._head = self.trimmed.split(None, HEAD_WORDS)
+        return self._head
+
+    def has_words(self, count: int) -> bool:
+        """Whether the text has at least count (<= HEAD_WORDS) words"""
+        return len(self.head) >= count
+
+    @property
+    def quotation(self) -> bool:
+        """Whether the text looks like a quotation"""
+        if self._quotation is None:
+            self._quotation = self._is_quotation()
+        return self._quotation
+
+    @property
+    def verse(self) -> bool:
+        """Whether the text looks like a verse"""
+        if self._verse is None:
+            self._verse = self._is_verse()
+        return self._verse
+
+    def _is_meaningful(self) -> bool:
+        """Whether the text is meaningful (not just filler)"""
+        trimmed = self.trimmed
+
+        # Skip very short or very long texts
+        if len(trimmed) < 25 or len(trimmed) > 600:
+            return False
+
+        # Skip if it's just numbers or page numbers. Past the length check
+        # these are the only header/footer patterns that can still match.
+        if NUMBERS_OR_PAGE.match(trimmed):
+            return False
+
+        # Must have some actual words (counting stops once 8 are found)
+        long_words = count_long_words(self.head[:HEAD_WORDS])
+        if long_words < 8 and len(self.head) > HEAD_WORDS:
+            long_words = count_long_words(trimmed.split())
+        if long_words < 4:
+            return False
+
+        # Skip if mostly special characters
+        special_chars = len(trimmed.translate(NON_SPECIAL_CHARS))
+        if special_chars / len(trimmed) > 0.4:
+            return False
+
+        # Check for meaningful words
+        return long_words >= 8 or bool(MEANINGFUL_WORD.search(trimmed.lower()))
+
+    def _is_quotation(self) -> bool:
+        trimmed = self.trimmed
+
+        # Has quotation marks and complete sentences
+        if trimmed.endswith(SENTENCE_END) and QUOTE_MARK.search(trimmed):
+            return True
+
+        # Is a statement without dialogue indicators
+        return (self.capital and
+                self.has_words(10) and
+                LONG_SENTENCE.search(trimmed) is not None and
+                not has_dialogue(trimmed))
+
+    def _is_verse(self) -> bool:
+        trimmed = self.trimmed
+
+        # Numbered verse
+        if NUMBERED_VERSE.match(trimmed):
+            return True
+
+        # Poetic structure
+        if '\n' in trimmed:
+            lines = [l.strip() for l in trimmed.split('\n') if l.strip()]
+            if 2 <= len(lines) <= 8:
+                avg_length = sum(len(l) for l in lines) / len(lines)
+                if 20 < avg_length < 100:
+                    capitalized = sum(1 for l in lines if starts_with_capital(l))
+                    if capitalized >= len(lines) * 0.7:
+                        return True
+
+        # Short meaningful statement
+        return (30 <= len(trimmed) <= 200 and
+                self.capital and
+                self.has_words(5) and
+                (len(self.head) <= HEAD_WORDS or len(trimmed.split()) <= 40) and
+                sentence_mark_count(trimmed) <= 2)
+
+class TextClassifier:
+    """Classifies candidate text, caching the features of recent candidates
+
+    The extraction passes ask about the same candidate several times
+    (meaningful, then quotation or verse, then meaningful again in the
+    final pass); with the cache only the first question costs anything.
+    """
+
+    def __init__(self, cache_size: int = CLASSIFIER_CACHE_SIZE):
+        self.classify = lru_cache(maxsize=cache_size)(TextFeatures)
+
+# Shared classifier used by the module-level helpers
+classifier = TextClassifier()
+
+def is_meaningful_text(text: str) -> bool:
+    """Check if text is meaningful (not just filler)"""
+    return classifier.classify(text).meaningful
+
+def is_quotation(text: str) -> bool:
+    """Check if text looks like a quotation"""
+    return classifier.classify(text).quotation
+
+def is_verse(text: str) -> bool:
+    """Check if text looks like a verse"""
+    return classifier.classify(text).verse
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Classifier Benchmark
+Times per-candidate classification with TextClassifier against the legacy
+regex heuristics, and checks that both give the same answers.
+
+Run from the backend directory:
+    python -m benchmarks.classifier_benchmark --candidates 20000
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+from typing import Callable, List
+
+from app.services.text_classifier import TextClassifier
+from benchmarks import legacy_classifier as legacy
+
+WORDS = (
+    "the and for was are with this that from have river light stone heart "
+    "night morning garden silver ancient kingdom shadow mountain voice dream "
+    "said asked whispered"
+).split()
+
+def make_candidates(count: int, seed: int = 42) -> List[str]:
+    """Build a deterministic mix of the text shapes the extractor classifies"""
+    rng = random.Random(seed)
+
+    def sentence(words: int) -> str:
+        text = ' '.join(rng.choice(WORDS) for _ in range(words))
+        return text[0].upper() + text[1:] + rng.choice('.!?')
+
+    shapes = [
+        lambda: sentence(rng.randint(8, 30)),
+        lambda: '"' + sentence(rng.randint(6, 20)) + '"',
+        lambda: f"{rng.randint(1, 150)}. " + sentence(rng.randint(6, 20)),
+        lambda: '\n'.join(sentence(rng.randint(5, 10)) for _ in range(rng.randint(2, 6))),
+        lambda: f"Page {rng.randint(1, 900)}",
+        lambda: '#@! %$ ' * rng.randint(4, 20),
+        lambda: ' '.join(sentence(rng.randint(10, 20)) for _ in range(rng.randint(3, 8))),
+    ]
+    return [rng.choice(shapes)() for _ in range(count)]
+
+def run_extractor_calls(candidates: List[str], meaningful: Callable, quotation: Callable, verse: Callable) -> list:
+    """Ask about each candidate the way the extraction passes do"""
+    results = []
+    for text in candidates:
+        results.append((
+            meaningful(text) and quotation(text),  # quotation and statement passes
+            verse(text) and meaningful(text),      # poetic verse pass
+            meaningful(text)                       # final deduplication pass
+        ))
+    return results
+
+def time_legacy(candidates: List[str]):
+    start = time.perf_counter()
+    results = run_extractor_calls(candidates, legacy.is_meaningful_text, legacy.is_quotation, legacy.is_verse)
+    return time.perf_counter() - start, results
+
+def time_classifier(candidates: List[str]):
+    classifier = TextClassifier(cache_size=len(candidates))
+    start = time.perf_counter()
+    results = []
+    for text in candidates:
+        # The passes classify a candidate once and read every feature they need
+        features = classifier.classify(text)
+        results.append((
+            features.meaningful and features.quotation,
+            features.verse and features.meaningful,
+            classifier.classify(text).meaningful
+        ))
+    return time.perf_counter() - start, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark candidate classification")
+    parser.add_argument("--candidates", type=int, default=20000, help="Number of candidates")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.candidates, args.seed)
+
+    # Alternate the variants so background noise hits both alike, and keep
+    # the garbage collector out of the timings as timeit does
+    legacy_runs, classifier_runs = [], []
+    gc.disable()
+    try:
+        for _ in range(args.repeat):
+            legacy_runs.append(time_legacy(candidates))
+            classifier_runs.append(time_classifier(candidates))
+    finally:
+        gc.enable()
+    legacy_time, legacy_results = min(legacy_runs, key=lambda r: r[0])
+    classifier_time, classifier_results = min(classifier_runs, key=lambda r: r[0])
+
+    if legacy_results != classifier_results:
+        raise SystemExit("❌ TextClassifier results differ from the legacy heuristics")
+
+    report = {
+        "candidates": len(candidates),
+        "legacyUsPerCandidate": round(legacy_time / len(candidates) * 1e6, 3),
+        "classifierUsPerCandidate": round(classifier_time / len(candidates) * 1e6, 3),
+        "speedup": round(legacy_time / classifier_time, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
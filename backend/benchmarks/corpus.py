@@ -0,0 +1,161 @@
+"""
+Synthetic Extraction Corpus
+Deterministic pages of text in the shapes the item extractor meets in real
+books (prose, numbered verses, code and dialogue pages), and a minimal PDF
+writer to turn them into documents.
+"""
+
+import random
+import zlib
+from typing import Dict, List, Tuple
+
+PAGE_KINDS = ["prose", "numbered_verses", "code", "dialogue"]
+
+WORDS = (
+    "the and for was are with this that from have river light stone heart "
+    "night morning garden silver ancient kingdom shadow mountain voice dream "
+    "memory winter harbour lantern forest journey silence promise window "
+    "letter father mother city road field water fire"
+).split()
+
+NAMES = ["Eleanor", "Thomas", "Marguerite", "Samuel", "Ada", "Jonah"]
+SPEECH_VERBS = ["said", "asked", "whispered", "replied", "called"]
+
+CODE_SNIPPETS = [
+    "def read_pages(path):\n    with open(path) as f:\n        return f.read().split('\\f')",
+    "for (let i = 0; i < items.length; i++) {\n  total += items[i].count;\n}",
+    "SELECT title, author FROM books WHERE year > 1900 ORDER BY title;",
+]
+
+LINE_WIDTH = 90
+
+class PageGenerator:
+    """Seeded generator of page texts"""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+
+    def words(self, count: int) -> str:
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def sentence(self, low: int = 8, high: int = 24) -> str:
+        text = self.words(self.rng.randint(low, high))
+        return text[0].upper() + text[1:] + self.rng.choice('..!?')
+
+    def paragraph(self, sentences: Tuple[int, int] = (3, 7)) -> str:
+        return ' '.join(self.sentence() for _ in range(self.rng.randint(*sentences)))
+
+    def prose(self) -> str:
+        paragraphs = []
+        for _ in range(self.rng.randint(3, 6)):
+            paragraph = self.paragraph()
+            if self.rng.random() < 0.4:
+                paragraph += ' "' + self.sentence(10, 25) + '"'
+            paragraphs.append(paragraph)
+        return '\n\n'.join(paragraphs)
+
+    def numbered_verses(self) -> str:
+        start = self.rng.randint(1, 120)
+        return '\n'.join(
+            f"{start + n}. {self.sentence(6, 20)}"
+            for n in range(self.rng.randint(8, 20))
+        )
+
+    def code(self) -> str:
+        parts = [self.paragraph((2, 4))]
+        for _ in range(self.rng.randint(1, 3)):
+            snippet = self.rng.choice(CODE_SNIPPETS)
+            if self.rng.random() < 0.5:
+                parts.append(f"```\n{snippet}\n```")
+            else:
+                parts.append(f"<code>{snippet}</code>")
+            parts.append(self.paragraph((1, 3)))
+        return '\n\n'.join(parts)
+
+    def dialogue(self) -> str:
+        lines = []
+        for _ in range(self.rng.randint(6, 14)):
+            speaker = self.rng.choice(NAMES)
+            verb = self.rng.choice(SPEECH_VERBS)
+            spoken = self.sentence(6, 18)
+            if self.rng.random() < 0.5:
+                lines.append(f'"{spoken}" {verb} {speaker}.')
+            else:
+                lines.append(f'{speaker} {verb}, "{spoken}"')
+        return '\n'.join(lines)
+
+    def page(self, kind: str) -> str:
+        return getattr(self, kind)()
+
+def make_corpus(pages_per_kind: int = 50, seed: int = 42) -> Dict[str, List[str]]:
+    """Page texts of every kind, the same for the same arguments"""
+    generator = PageGenerator(seed)
+    return {
+        kind: [generator.page(kind) for _ in range(pages_per_kind)]
+        for kind in PAGE_KINDS
+    }
+
+def _pdf_string(text: str) -> str:
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return '(' + escaped.encode('latin-1', 'replace').decode('latin-1') + ')'
+
+def _wrap(text: str, width: int = LINE_WIDTH) -> List[str]:
+    lines = []
+    for line in text.split('\n'):
+        while len(line) > width:
+            cut = line.rfind(' ', 0, width)
+            cut = cut if cut > 0 else width
+            lines.append(line[:cut])
+            line = line[cut:].lstrip()
+        lines.append(line)
+    return lines
+
+def _page_stream(text: str) -> bytes:
+    commands = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+    for line in _wrap(text)[:64]:
+        commands.append(f"{_pdf_string(line)} Tj T*")
+    commands.append("ET")
+    return zlib.compress('\n'.join(commands).encode('latin-1', 'replace'))
+
+def make_pdf(pages: List[str]) -> bytes:
+    """A PDF with one page per text (Helvetica, no external dependencies)
+
+    Long pages are cut at what fits on an A4 page.
+    """
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    page_ids = []
+    for text in pages:
+        stream = _page_stream(text)
+        content = add(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, content)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(output)
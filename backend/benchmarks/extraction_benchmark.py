@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Extraction Benchmark
+Times every stage of item extraction on a synthetic corpus and reports
+pages/sec and items/sec per stage: PDF text extraction (also per backend,
+with its quality against the reference backend), cleaning, each of
+the five extraction passes and the final deduplication. Checks the
+extracted items against golden files so heuristic changes that alter
+results don't go unnoticed.
+
+Run from the backend directory:
+    python -m benchmarks.extraction_benchmark --pages-per-kind 50
+After an intended change to the heuristics, refresh the golden files:
+    python -m benchmarks.extraction_benchmark --update-golden
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.services.pdf_extractor import (
+    EXTRACTION_PASSES,
+    EXTRACTOR_BACKENDS,
+    ITEM_EXTRACTOR_VERSION,
+    REFERENCE_BACKEND,
+    ItemExtractor,
+    clean_text,
+    extract_items_from_text,
+    extract_pages_candidates,
+    read_pdf_page_range,
+    text_similarity,
+)
+from app.services.text_classifier import classifier
+from benchmarks.corpus import PAGE_KINDS, make_corpus, make_pdf
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+# The golden files are built from this corpus
+GOLDEN_PAGES_PER_KIND = 20
+GOLDEN_SEED = 42
+
+def best_of(repeat: int, run: Callable[[], int], prepare: Callable[[], None] = lambda: None) -> Tuple[float, int]:
+    """Fastest of `repeat` runs and its output count
+
+    Each run starts from an empty classifier cache, filled by prepare()
+    (untimed) with what earlier stages would have classified.
+    """
+    timings = []
+    for _ in range(repeat):
+        classifier.classify.cache_clear()
+        prepare()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            count = run()
+            timings.append((time.perf_counter() - start, count))
+        finally:
+            gc.enable()
+    return min(timings)
+
+def rates(seconds: float, pages: int, items: int) -> Dict:
+    return {
+        "seconds": round(seconds, 6),
+        "pagesPerSec": round(pages / seconds, 1) if seconds else None,
+        "itemsPerSec": round(items / seconds, 1) if seconds else None,
+        "items": items
+    }
+
+def benchmark_stages(pages: List[str], repeat: int, pdf: bool) -> Dict:
+    """Per-stage timings over the given pages
+
+    Items are what a stage outputs: pages of text for text extraction and
+    cleaning, candidates for the passes and accepted items for dedup.
+    """
+    stages = {}
+
+    if pdf:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = os.path.join(tmp, 'corpus.pdf')
+            with open(pdf_path, 'wb') as f:
+                f.write(make_pdf(pages))
+            seconds, count = best_of(repeat, lambda: len(read_pdf_page_range(pdf_path, 0, len(pages))))
+            stages["text_extraction"] = rates(seconds, len(pages), count)
+
+            # Each backend on the whole document, scored as when sampling
+            reference = EXTRACTOR_BACKENDS[REFERENCE_BACKEND](pdf_path, 0, len(pages))
+            for name, read in EXTRACTOR_BACKENDS.items():
+                seconds, count = best_of(repeat, lambda read=read: len(read(pdf_path, 0, len(pages))))
+                stages[f"text_extraction:{name}"] = {
+                    **rates(seconds, len(pages), count),
+                    "quality": round(text_similarity(reference, read(pdf_path, 0, len(pages))), 4)
+                }
+
+    seconds, count = best_of(repeat, lambda: len([clean_text(page) for page in pages]))
+    stages["cleaning"] = rates(seconds, len(pages), count)
+    cleaned = [clean_text(page) for page in pages]
+
+    # Each pass sees the cache left by the passes before it, as in extract_page_candidates
+    for n, (name, find) in enumerate(EXTRACTION_PASSES):
+        def warm(earlier=EXTRACTION_PASSES[:n]):
+            for _, earlier_find in earlier:
+                for text in cleaned:
+                    earlier_find(text)
+
+        seconds, count = best_of(repeat, lambda find=find: sum(len(find(text)) for text in cleaned), warm)
+        stages[name] = rates(seconds, len(pages), count)
+
+    candidates = extract_pages_candidates(pages)
+
+    # Without the item limit, so every page is deduplicated
+    def dedup():
+        extractor = ItemExtractor(limit=sys.maxsize)
+        return sum(len(extractor.add_page(page_candidates)) for page_candidates in candidates)
+
+    seconds, count = best_of(repeat, dedup, lambda: extract_pages_candidates(pages))
+    stages["dedup"] = rates(seconds, len(pages), count)
+
+    stages["total"] = benchmark_total(pages, repeat)
+    return stages
+
+def benchmark_total(pages: List[str], repeat: int) -> Dict:
+    """Timing of the whole text-to-items pipeline"""
+    seconds, count = best_of(repeat, lambda: len(extract_items_from_text(pages)))
+    return rates(seconds, len(pages), count)
+
+def golden_items(corpus: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+    """Items extracted from each kind of page"""
+    return {kind: extract_items_from_text(pages) for kind, pages in corpus.items()}
+
+def golden_path(kind: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{kind}.json")
+
+def check_golden(items: Dict[str, List[Dict]]) -> List[str]:
+    """Kinds whose items differ from their golden file"""
+    changed = []
+    for kind, kind_items in items.items():
+        try:
+            with open(golden_path(kind)) as f:
+                expected = json.load(f)["items"]
+        except FileNotFoundError:
+            changed.append(f"{kind} (no golden file)")
+            continue
+        if not expected:
+            # Nothing to compare against; such a kind doesn't belong in the corpus
+            changed.append(f"{kind} (no golden items)")
+        elif expected != kind_items:
+            changed.append(kind)
+    return changed
+
+def update_golden(items: Dict[str, List[Dict]]):
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for kind, kind_items in items.items():
+        with open(golden_path(kind), 'w') as f:
+            json.dump({
+                "itemExtractorVersion": ITEM_EXTRACTOR_VERSION,
+                "pagesPerKind": GOLDEN_PAGES_PER_KIND,
+                "seed": GOLDEN_SEED,
+                "items": kind_items
+            }, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark item extraction stages")
+    parser.add_argument("--pages-per-kind", type=int, default=50, help="Pages of each kind in the corpus")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage (best is reported)")
+    parser.add_argument("--no-pdf", action="store_true", help="Skip timing text extraction from a generated PDF")
+    parser.add_argument("--update-golden", action="store_true", help="Rewrite the golden files instead of checking them")
+    args = parser.parse_args()
+
+    golden = golden_items(make_corpus(GOLDEN_PAGES_PER_KIND, GOLDEN_SEED))
+    if args.update_golden:
+        update_golden(golden)
+        print(f"✅ Updated golden files in {GOLDEN_DIR}", file=sys.stderr)
+        return
+
+    corpus = make_corpus(args.pages_per_kind, args.seed)
+    all_pages = [page for kind in PAGE_KINDS for page in corpus[kind]]
+
+    report = {
+        "pagesPerKind": args.pages_per_kind,
+        "stages": benchmark_stages(all_pages, args.repeat, not args.no_pdf),
+        "byKind": {
+            kind: benchmark_total(corpus[kind], args.repeat)
+            for kind in PAGE_KINDS
+        }
+    }
+
+    changed = check_golden(golden)
+    report["goldenMismatches"] = changed
+    print(json.dumps(report, indent=2))
+
+    if changed:
+        print(f"❌ Extracted items differ from the golden files: {', '.join(changed)}", file=sys.stderr)
+        print("   If the change is intended, bump ITEM_EXTRACTOR_VERSION and run with --update-golden", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Classifier heuristics as they were before TextClassifier, kept as the
+reference the classifier benchmark measures against and checks results with.
+"""
+import re
+
+def word_count(text: str) -> int:
+    """Count words in text"""
+    return len(text.split())
+
+def is_meaningful_text(text: str) -> bool:
+    """Check if text is meaningful (not just filler)"""
+    trimmed = text.strip()
+    
+    # Skip very short or very long texts
+    if len(trimmed) < 25 or len(trimmed) > 600:
+        return False
+    
+    # Skip if it's just numbers or page numbers
+    if re.match(r'^\d+$', trimmed) or re.match(r'^Page \d+', trimmed, re.IGNORECASE):
+        return False
+    
+    # Skip common headers/footers
+    header_footer_patterns = [
+        r'^(Chapter|Section|Page \d+|\d+)$',
+        r'^(Table of Contents|Index|Bibliography)$',
+        r'^\d+$',
+        r'^[A-Z\s]{1,5}$',
+    ]
+    
+    for pattern in header_footer_patterns:
+        if re.match(pattern, trimmed, re.IGNORECASE):
+            return False
+    
+    # Must have some actual words
+    words = [w for w in trimmed.split() if len(w) > 2]
+    if len(words) < 4:
+        return False
+    
+    # Skip if mostly special characters
+    special_chars = len(re.findall(r'[^a-zA-Z0-9\s]', trimmed))
+    if special_chars / len(trimmed) > 0.4:
+        return False
+    
+    # Check for meaningful words
+    meaningful_words = ['the', 'and', 'for', 'was', 'are', 'with', 'this', 'that', 'from', 'have']
+    has_meaningful = any(word in trimmed.lower() for word in meaningful_words)
+    
+    return has_meaningful or len(words) >= 8
+
+def is_quotation(text: str) -> bool:
+    """Check if text looks like a quotation"""
+    trimmed = text.strip()
+    
+    # Has quotation marks
+    has_quotes = bool(re.search(r'["\'«»"]', trimmed))
+    
+    # Starts with capital letter
+    starts_with_capital = bool(re.match(r'^[A-Z]', trimmed))
+    
+    # Has complete sentences
+    has_complete_sentence = bool(re.search(r'[.!?]$', trimmed))
+    
+    # Contains dialogue indicators
+    has_dialogue = bool(re.search(r'(said|says|told|asked|replied|exclaimed|whispered|shouted)', trimmed, re.IGNORECASE))
+    
+    # Is a statement
+    sentences = [s.strip() for s in re.split(r'[.!?]', trimmed) if len(s.strip()) > 10]
+    is_statement = len(sentences) >= 1
+    
+    return (has_quotes and has_complete_sentence) or \
+           (starts_with_capital and is_statement and not has_dialogue and word_count(trimmed) >= 10)
+
+def is_verse(text: str) -> bool:
+    """Check if text looks like a verse"""
+    trimmed = text.strip()
+    
+    # Numbered verse
+    if re.match(r'^\d+[\.\)]\s+[A-Z]', trimmed):
+        return True
+    
+    # Poetic structure
+    lines = [l.strip() for l in trimmed.split('\n') if l.strip()]
+    if 2 <= len(lines) <= 8:
+        avg_length = sum(len(l) for l in lines) / len(lines)
+        if 20 < avg_length < 100:
+            capitalized = sum(1 for l in lines if re.match(r'^[A-Z]', l))
+            if capitalized >= len(lines) * 0.7:
+                return True
+    
+    # Short meaningful statement
+    if 30 <= len(trimmed) <= 200 and \
+       re.match(r'^[A-Z]', trimmed) and \
+       5 <= word_count(trimmed) <= 40:
+        sentence_count = len(re.findall(r'[.!?]', trimmed))
+        if sentence_count <= 2:
+            return True
+    
+    return False
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+Drives every router's endpoints under concurrency and reports latency
+percentiles and throughput per endpoint as JSON. Seed the database first
+(python -m benchmarks.seed).
+
+Run from the backend directory, against a running server:
+    python -m benchmarks.load_test --base-url http://localhost:8000 --output results.json
+or in this process, without a server:
+    python -m benchmarks.load_test --in-process --output results.json
+
+Compare against an earlier run; regressions fail with exit status 1:
+    python -m benchmarks.load_test --in-process --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_TERMS = ["river", "ancient", "digital", "mystery", "light", "garden"]
+
+class Endpoint:
+    """A request to time, built from the IDs found in the database"""
+
+    def __init__(self, name: str, method: str, path: Callable[[random.Random, Dict], str], body: Optional[Callable] = None, write: bool = False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.write = write
+
+# One or more endpoints of every router; writes only run with --writes
+ENDPOINTS = [
+    Endpoint("GET /api/books", "GET", lambda rng, ids: "/api/books"),
+    Endpoint("GET /api/books?category", "GET", lambda rng, ids: "/api/books?category=fiction&limit=20"),
+    Endpoint("GET /api/books/{id}", "GET", lambda rng, ids: f"/api/books/{rng.choice(ids['books'])}"),
+    Endpoint("GET /api/books/{id}/items", "GET", lambda rng, ids: f"/api/books/{rng.choice(ids['books'])}/items"),
+    Endpoint("GET /api/books/{id}/reviews", "GET", lambda rng, ids: f"/api/books/{rng.choice(ids['books'])}/reviews"),
+    Endpoint("GET /api/reviews?bookId", "GET", lambda rng, ids: f"/api/reviews?bookId={rng.choice(ids['books'])}"),
+    Endpoint("GET /api/collections", "GET", lambda rng, ids: "/api/collections?isPublic=true"),
+    Endpoint("GET /api/collections/{id}", "GET", lambda rng, ids: f"/api/collections/{rng.choice(ids['collections'])}"),
+    Endpoint("GET /api/dashboard/stats", "GET", lambda rng, ids: "/api/dashboard/stats"),
+    Endpoint("GET /api/search", "GET", lambda rng, ids: f"/api/search?q={rng.choice(SEARCH_TERMS)}"),
+    Endpoint("GET /api/admin/books", "GET", lambda rng, ids: "/api/admin/books"),
+    Endpoint("POST /api/auth/signup", "POST", lambda rng, ids: "/api/auth/signup"),
+    Endpoint(
+        "POST /api/reviews", "POST", lambda rng, ids: "/api/reviews",
+        body=lambda rng, ids: {"bookId": rng.choice(ids["books"]), "content": "Load test review", "rating": rng.randint(1, 5)},
+        write=True
+    ),
+    Endpoint(
+        "POST /api/collections", "POST", lambda rng, ids: "/api/collections",
+        body=lambda rng, ids: {"name": "Load test collection", "isPublic": False},
+        write=True
+    ),
+]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Latency percentiles (ms) and throughput of one endpoint's run"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughputRps": round(count / elapsed, 1) if elapsed else 0.0,
+        "meanMs": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+        "p50Ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95Ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99Ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "maxMs": round(ordered[-1] * 1000, 2) if count else 0.0
+    }
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: Endpoint, ids: Dict, requests: int, concurrency: int, seed: int) -> Dict:
+    """Send `requests` requests from `concurrency` concurrent workers"""
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path = endpoint.path(rng, ids)
+            body = endpoint.body(rng, ids) if endpoint.body else None
+            start = time.perf_counter()
+            try:
+                response = await client.request(endpoint.method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+async def discover_ids(client: httpx.AsyncClient) -> Dict[str, List[str]]:
+    """IDs of public books and collections to request, fetched through the API"""
+    books = (await client.get("/api/books?limit=100")).json()["books"]
+    collections = (await client.get("/api/collections?isPublic=true")).json()
+    ids = {
+        "books": [book["id"] for book in books],
+        "collections": [collection["id"] for collection in collections]
+    }
+    if not ids["books"] or not ids["collections"]:
+        raise SystemExit("❌ No public books or collections found; run python -m benchmarks.seed first")
+    return ids
+
+@asynccontextmanager
+async def open_client(base_url: Optional[str]):
+    """A client for a running server, or for the app in this process"""
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+            yield client
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+    sys.path.insert(0, BACKEND_DIR)
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+            yield client
+
+async def run_load_test(args) -> Dict:
+    endpoints = [e for e in ENDPOINTS if args.writes or not e.write]
+    if args.endpoint:
+        endpoints = [e for e in endpoints if any(f in e.name for f in args.endpoint)]
+
+    results = {}
+    async with open_client(None if args.in_process else args.base_url) as client:
+        ids = await discover_ids(client)
+        for n, endpoint in enumerate(endpoints):
+            # Warm up caches and connections before timing
+            await run_endpoint(client, endpoint, ids, min(args.warmup, args.requests), args.concurrency, args.seed + n)
+            results[endpoint.name] = await run_endpoint(
+                client, endpoint, ids, args.requests, args.concurrency, args.seed + n
+            )
+            print(f"{endpoint.name}: {results[endpoint.name]}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "target": "in-process" if args.in_process else args.base_url,
+            "requestsPerEndpoint": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version()
+        },
+        "endpoints": results
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Regressions of current against baseline beyond threshold (e.g. 0.1 = 10%)"""
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50Ms", "p95Ms", "p99Ms"):
+            if before[metric] and now[metric] > before[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before[metric]} -> {now[metric]}")
+        if before["throughputRps"] and now["throughputRps"] < before["throughputRps"] * (1 - threshold):
+            regressions.append(f"{name}: throughputRps {before['throughputRps']} -> {now['throughputRps']}")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Server to test")
+    parser.add_argument("--in-process", action="store_true", help="Test the app in this process instead of a server")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests per endpoint")
+    parser.add_argument("--endpoint", action="append", help="Only endpoints whose name contains this (repeatable)")
+    parser.add_argument("--writes", action="store_true", help="Also time endpoints that create rows")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for request parameters")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        if report["regressions"]:
+            print("❌ Regressions against the baseline:", file=sys.stderr)
+            for regression in report["regressions"]:
+                print(f"   {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("✅ No regressions against the baseline", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
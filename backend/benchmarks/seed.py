@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark Data Seeder
+Fills the database in DATABASE_URL with a configurable number of books,
+extracted items, reviews and collections for the load test. Books are
+based on SAMPLE_BOOKS from scripts/create-sample-books-direct.py.
+
+Seeded rows have IDs starting with "bench-"; seeding again replaces them.
+Use a throwaway database. Run from the backend directory:
+    python -m benchmarks.seed --books 1000 --items-per-book 50 --reviews-per-book 10 --collections 100
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_BOOKS_SCRIPT = os.path.join(BACKEND_DIR, '..', 'scripts', 'create-sample-books-direct.py')
+
+# Prefix of every seeded ID
+BENCH_PREFIX = "bench-"
+
+# The API writes reviews and collections as this placeholder user until
+# authentication lands, so the seeded user takes its ID
+BENCH_USER_ID = "temp_user_id"
+BENCH_USER_EMAIL = "bench@bookloom.local"
+
+# Rows per insert
+SEED_BATCH_SIZE = 500
+
+ITEM_TEXTS = {
+    "quote": [
+        '"The river remembers every stone it has ever carried."',
+        '"Courage is only fear that has said its prayers."',
+        '"We are the stories we tell ourselves at night."',
+    ],
+    "verse": [
+        "The silver morning breaks on ancient stone,\nAnd every shadow finds its way back home.",
+        "Beneath the mountain sleeps a quiet voice,\nThat asks the wandering heart to make a choice.",
+        "1. In the beginning was the garden and the light.",
+    ],
+}
+
+REVIEW_TEXTS = [
+    "A wonderful read from start to finish.",
+    "Beautifully written, though the middle drags a little.",
+    "Not for me, but I can see why others love it.",
+    "One of the best books in this collection.",
+]
+
+def load_sample_books() -> List[Dict]:
+    """SAMPLE_BOOKS from the direct book creation script"""
+    spec = importlib.util.spec_from_file_location("create_sample_books_direct", SAMPLE_BOOKS_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SAMPLE_BOOKS
+
+async def insert_rows(db, model: str, rows: List[Dict]):
+    """Insert rows in batches (createMany where the database supports it)"""
+    from app.database import SUPPORTS_CREATE_MANY
+
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        chunk = rows[start:start + SEED_BATCH_SIZE]
+        async with db.batch_() as batcher:
+            delegate = getattr(batcher, model)
+            if SUPPORTS_CREATE_MANY:
+                delegate.create_many(data=chunk)
+            else:
+                for row in chunk:
+                    delegate.create(data=row)
+
+async def clear_seeded(db):
+    """Delete rows left by a previous seed (items, reviews and links cascade)"""
+    await db.collection.delete_many(where={"id": {"startswith": BENCH_PREFIX}})
+    await db.book.delete_many(where={"id": {"startswith": BENCH_PREFIX}})
+
+def make_books(count: int, rng: random.Random) -> List[Dict]:
+    sample_books = load_sample_books()
+    rows = []
+    for n in range(count):
+        sample = sample_books[n % len(sample_books)]
+        edition = n // len(sample_books)
+        rows.append({
+            "id": f"{BENCH_PREFIX}book-{n}",
+            "title": sample["title"] + (f" (Volume {edition + 1})" if edition else ""),
+            "author": sample.get("author"),
+            "description": sample.get("description"),
+            "publicationYear": sample.get("publication_year"),
+            "category": sample.get("category"),
+            "licenseType": sample["license_type"],
+            "status": sample["status"],
+            # A few private books, like a real catalog
+            "isPublic": rng.random() >= 0.1,
+            "analyzedAt": datetime.now(),
+            "authorId": BENCH_USER_ID
+        })
+    return rows
+
+def make_items(book_ids: List[str], per_book: int, rng: random.Random) -> List[Dict]:
+    rows = []
+    for book_id in book_ids:
+        for position in range(per_book):
+            item_type = rng.choice(list(ITEM_TEXTS))
+            rows.append({
+                "bookId": book_id,
+                "type": item_type,
+                "content": rng.choice(ITEM_TEXTS[item_type]),
+                "pageNumber": position // 5 + 1,
+                "position": position
+            })
+    return rows
+
+def make_reviews(book_ids: List[str], per_book: int, rng: random.Random) -> List[Dict]:
+    now = datetime.now()
+    rows = []
+    for book_id in book_ids:
+        for _ in range(per_book):
+            rows.append({
+                "bookId": book_id,
+                "userId": BENCH_USER_ID,
+                "content": rng.choice(REVIEW_TEXTS),
+                "rating": rng.randint(1, 5),
+                # Spread over two months for the reviews-per-day statistics
+                "createdAt": now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+            })
+    return rows
+
+async def seed(
+    db,
+    books: int,
+    items_per_book: int,
+    reviews_per_book: int,
+    collections: int,
+    books_per_collection: int = 10,
+    seed_value: int = 42
+) -> Dict[str, int]:
+    """Replace the seeded data and rebuild everything derived from it"""
+    from app.services.ratings import reconcile_rating_aggregates
+    from app.services.search import rebuild_search_index
+    from app.services.stats import rebuild_stat_counters
+
+    rng = random.Random(seed_value)
+
+    await db.user.upsert(
+        where={"id": BENCH_USER_ID},
+        data={
+            "create": {"id": BENCH_USER_ID, "email": BENCH_USER_EMAIL, "name": "Benchmark User"},
+            "update": {}
+        }
+    )
+    await clear_seeded(db)
+
+    book_rows = make_books(books, rng)
+    book_ids = [row["id"] for row in book_rows]
+    await insert_rows(db, "book", book_rows)
+    await insert_rows(db, "extracteditem", make_items(book_ids, items_per_book, rng))
+    await insert_rows(db, "review", make_reviews(book_ids, reviews_per_book, rng))
+
+    collection_rows = [
+        {
+            "id": f"{BENCH_PREFIX}collection-{n}",
+            "name": f"Benchmark Collection {n + 1}",
+            "isPublic": rng.random() >= 0.2,
+            "userId": BENCH_USER_ID
+        }
+        for n in range(collections)
+    ]
+    await insert_rows(db, "collection", collection_rows)
+    await insert_rows(db, "collectionbook", [
+        {"collectionId": row["id"], "bookId": book_id}
+        for row in collection_rows
+        for book_id in rng.sample(book_ids, min(books_per_collection, len(book_ids)))
+    ])
+
+    # Derived data the API normally keeps up to date on every write
+    await reconcile_rating_aggregates(db)
+    await rebuild_stat_counters(db)
+    await rebuild_search_index(db)
+
+    return {
+        "books": books,
+        "items": books * items_per_book,
+        "reviews": books * reviews_per_book,
+        "collections": collections
+    }
+
+async def run(args):
+    load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+    from app.database import prisma, startup_db, shutdown_db
+
+    await startup_db()
+    try:
+        start = time.perf_counter()
+        counts = await seed(
+            prisma,
+            books=args.books,
+            items_per_book=args.items_per_book,
+            reviews_per_book=args.reviews_per_book,
+            collections=args.collections,
+            books_per_collection=args.books_per_collection,
+            seed_value=args.seed
+        )
+    finally:
+        await shutdown_db()
+
+    print(f"✅ Seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database for benchmarks")
+    parser.add_argument("--books", type=int, default=500, help="Number of books")
+    parser.add_argument("--items-per-book", type=int, default=50, help="Extracted items per book")
+    parser.add_argument("--reviews-per-book", type=int, default=10, help="Reviews per book")
+    parser.add_argument("--collections", type=int, default=50, help="Number of collections")
+    parser.add_argument("--books-per-collection", type=int, default=10, help="Books in each collection")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
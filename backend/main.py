@@ -1,17 +1,40 @@
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from typing import Optional, List
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+from app.database import db_pool, prisma, read_your_writes_middleware, replica, startup_db, shutdown_db
+from app.middleware import TimingMiddleware
+from app.services.jobs import RUN_JOB_WORKERS, start_job_workers, stop_job_workers
+from app.services.metrics import METRICS_CONTENT_TYPE, METRICS_ENABLED, register_pool, render_metrics
+from app.services.search import ensure_search_index
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect the shared database client on startup and release it on shutdown"""
+    await startup_db()
+    await ensure_search_index(prisma)
+    if RUN_JOB_WORKERS:
+        await start_job_workers(prisma)
+    print("🚀 BookLoom API started successfully")
+    
+    yield
+    
+    await stop_job_workers()
+    await shutdown_db()
+    print("👋 BookLoom API shutting down")
+
 app = FastAPI(
     title="BookLoom API",
     description="Backend API for BookLoom application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -39,9 +62,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Clients that write read from the primary for a while (see DATABASE_REPLICA_URL)
+app.middleware("http")(read_your_writes_middleware)
+
+# Added last so it's outermost and times everything above
+if METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+    register_pool(db_pool)
+
 # Import routers
-from app.routers import books, admin, reviews, collections, auth, dashboard
-from app.database import startup_db, shutdown_db
+from app.routers import books, admin, reviews, collections, auth, dashboard, search
 
 # Include routers
 app.include_router(books.router, prefix="/api/books", tags=["books"])
@@ -50,18 +80,7 @@ app.include_router(reviews.router, prefix="/api/reviews", tags=["reviews"])
 app.include_router(collections.router, prefix="/api/collections", tags=["collections"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
-
-@app.on_event("startup")
-async def startup():
-    """Startup event handler"""
-    await startup_db()
-    print("🚀 BookLoom API started successfully")
-
-@app.on_event("shutdown")
-async def shutdown():
-    """Shutdown event handler"""
-    await shutdown_db()
-    print("👋 BookLoom API shutting down")
+app.include_router(search.router, prefix="/api/search", tags=["search"])
 
 @app.get("/")
 async def root():
@@ -71,6 +90,22 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/api/health/db")
+async def health_db():
+    """Database connection and pool usage"""
+    return {
+        "connected": prisma.is_connected(),
+        "replicaConnected": replica.is_connected() if replica is not None else None,
+        "pool": db_pool.stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request and database pool metrics in the Prometheus text format"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
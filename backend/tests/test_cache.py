@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from redis.asyncio.client import Pipeline
+from app.services.cache import CachedResponse, MemoryCacheBackend, RedisCacheBackend
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def entry(body: bytes, *tags: str) -> CachedResponse:
+    return CachedResponse(body, 60, tags)
+
+def redis_backends(count: int = 2):
+    """Backends of separate "processes" sharing one fake Redis server"""
+    server = fakeredis.FakeServer()
+    return [RedisCacheBackend(client=fakeredis.aioredis.FakeRedis(server=server)) for _ in range(count)]
+
+def test_redis_round_trip():
+    async def scenario():
+        backend, = redis_backends(1)
+        await backend.set("/api/books?", entry(b"[1]", "books"), 60, await backend.generation())
+        cached = await backend.get("/api/books?")
+        assert cached.body == b"[1]"
+        assert cached.tags == {"books"}
+    run(scenario())
+
+def test_redis_invalidate_evicts_only_tagged_entries():
+    async def scenario():
+        a, b = redis_backends()
+        since = await a.generation()
+        await a.set("list", entry(b"list", "books"), 60, since)
+        await a.set("stats", entry(b"stats", "stats"), 60, since)
+        await b.invalidate(["books"])
+        assert await a.get("list") is None
+        assert (await a.get("stats")).body == b"stats"
+    run(scenario())
+
+def test_redis_drops_load_that_overlapped_invalidation_in_another_process():
+    async def scenario():
+        a, b = redis_backends()
+        since = await a.generation()
+        # Process B commits a write and invalidates while A is still loading
+        await b.invalidate(["book:1"])
+        await a.set("detail", entry(b"old", "book:1"), 60, since)
+        assert await a.get("detail") is None
+
+        # Unrelated tags aren't affected
+        await a.set("other", entry(b"other", "book:2"), 60, since)
+        assert (await a.get("other")).body == b"other"
+
+        # A load that starts after the invalidation is stored
+        await a.set("detail", entry(b"new", "book:1"), 60, await a.generation())
+        assert (await a.get("detail")).body == b"new"
+    run(scenario())
+
+def test_redis_invalidate_removes_entry_added_while_reading_tag_set(monkeypatch):
+    async def scenario():
+        a, b = redis_backends()
+        await a.set("first", entry(b"first", "books"), 60, await a.generation())
+        since = await b.generation()
+
+        original = Pipeline.smembers
+        added = []
+
+        async def smembers_then_add(self, *args):
+            members = await original(self, *args)
+            if not added:
+                added.append(True)
+                await b.set("second", entry(b"second", "books"), 60, since)
+            return members
+
+        monkeypatch.setattr(Pipeline, "smembers", smembers_then_add)
+        await a.invalidate(["books"])
+
+        assert await a.get("first") is None
+        assert await a.get("second") is None
+    run(scenario())
+
+def test_memory_drops_load_that_overlapped_invalidation():
+    async def scenario():
+        backend = MemoryCacheBackend()
+        since = await backend.generation()
+        await backend.invalidate(["books"])
+        await backend.set("list", entry(b"old", "books"), 60, since)
+        assert await backend.get("list") is None
+
+        await backend.set("list", entry(b"new", "books"), 60, await backend.generation())
+        assert (await backend.get("list")).body == b"new"
+    run(scenario())
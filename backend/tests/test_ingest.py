@@ -0,0 +1,96 @@
+import asyncio
+import io
+import json
+import os
+import zipfile
+import pytest
+
+pytest.importorskip("prisma")
+pytest.importorskip("fastapi")
+
+from fastapi import UploadFile
+from app.services import ingest
+from app.services.ingest import (
+    RESULT_FAILED,
+    attach_files,
+    extract_archive,
+    mark_duplicates,
+    parse_manifest,
+    receive_files,
+    wanted_files,
+)
+
+PREFIX = "1700000000000"
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+class NoBooks:
+    """db.book of an empty library"""
+
+    async def find_many(self, where):
+        return []
+
+class EmptyDb:
+    book = NoBooks()
+
+def manifest(*files: str) -> str:
+    return json.dumps([{"file": file, "title": f"Book {n}"} for n, file in enumerate(files)])
+
+def make_zip(tmp_path, members) -> str:
+    path = str(tmp_path / "books.zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return path
+
+@pytest.fixture(autouse=True)
+def uploads_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "uploads"
+    directory.mkdir()
+    monkeypatch.setattr(ingest, "UPLOADS_DIR", str(directory))
+    return directory
+
+def test_same_file_name_in_different_directories(tmp_path, uploads_dir):
+    entries = parse_manifest(manifest("fiction/intro.pdf", "poetry/intro.pdf"))
+    archive = make_zip(tmp_path, [("fiction/intro.pdf", b"%PDF fiction"), ("poetry/intro.pdf", b"%PDF poetry")])
+
+    saved, errors = extract_archive(archive, wanted_files(entries, PREFIX))
+    attach_files(entries, saved, errors)
+    run(mark_duplicates(EmptyDb(), entries))
+
+    assert all(entry.pending for entry in entries)
+    assert entries[0].pdf_url != entries[1].pdf_url
+    assert entries[0].pdf.content_hash != entries[1].pdf.content_hash
+    assert sorted(os.listdir(uploads_dir)) == [f"{PREFIX}-0-intro.pdf", f"{PREFIX}-1-intro.pdf"]
+
+def test_names_differing_in_unsafe_characters_are_stored_apart(uploads_dir):
+    entries = parse_manifest(manifest("a?.pdf", "a*.pdf"))
+    files = [
+        UploadFile(io.BytesIO(b"%PDF one"), filename="a?.pdf"),
+        UploadFile(io.BytesIO(b"%PDF two"), filename="a*.pdf")
+    ]
+
+    saved, errors = run(receive_files(files, wanted_files(entries, PREFIX)))
+    attach_files(entries, saved, errors)
+
+    assert all(entry.pending for entry in entries)
+    assert entries[0].pdf_url != entries[1].pdf_url
+    assert len(os.listdir(uploads_dir)) == 2
+
+def test_ambiguous_paths_fail_their_entries(tmp_path, uploads_dir):
+    entries = parse_manifest(manifest("books/a.pdf", "../b.pdf", "c.pdf"))
+    archive = make_zip(tmp_path, [
+        ("books/a.pdf", b"%PDF one"),
+        ("books/./a.pdf", b"%PDF two"),
+        ("b.pdf", b"%PDF three"),
+        ("c.pdf", b"%PDF four")
+    ])
+
+    saved, errors = extract_archive(archive, wanted_files(entries, PREFIX))
+    attach_files(entries, saved, errors)
+
+    assert [entry.result.get("status") for entry in entries] == [RESULT_FAILED, RESULT_FAILED, None]
+    assert entries[0].result["error"] == "books/a.pdf is in the upload more than once"
+    assert entries[1].result["error"] == "../b.pdf is outside the upload"
+    assert os.listdir(uploads_dir) == [f"{PREFIX}-2-c.pdf"]
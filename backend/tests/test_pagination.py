@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("prisma")
+
+from app.services import jobs
+from app.services.jobs import assign_missing_positions, backfill_item_positions
+from app.services.pagination import DOCUMENT_ORDER, InvalidCursorError, decode_cursor, encode_cursor, find_page
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+class SqliteDb:
+    """The raw SQL part of a Prisma client, on a SQLite connection"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.connection.row_factory = sqlite3.Row
+
+    async def query_raw(self, query, *args):
+        return [dict(row) for row in self.connection.execute(query, args)]
+
+    async def execute_raw(self, query, *args):
+        return self.connection.execute(query, args).rowcount
+
+    @asynccontextmanager
+    async def tx(self):
+        with self.connection:
+            yield self
+
+def matches(row, where) -> bool:
+    for key, condition in where.items():
+        if key == "AND":
+            if not all(matches(row, w) for w in condition):
+                return False
+        elif key == "OR":
+            if not any(matches(row, w) for w in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = getattr(row, key)
+            if "gt" in condition and not value > condition["gt"]:
+                return False
+            if "lt" in condition and not value < condition["lt"]:
+                return False
+        elif getattr(row, key) != condition:
+            return False
+    return True
+
+class ItemDelegate:
+    """find_many of db.extracteditem over rows in memory"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def find_many(self, where, order, take):
+        rows = [row for row in self.rows if matches(row, where)]
+        for field_order in reversed(order):
+            (field, direction), = field_order.items()
+            rows.sort(key=lambda row: getattr(row, field), reverse=direction == "desc")
+        return rows[:take]
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(jobs, "IS_SQLITE", True)
+    connection = sqlite3.connect(":memory:")
+    connection.execute('CREATE TABLE "ExtractedItem" ("id" TEXT PRIMARY KEY, "bookId" TEXT, "position" INTEGER)')
+    connection.executemany(
+        'INSERT INTO "ExtractedItem" VALUES (?, ?, ?)',
+        [
+            ("a1", "a", 0), ("a4", "a", None), ("a2", "a", 1), ("a3", "a", None),
+            ("b1", "b", None), ("b2", "b", None),
+            ("c1", "c", 0)
+        ]
+    )
+    yield SqliteDb(connection)
+    connection.close()
+
+def test_assign_missing_positions_after_last_positioned_item():
+    rows = [
+        {"id": "x", "bookId": "a", "position": 5},
+        {"id": "z", "bookId": "a", "position": None},
+        {"id": "y", "bookId": "a", "position": None},
+        {"id": "w", "bookId": "b", "position": None}
+    ]
+    assert assign_missing_positions(rows) == [("y", 6), ("z", 7), ("w", 0)]
+
+def test_pages_items_stored_without_positions(db):
+    assert run(backfill_item_positions(db)) == 4
+    assert run(backfill_item_positions(db)) == 0
+
+    rows = [SimpleNamespace(**row) for row in run(db.query_raw('SELECT * FROM "ExtractedItem"'))]
+    delegate = ItemDelegate(rows)
+
+    async def all_pages(book_id):
+        ids, cursor = [], None
+        while True:
+            page, cursor = await find_page(delegate, {"bookId": book_id}, DOCUMENT_ORDER, 1, cursor)
+            ids += [row.id for row in page]
+            if not cursor:
+                return ids
+
+    assert run(all_pages("a")) == ["a1", "a2", "a3", "a4"]
+    assert run(all_pages("b")) == ["b1", "b2"]
+    assert run(all_pages("c")) == ["c1"]
+
+def test_cursor_with_null_sort_key_is_invalid():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor([None, "a1"]), DOCUMENT_ORDER)
@@ -0,0 +1,72 @@
+import sqlite3
+import pytest
+
+pytest.importorskip("prisma.models")
+pytest.importorskip("httpx")
+
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from app import database
+from app.database import READ_PRIMARY_HEADER, STICKY_COOKIE, PooledRoute, get_db, get_read_db
+
+def sqlite_db(path) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("CREATE TABLE book (title TEXT)")
+    db.execute("INSERT INTO book VALUES ('Dune')")
+    db.commit()
+    return db
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """App whose primary and replica are two SQLite files; the replica never catches up"""
+    primary = sqlite_db(tmp_path / "primary.db")
+    replica = sqlite_db(tmp_path / "replica.db")
+    monkeypatch.setattr(database, "prisma", primary)
+    monkeypatch.setattr(database, "replica", replica)
+
+    router = APIRouter(route_class=PooledRoute)
+
+    @router.get("/books")
+    async def list_books(db=Depends(get_read_db)):
+        return [title for title, in db.execute("SELECT title FROM book ORDER BY rowid")]
+
+    @router.post("/books")
+    async def add_book(title: str, db=Depends(get_db)):
+        db.execute("INSERT INTO book VALUES (?)", (title,))
+        db.commit()
+        return {"title": title}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.middleware("http")(database.read_your_writes_middleware)
+    yield TestClient(app)
+    primary.close()
+    replica.close()
+
+def test_reads_go_to_replica(client):
+    response = client.get("/books")
+    assert response.json() == ["Dune"]
+    assert STICKY_COOKIE not in response.cookies
+
+def test_writer_reads_its_writes_from_primary(client):
+    response = client.post("/books", params={"title": "Emma"})
+    assert response.status_code == 200
+    assert STICKY_COOKIE in response.cookies
+
+    # The client sends the sticky cookie back, so it reads from the primary
+    assert client.get("/books").json() == ["Dune", "Emma"]
+
+    # Another client still reads from the lagging replica
+    client.cookies.clear()
+    assert client.get("/books").json() == ["Dune"]
+
+def test_read_primary_header(client):
+    client.post("/books", params={"title": "Emma"})
+    client.cookies.clear()
+    assert client.get("/books", headers={READ_PRIMARY_HEADER: "1"}).json() == ["Dune", "Emma"]
+
+def test_failed_write_does_not_pin_to_primary(client):
+    response = client.post("/books")
+    assert response.status_code == 422
+    assert STICKY_COOKIE not in response.cookies
+    assert client.get("/books").json() == ["Dune"]
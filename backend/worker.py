@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Run background job workers without the API server
+"""
+import asyncio
+import signal
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.database import prisma, startup_db, shutdown_db
+from app.services.jobs import JOB_CONCURRENCY, start_job_workers, stop_job_workers
+from app.services.search import ensure_search_index
+
+async def main():
+    await startup_db()
+    await ensure_search_index(prisma)
+    await start_job_workers(prisma, concurrency=JOB_CONCURRENCY)
+    print(f"⚙️  BookLoom job worker started ({JOB_CONCURRENCY} workers)")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await stop_job_workers()
+    await shutdown_db()
+    print("👋 BookLoom job worker shutting down")
+
+if __name__ == "__main__":
+    asyncio.run(main())
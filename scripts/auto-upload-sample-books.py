@@ -353,10 +353,9 @@ def upload_book_via_api(book_data: Dict, session: requests.Session) -> Dict:
 
 def upload_books_directly_to_db():
     """Alternative: Create books directly in database using Prisma"""
-    print("This method requires database access via Prisma Python client")
-    print("Would need to import and use Prisma client directly")
-    # This would bypass the API and create books directly
-    # Useful for faster bulk creation without PDF processing
+    # Bypasses the API; handles large manifests with PDFs, batching and checkpoints
+    print("Use the bulk loader to create books directly in the database:")
+    print("   python scripts/bulk-load-books.py --manifest books.ndjson")
 
 def main():
     """Main function to upload all sample books"""
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Item Positions Backfill Script
+Gives every extracted item stored without a position one, after the last
+positioned item of its book. Run it before pushing the schema that makes
+ExtractedItem.position required.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+async def backfill():
+    """Backfill missing extracted item positions"""
+    try:
+        from prisma import Prisma
+        from app.services.jobs import backfill_item_positions
+
+        print("=" * 60)
+        print("BookLoom - Item Positions Backfill")
+        print("=" * 60)
+
+        prisma = Prisma()
+        await prisma.connect()
+
+        try:
+            updated = await backfill_item_positions(prisma)
+        finally:
+            await prisma.disconnect()
+
+        print(f"\n✅ Backfilled positions of {updated} extracted items")
+
+    except ImportError:
+        print("❌ Error: Could not import Prisma")
+        print("   Make sure you're in the correct environment and Prisma is installed")
+        print("   Run: pip install prisma && prisma generate")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
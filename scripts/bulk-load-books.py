@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bulk Load Books Script
+Loads books and their extracted items straight into the database, without
+going through the API. Reads a JSON, CSV or NDJSON manifest (the fields of
+POST /api/admin/books/batch, or the bulk upload config's), extracts items
+from the PDFs in a process pool and inserts everything in batches.
+
+Progress is checkpointed after every batch; run the same command again to
+resume after a crash or Ctrl+C. A batch that was cut off is removed (only
+its own books and files) and loaded again.
+    python scripts/bulk-load-books.py --manifest books.ndjson
+"""
+
+import os
+import sys
+import asyncio
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+def default_checkpoint_path(manifest_path: str) -> str:
+    """books.ndjson -> books.checkpoint.json"""
+    return f"{os.path.splitext(manifest_path)[0]}.checkpoint.json"
+
+async def load(args):
+    """Load the manifest's books batch by batch"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
+
+        from app.database import prisma, connect_db, disconnect_db
+        from app.services.bulk_load import Checkpoint, load_batch, read_manifest, remove_partial_batch
+        from app.services.cache import TAG_BOOKS, TAG_STATS, response_cache
+
+        print("=" * 60)
+        print("BookLoom - Bulk Book Loader")
+        print("=" * 60)
+
+        manifest_path = os.path.abspath(args.manifest)
+        checkpoint_path = args.checkpoint or default_checkpoint_path(manifest_path)
+        checkpoint = Checkpoint.load(checkpoint_path, manifest_path)
+
+        await connect_db()
+        try:
+            removed = await remove_partial_batch(prisma, checkpoint)
+            if removed:
+                print(f"\n🧹 Removed {removed} books of the batch that was cut off")
+            if args.restart:
+                checkpoint.restart()
+            elif checkpoint.rows_done:
+                print(f"\n⏭️  Resuming after row {checkpoint.rows_done} (checkpoint: {checkpoint_path})")
+
+            rows = itertools.islice(enumerate(read_manifest(manifest_path)), checkpoint.rows_done, None)
+            prefix = str(int(time.time() * 1000))
+            loaded = 0
+            items = 0
+            start = time.perf_counter()
+
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                while True:
+                    batch = list(itertools.islice(rows, args.batch_size))
+                    if not batch:
+                        break
+
+                    counts = await load_batch(prisma, executor, batch, manifest_path, prefix, checkpoint)
+                    checkpoint.advance(len(batch), counts)
+
+                    loaded += len(batch)
+                    items += counts["items"]
+                    elapsed = time.perf_counter() - start
+                    print(
+                        f"📦 Row {checkpoint.rows_done}: {counts['created']} created, "
+                        f"{counts['duplicate']} duplicates, {counts['failed']} failed, {counts['items']} items | "
+                        f"{loaded / elapsed:.1f} books/s, {items / elapsed:.0f} items/s"
+                    )
+        finally:
+            await disconnect_db()
+
+        # Clears a shared (Redis) response cache; an in-memory one expires on its own
+        await response_cache.invalidate(TAG_BOOKS, TAG_STATS)
+
+        totals = checkpoint.totals
+        print("\n" + "=" * 60)
+        print("LOAD SUMMARY")
+        print("=" * 60)
+        print(f"\n📊 Rows: {checkpoint.rows_done}")
+        print(f"✅ Created: {totals['created']}")
+        print(f"⚠️  Duplicates: {totals['duplicate']}")
+        print(f"❌ Failed: {totals['failed']}")
+        print(f"📝 Items: {totals['items']}")
+
+    except ImportError:
+        print("❌ Error: Could not import Prisma")
+        print("   Make sure you're in the correct environment and Prisma is installed")
+        print("   Run: pip install prisma && prisma generate")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        print("   Run the same command again to resume from the last checkpoint")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load books straight into the database")
+    parser.add_argument("--manifest", required=True, help="Books to load (.json, .csv or .ndjson); PDF paths are relative to it")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("LOAD_BATCH_SIZE", "100")), help="Books per batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Processes extracting PDFs")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: next to the manifest)")
+    parser.add_argument("--restart", action="store_true", help="Start again from the first row; books already loaded are skipped as duplicates")
+    asyncio.run(load(parser.parse_args()))
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 """
 Bulk Upload Books Script
-This script helps upload multiple books to BookLoom via the API.
+This script uploads many books to BookLoom via the API, several at a time.
+Completed uploads are recorded in a manifest, so an interrupted run picks up
+where it stopped when started again with the same config.
 """
 
 import os
 import sys
-import requests
-from pathlib import Path
+import asyncio
+import httpx
+import random
+import time
+from contextlib import ExitStack
+from datetime import datetime
 from typing import List, Dict, Optional
 import json
 
@@ -17,19 +23,145 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 API_BASE_URL = os.getenv("API_URL", "http://localhost:8000")
 ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # You'll need to set this
 
+# Upload configuration
+DEFAULT_CONCURRENCY = 8  # books uploaded at once
+DEFAULT_MAX_CONNECTIONS = 8  # connections kept open to the API host
+DEFAULT_RETRIES = 5  # attempts after the first one
+DEFAULT_TIMEOUT = 300  # seconds per request; large PDFs take a while
+BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+BACKOFF_MAX = 60.0  # seconds
+PROGRESS_INTERVAL = 2.0  # seconds between throughput reports
+
+# Uploads aren't idempotent, so only failures where the server turned the
+# request away without processing it are retried: rate limiting and "busy"
+# (e.g. no database slot). A 500 or gateway error may come after the book
+# was created, and retrying would add it twice.
+RETRY_STATUSES = {429, 503}
+
+# Raised before any of the request was sent
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class UploadError(Exception):
+    """Raised when an upload fails"""
+    
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+class UploadManifest:
+    """
+    Completed uploads, one JSON object per line
+    Each line is flushed to disk as soon as its upload succeeds, so a crash
+    loses at most the uploads that were in flight
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Dict[str, Dict] = {}
+        self._file = None
+        
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut off by a crash
+                        continue
+                    self.completed[entry["key"]] = entry
+    
+    @staticmethod
+    def key(book: Dict) -> str:
+        """Identifies a book across runs: its PDF file"""
+        return os.path.abspath(book["pdf_path"])
+    
+    def is_done(self, book: Dict) -> bool:
+        return self.key(book) in self.completed
+    
+    def record(self, book: Dict, result: Dict):
+        """Mark a book as uploaded"""
+        entry = {
+            "key": self.key(book),
+            "title": book["title"],
+            "bookId": (result.get("book") or {}).get("id"),
+            "completedAt": datetime.now().isoformat(timespec="seconds")
+        }
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed[entry["key"]] = entry
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class Progress:
+    """Counts finished uploads and prints throughput while a run goes on"""
+    
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.started = time.perf_counter()
+    
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+    
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        remaining = self.total - self.done
+        eta = f"{remaining / rate / 60:.1f} min" if rate else "-"
+        return (
+            f"[{self.done}/{self.total}] {self.succeeded} ok, {self.failed} failed, {self.retries} retries | "
+            f"{rate:.2f} books/s, {self.bytes_sent / elapsed / (1024 * 1024) if elapsed else 0:.1f} MB/s | ETA {eta}"
+        )
+    
+    async def report(self, interval: float = PROGRESS_INTERVAL):
+        """Print a progress line every interval seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            print(f"📈 {self.line()}", file=sys.stderr)
+
 class BookUploader:
-    def __init__(self, api_url: str, token: Optional[str] = None):
+    def __init__(
+        self,
+        api_url: str,
+        token: Optional[str] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        retries: int = DEFAULT_RETRIES,
+        timeout: float = DEFAULT_TIMEOUT
+    ):
         self.api_url = api_url.rstrip('/')
         self.token = token
-        self.session = requests.Session()
-        
-        if token:
-            self.session.headers.update({
-                "Authorization": f"Bearer {token}"
-            })
+        self.concurrency = concurrency
+        self.max_connections = max_connections
+        self.retries = retries
+        self.timeout = timeout
     
-    def upload_book(
+    def open_client(self) -> httpx.AsyncClient:
+        """Client sharing at most max_connections connections to the API host"""
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        return httpx.AsyncClient(
+            base_url=self.api_url,
+            headers=headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+    
+    async def upload_book(
         self,
+        client: httpx.AsyncClient,
         pdf_path: str,
         title: str,
         author: Optional[str] = None,
@@ -40,18 +172,17 @@ class BookUploader:
         cover_image_path: Optional[str] = None,
         is_public: bool = True
     ) -> Dict:
-        """Upload a single book"""
+        """Upload a single book (one attempt)"""
         
         # Check if files exist
         if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            raise UploadError(f"PDF file not found: {pdf_path}")
         
         if cover_image_path and not os.path.exists(cover_image_path):
             print(f"Warning: Cover image not found: {cover_image_path}")
             cover_image_path = None
         
         # Prepare form data
-        files = {}
         data = {
             "title": title,
             "licenseType": license_type,
@@ -68,61 +199,96 @@ class BookUploader:
         if category:
             data["category"] = category
         
-        # Add PDF file
-        with open(pdf_path, 'rb') as pdf_file:
-            files['pdf'] = (os.path.basename(pdf_path), pdf_file, 'application/pdf')
+        # Files are opened for each attempt and streamed from disk in chunks,
+        # so a large PDF is never held in memory
+        with ExitStack() as stack:
+            files = {'pdf': (os.path.basename(pdf_path), stack.enter_context(open(pdf_path, 'rb')), 'application/pdf')}
             
-            # Add cover image if provided
             if cover_image_path:
                 cover_ext = os.path.splitext(cover_image_path)[1]
                 cover_mime = f"image/{cover_ext.lstrip('.').lower()}"
-                with open(cover_image_path, 'rb') as img_file:
-                    files['coverImage'] = (os.path.basename(cover_image_path), img_file, cover_mime)
-                    
-                    # Upload
-                    response = self.session.post(
-                        f"{self.api_url}/api/admin/books",
-                        files=files,
-                        data=data
-                    )
-            else:
-                # Upload without cover
-                response = self.session.post(
-                    f"{self.api_url}/api/admin/books",
-                    files=files,
-                    data=data
-                )
+                cover_file = stack.enter_context(open(cover_image_path, 'rb'))
+                files['coverImage'] = (os.path.basename(cover_image_path), cover_file, cover_mime)
+            
+            try:
+                response = await client.post("/api/admin/books", files=files, data=data)
+            except RETRY_ERRORS as e:
+                raise UploadError(f"Could not connect: {type(e).__name__}: {e}", retryable=True)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                # The book may have been created; check before uploading it again
+                raise UploadError(f"Request failed: {type(e).__name__}: {e}")
         
         if response.status_code in [200, 201]:
             return response.json()
-        else:
-            raise Exception(f"Upload failed: {response.status_code} - {response.text}")
+        raise UploadError(
+            f"Upload failed: {response.status_code} - {response.text}",
+            retryable=response.status_code in RETRY_STATUSES
+        )
     
-    def upload_from_config(self, config_file: str):
-        """Upload books from a JSON configuration file"""
-        with open(config_file, 'r', encoding='utf-8') as f:
-            books = json.load(f)
+    async def upload_with_retry(self, client: httpx.AsyncClient, book: Dict, progress: Progress) -> Dict:
+        """Upload a book, backing off exponentially (with jitter) between retries"""
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.upload_book(client, **book)
+            except UploadError as e:
+                if not e.retryable or attempt == self.retries:
+                    raise
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+                progress.retries += 1
+                print(f"🔁 {book['title']}: {e} (retrying in {delay:.1f}s)", file=sys.stderr)
+                await asyncio.sleep(delay)
+    
+    async def upload_books(self, books: List[Dict], manifest: UploadManifest) -> List[Dict]:
+        """Upload the books not in the manifest yet, `concurrency` at a time"""
+        pending = [book for book in books if not manifest.is_done(book)]
+        skipped = len(books) - len(pending)
+        if skipped:
+            print(f"⏭️  Skipping {skipped} books already uploaded (manifest: {manifest.path})")
         
+        progress = Progress(len(pending))
+        queue: asyncio.Queue = asyncio.Queue()
+        for book in pending:
+            queue.put_nowait(book)
         results = []
-        for i, book in enumerate(books, 1):
-            print(f"\n[{i}/{len(books)}] Uploading: {book['title']}")
-            try:
-                result = self.upload_book(**book)
-                results.append({
-                    "success": True,
-                    "book": book['title'],
-                    "result": result
-                })
-                print(f"✅ Successfully uploaded: {book['title']}")
-            except Exception as e:
-                results.append({
-                    "success": False,
-                    "book": book['title'],
-                    "error": str(e)
-                })
-                print(f"❌ Failed to upload {book['title']}: {str(e)}")
         
+        async def worker(client: httpx.AsyncClient):
+            while not queue.empty():
+                book = queue.get_nowait()
+                try:
+                    result = await self.upload_with_retry(client, book, progress)
+                    manifest.record(book, result)
+                    progress.succeeded += 1
+                    progress.bytes_sent += os.path.getsize(book['pdf_path'])
+                    results.append({"success": True, "book": book['title'], "result": result})
+                    print(f"✅ Successfully uploaded: {book['title']}")
+                except Exception as e:
+                    progress.failed += 1
+                    results.append({"success": False, "book": book['title'], "error": str(e)})
+                    print(f"❌ Failed to upload {book['title']}: {str(e)}")
+        
+        reporter = asyncio.create_task(progress.report())
+        try:
+            async with self.open_client() as client:
+                await asyncio.gather(*(worker(client) for _ in range(self.concurrency)))
+        finally:
+            reporter.cancel()
+            manifest.close()
+        
+        print(f"📈 {progress.line()}")
         return results
+    
+    async def upload_from_config(self, config_file: str, manifest_file: Optional[str] = None) -> List[Dict]:
+        """Upload books from a JSON configuration file"""
+        with open(config_file, 'r', encoding='utf-8') as f:
+            books = json.load(f)
+        
+        manifest = UploadManifest(manifest_file or default_manifest_path(config_file))
+        return await self.upload_books(books, manifest)
+
+
+def default_manifest_path(config_file: str) -> str:
+    """The manifest lives next to its config: books-config.json -> books-config.manifest.jsonl"""
+    return f"{os.path.splitext(config_file)[0]}.manifest.jsonl"
 
 
 def create_sample_config(output_file: str = "books-config.json"):
@@ -163,6 +329,38 @@ def create_sample_config(output_file: str = "books-config.json"):
     print("4. Run: python bulk-upload-books.py --config books-config.json")
 
 
+def create_test_set(count: int, output_dir: str) -> str:
+    """
+    Generate small PDFs and a config for them, to try the uploader against
+    a local backend. Returns the config path
+    """
+    from benchmarks.corpus import PAGE_KINDS, PageGenerator, make_pdf
+    
+    os.makedirs(output_dir, exist_ok=True)
+    generator = PageGenerator(seed=count)
+    books = []
+    for n in range(count):
+        kind = PAGE_KINDS[n % len(PAGE_KINDS)]
+        pdf_path = os.path.join(output_dir, f"test-book-{n + 1}.pdf")
+        with open(pdf_path, 'wb') as f:
+            f.write(make_pdf([generator.page(kind) for _ in range(5)]))
+        books.append({
+            "pdf_path": pdf_path,
+            "title": f"Upload Test Book {n + 1}",
+            "author": "Upload Test",
+            "category": "fiction",
+            "license_type": "public-domain",
+            "is_public": False
+        })
+    
+    config_path = os.path.join(output_dir, "books-config.json")
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(books, f, indent=2)
+    
+    print(f"✅ Created {count} test PDFs and {config_path}")
+    return config_path
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -176,19 +374,61 @@ if __name__ == "__main__":
     parser.add_argument(
         "--api-url",
         type=str,
-        default="http://localhost:8000",
+        default=API_BASE_URL,
         help="API base URL"
     )
     parser.add_argument(
         "--token",
         type=str,
+        default=ADMIN_TOKEN or None,
         help="Admin authentication token"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Books uploaded at once"
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=DEFAULT_MAX_CONNECTIONS,
+        help="Connections kept open to the API host"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="Retries of an upload the server turned away (429, 503) or that could not connect"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Seconds to wait for each request"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="Manifest of completed uploads (default: next to the config file)"
+    )
     parser.add_argument(
         "--create-sample",
         action="store_true",
         help="Create a sample configuration file"
     )
+    parser.add_argument(
+        "--create-test-set",
+        type=int,
+        metavar="COUNT",
+        help="Generate COUNT small PDFs and a config for them in --test-dir, then exit"
+    )
+    parser.add_argument(
+        "--test-dir",
+        type=str,
+        default="upload-test",
+        help="Directory for --create-test-set"
+    )
     
     args = parser.parse_args()
     
@@ -196,13 +436,24 @@ if __name__ == "__main__":
         create_sample_config()
         sys.exit(0)
     
+    if args.create_test_set:
+        create_test_set(args.create_test_set, args.test_dir)
+        sys.exit(0)
+    
     if not os.path.exists(args.config):
         print(f"Configuration file not found: {args.config}")
         print("Run with --create-sample to create a sample config file")
         sys.exit(1)
     
-    uploader = BookUploader(api_url=args.api_url, token=args.token)
-    results = uploader.upload_from_config(args.config)
+    uploader = BookUploader(
+        api_url=args.api_url,
+        token=args.token,
+        concurrency=args.concurrency,
+        max_connections=args.max_connections,
+        retries=args.retries,
+        timeout=args.timeout
+    )
+    results = asyncio.run(uploader.upload_from_config(args.config, args.manifest))
     
     # Print summary
     print("\n" + "="*50)
@@ -220,4 +471,5 @@ if __name__ == "__main__":
         for r in results:
             if not r['success']:
                 print(f"  - {r['book']}: {r['error']}")
-
+        print("\nRun the same command again to retry them; completed uploads are skipped")
+        sys.exit(1)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Dashboard Stats Rebuild Script
+Recomputes the dashboard counters from all books, items, reviews and collections.
+Run it once after upgrading, or if data was changed outside the API.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+async def rebuild():
+    """Recount every dashboard statistic"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
+
+        from prisma import Prisma
+        from app.services.stats import rebuild_stat_counters
+
+        print("=" * 60)
+        print("BookLoom - Dashboard Stats Rebuild")
+        print("=" * 60)
+
+        prisma = Prisma()
+        await prisma.connect()
+
+        try:
+            counters = await rebuild_stat_counters(prisma)
+        finally:
+            await prisma.disconnect()
+
+        print(f"\n✅ Rebuilt dashboard stats ({counters} counters)")
+
+    except ImportError:
+        print("❌ Error: Could not import Prisma")
+        print("   Make sure you're in the correct environment and Prisma is installed")
+        print("   Run: pip install prisma && prisma generate")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
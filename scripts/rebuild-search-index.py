@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Search Index Rebuild Script
+Rebuilds the full-text search index from all books and extracted items.
+Run it once after upgrading, or if books were changed outside the API.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+async def rebuild():
+    """Reindex every book and extracted item"""
+    try:
+        # DATABASE_URL decides between the SQLite and PostgreSQL index
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
+
+        from prisma import Prisma
+        from app.services.search import rebuild_search_index
+
+        print("=" * 60)
+        print("BookLoom - Search Index Rebuild")
+        print("=" * 60)
+
+        prisma = Prisma()
+        await prisma.connect()
+
+        try:
+            documents = await rebuild_search_index(prisma)
+        finally:
+            await prisma.disconnect()
+
+        print(f"\n✅ Rebuilt search index ({documents} documents)")
+
+    except ImportError:
+        print("❌ Error: Could not import Prisma")
+        print("   Make sure you're in the correct environment and Prisma is installed")
+        print("   Run: pip install prisma && prisma generate")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
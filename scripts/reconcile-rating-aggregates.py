@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Rating Aggregates Reconcile Script
+Rebuilds ratingCount, ratingSum and avgRating on every book from its reviews.
+Run it after adding the columns, or if reviews were changed outside the API.
+"""
+
+import os
+import sys
+import asyncio
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+async def reconcile():
+    """Recompute rating aggregates for all books"""
+    try:
+        from prisma import Prisma
+        from app.services.ratings import reconcile_rating_aggregates
+
+        print("=" * 60)
+        print("BookLoom - Rating Aggregates Reconcile")
+        print("=" * 60)
+
+        prisma = Prisma()
+        await prisma.connect()
+
+        try:
+            reviewed_books = await reconcile_rating_aggregates(prisma)
+        finally:
+            await prisma.disconnect()
+
+        print(f"\n✅ Rebuilt rating aggregates ({reviewed_books} books have reviews)")
+
+    except ImportError:
+        print("❌ Error: Could not import Prisma")
+        print("   Make sure you're in the correct environment and Prisma is installed")
+        print("   Run: pip install prisma && prisma generate")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())